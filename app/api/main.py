@@ -1,3 +1,5 @@
+import asyncio
+from app.core.backends import record_startup
 from fastapi import FastAPI
 from contextlib import asynccontextmanager
 from app.api.routes import router as api_router
@@ -7,6 +9,18 @@ from fastmcp.server.http import create_streamable_http_app
 from app.mcp.neo4j import neo4j_mcp
 from app.mcp.supabaseServer import supabase_mcp
 from app.mcp.weaviateServer import weaviate_mcp
+from app.mcp.federatedServer import federated_mcp
+from app.core.database import init_backends, close_backends
+from app.service.retriever import TARGET_COLLECTIONS
+from app.service.collection_router import collection_router
+from app.service.local_index import local_indexes
+from app.service.schema_cache import schema_cache
+from app.service.clova_proxy import close_clova_client
+from app.service.n8n_client import close_n8n_client
+from app.service.asset_catalog import asset_catalog
+from app.core.admission import PriorityMiddleware
+from app.core.metrics import MetricsMiddleware
+from app.core.query_log import QueryLogMiddleware, query_log
 
 # 1. 수동으로 MCP 전용 앱 생성 (버그 우회 방식 그대로 유지)
 supabase_app = create_streamable_http_app(
@@ -27,19 +41,53 @@ neo4j_app = create_streamable_http_app(
     debug=True
 )
 
+federated_app = create_streamable_http_app(
+    server=federated_mcp,
+    streamable_http_path="/sse",
+    debug=True
+)
+
 # 2. FastAPI 수명주기
 @asynccontextmanager
 async def combined_lifespan(app: FastAPI):
     # 1. 시작 로그
     print("✅ System Started: API & MCP are ready.")
     
+    # Gemini / Supabase / Weaviate / Neo4j를 백그라운드에서 동시에 연결하고,
+    # 연결이 끝나면 컬렉션 스키마(참조 관계) 캐시를 Warm-up 합니다. (서버 기동은 기다리지 않음)
+    async def warm_backends():
+        await init_backends()
+        await asyncio.to_thread(schema_cache.warm, TARGET_COLLECTIONS)
+    
+    warm_task = asyncio.get_running_loop().create_task(warm_backends())
+    
+    # 테이블 라우터 centroid 인덱스 로드 및 백그라운드 갱신 시작
+    collection_router.start(TARGET_COLLECTIONS)
+    
+    # 로컬 벡터 인덱스(핫 컬렉션 미러) 로드 및 증분 동기화 시작
+    local_indexes.start()
+    
+    # n8n 자산(뼈대 / 살점) 카탈로그 로드 및 파일 변경 감지 시작
+    asset_catalog.start()
+    
     # 2. MCP의 lifespan 실행 (context manager 호출)
     async with supabase_app.lifespan(app):
         async with weaviate_app.lifespan(app):
             async with neo4j_app.lifespan(app):
-                print("🚀 All Systems Ready: API, Supabase, Weaviate, Neo4j")
-                yield
+                async with federated_app.lifespan(app):
+                    record_startup("lifespan_ready")
+                    print("🚀 All Systems Ready: API, Supabase, Weaviate, Neo4j, Federated")
+                    yield
         
+    warm_task.cancel()
+    await asset_catalog.stop()
+    await local_indexes.stop()
+    await collection_router.stop()
+    await close_backends()
+    await close_clova_client()
+    await close_n8n_client()
+    await asyncio.to_thread(query_log.close)
+    
     # 3. 종료 로그
     print("🛑 System Stopped")
 
@@ -55,10 +103,22 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# 요청 헤더 X-Priority(interactive / default / batch)로 업스트림 대기열 우선순위 지정
+app.add_middleware(PriorityMiddleware)
+
+# 검색 요청 기록 (QUERY_LOG_ENABLED=true일 때만) - 단계별 소요 시간을 함께 남기도록 MetricsMiddleware 안쪽에 둠
+app.add_middleware(QueryLogMiddleware)
+
+# 요청별 소요 시간 / 상태 코드 기록 + 응답 헤더 Server-Timing (단계별 소요 시간)
+app.add_middleware(MetricsMiddleware)
+
 # 4. REST API 라우터 연결
 app.include_router(api_router)
 
 # 5. MCP 앱을 /mcp 경로에 마운트
 app.mount("/supabase/mcp", supabase_app) # 외부 Vector DB (Supabase)
 app.mount("/weaviate/mcp", weaviate_app) # 사내 Vector DB (Weaviate)
-app.mount("/neo4j/mcp", neo4j_app) # 사내 Graph DB (Neo4j)
\ No newline at end of file
+app.mount("/neo4j/mcp", neo4j_app) # 사내 Graph DB (Neo4j)
+app.mount("/federated/mcp", federated_app) # 통합 검색 (Supabase + Weaviate + Neo4j)
+
+record_startup("app_import")
\ No newline at end of file
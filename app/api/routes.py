@@ -1,35 +1,74 @@
 # app/api/routes.py
 import os
+import json
+import time
 import httpx
+import asyncio
+from typing import Optional
 from dotenv import load_dotenv
-from app.schemas import SearchQuery, Neo4jSearchQuery
-from fastapi import APIRouter, HTTPException, Request
-from app.service.retriever import search_logic, search_target_table, fetch_data_by_ids, search_neo4j_graph, embedding_query
+from app.schemas import SearchQuery, Neo4jSearchQuery, FederatedSearchQuery
+from fastapi import APIRouter, HTTPException, Request, Header
+from fastapi.responses import JSONResponse, StreamingResponse, Response
+from app.service.retriever import search_logic, search_table_details, search_neo4j_by_text, embedding_batcher, TARGET_COLLECTIONS
+from app.core.embedding_cache import embedding_cache
+from app.core.result_cache import result_cache
+from app.core.database import get_neo4j_pool_stats, backend_status, BACKENDS_REQUIRED
+from app.core.backends import import_timings, startup_timings
+from app.service.collection_router import collection_router
+from app.service.local_index import local_indexes
+from app.service.schema_cache import schema_cache
+from app.service.federated import federated_search
+from app.service.clova_proxy import (
+    NCP_CLOVA_URL, CLOVA_TIMEOUT, get_clova_client, build_ncp_payload, ncp_headers, to_openai_response, stream_openai_chunks,
+    ClovaStreamingResponse, completion_cache, is_cacheable, completion_cache_params
+)
+from app.core.circuit_breaker import breakers, CircuitOpenError
+from app.core.admission import admission, UpstreamOverloaded
+from app.core.metrics import span, observe_payload, text_size, metrics_payload
+from app.core.query_log import query_log
+from app.core.deadline import run_with_deadline, request_deadline, clamp_timeout, deadline_stats, DeadlineExceeded, REQUEST_DEADLINE
 
 load_dotenv()
 
-NCP_CLOVA_URL = os.getenv("NCP_CLOVA_URL")
+router = APIRouter()
 
-NCP_CLOVA_TOKEN = os.getenv("NCP_CLOVA_TOKEN")
+def request_timeout(x_request_timeout: Optional[float]) -> float:
+    """요청 헤더(X-Request-Timeout, 초)로 지정한 예산과 서버 기본 예산 중 짧은 쪽을 사용합니다."""
+    if x_request_timeout and x_request_timeout > 0:
+        return min(x_request_timeout, REQUEST_DEADLINE)
+    return REQUEST_DEADLINE
 
-NCP_CLOVA_REQUEST_ID = os.getenv("NCP_CLOVA_REQUEST_ID")
+def deadline_error(e: DeadlineExceeded) -> HTTPException:
+    return HTTPException(status_code=504, detail=str(e))
 
-router = APIRouter()
+def circuit_open_error(e: CircuitOpenError) -> HTTPException:
+    # 차단된 의존성은 기다리지 않고 바로 503 + 재시도 가능 시점을 알려줌
+    return HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(max(1, int(e.retry_after + 0.999)))})
+
+def overloaded_error(e: UpstreamOverloaded) -> HTTPException:
+    # 대기열이 가득 찬 업스트림은 오래 붙잡지 않고 바로 429 + 예상 대기 시간을 알려줌
+    return HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(max(1, int(e.retry_after + 0.999)))})
 
 @router.post("/search-docs")
-async def search_documents(payload: SearchQuery):
+async def search_documents(payload: SearchQuery, x_request_timeout: Optional[float] = Header(None)):
     try:
         # 하나하나 풀어서 넣을 필요 없이 payload 통째로 전달!
-        results = await search_logic(payload)
+        results = await run_with_deadline(search_logic(payload), request_timeout(x_request_timeout))
         
         return {"results": results}
         
+    except DeadlineExceeded as e:
+        raise deadline_error(e)
+    except CircuitOpenError as e:
+        raise circuit_open_error(e)
+    except UpstreamOverloaded as e:
+        raise overloaded_error(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
     
     
 @router.post("/search_table")
-async def search_table(payload: SearchQuery):
+async def search_table(payload: SearchQuery, x_request_timeout: Optional[float] = Header(None)):
     try:
         # 1. 검색 파라미터 세팅
         params = SearchQuery(
@@ -39,57 +78,63 @@ async def search_table(payload: SearchQuery):
         )
         
         # 2. 질문과 유사한 데이터를 테이블별로 1차 검색
-        raw_candidates = await search_target_table(params)
+        table_search = await run_with_deadline(search_table_details(params), request_timeout(x_request_timeout))
+        raw_candidates = table_search["candidates"]
         
         # 결과가 아예 없거나, 1등 후보의 유사도가 match_threshold 이하인 경우 필터링
         if not raw_candidates or raw_candidates[0].get('similarity', 0) < params.match_threshold:
             print(f"⚠️ 유사도 미달 또는 결과 없음 (최고 점수: {raw_candidates[0]['similarity'] if raw_candidates else 0:.4f})")
             return "관련된 사내 데이터를 찾을 수 없습니다."
         
-        # 3. 각 문서의 ID를 추출하여 fetch_data_by_ids 함수에 전달
-        ids = [doc['id'] for doc in raw_candidates]
-        detailed_results = await fetch_data_by_ids(raw_candidates[0]['collection'], ids)
+        # 3. 1등 테이블에서 ID로 조회한 상세/관계도 데이터 (fetch_data_by_ids 결과)
+        detailed_results = table_search["details"]
 
         # 4. LLM(Agent)이 읽고 요약하기 가장 좋은 형태로 문자열(String) 포장
-        formatted_output = "다음은 사내 데이터베이스 검색 결과 및 연관 데이터입니다. 이를 바탕으로 답변하세요.\n\n"
-
-        for idx, doc in enumerate(detailed_results, 1):
-            # 새로 정의된 키값들에 맞춰서 데이터 추출
-            table_name = doc.get('table', '알 수 없음')
-            file_name = doc.get('fileName', '알 수 없음')
-            content = doc.get('content', '')
-            cross_ref = doc.get('cross_reference', '')
+        with span("format"):
+            formatted_output = "다음은 사내 데이터베이스 검색 결과 및 연관 데이터입니다. 이를 바탕으로 답변하세요.\n\n"
+
+            for idx, doc in enumerate(detailed_results, 1):
+                # 새로 정의된 키값들에 맞춰서 데이터 추출
+                table_name = doc.get('table', '알 수 없음')
+                file_name = doc.get('fileName', '알 수 없음')
+                content = doc.get('content', '')
+                cross_ref = doc.get('cross_reference', '')
             
-            # 1. 문서 헤더 (어디서 가져왔는지 명확히 명시)
-            formatted_output += f"### 후보 {idx} (출처: {table_name} / 파일명: {file_name})\n"
+                # 1. 문서 헤더 (어디서 가져왔는지 명확히 명시)
+                formatted_output += f"### 후보 {idx} (출처: {table_name} / 파일명: {file_name})\n"
             
-            # 2. 메인 데이터
-            formatted_output += f"[본문 내용]\n{content}\n"
+                # 2. 메인 데이터
+                formatted_output += f"[본문 내용]\n{content}\n"
             
-            # 3. 관계도 데이터
-            # cross_ref 값이 존재할 때만 출력하도록 처리
-            if cross_ref:
-                formatted_output += f"\n[연관 참조 데이터]\n{cross_ref}\n"
+                # 3. 관계도 데이터
+                # cross_ref 값이 존재할 때만 출력하도록 처리
+                if cross_ref:
+                    formatted_output += f"\n[연관 참조 데이터]\n{cross_ref}\n"
                 
-            # 구분선 추가로 AI가 문맥을 헷갈리지 않게 처리
-            formatted_output += "-" * 40 + "\n\n"
+                # 구분선 추가로 AI가 문맥을 헷갈리지 않게 처리
+                formatted_output += "-" * 40 + "\n\n"
+
+        observe_payload("formatted_output", text_size(formatted_output))
 
         return {"results": formatted_output}
         
+    except DeadlineExceeded as e:
+        raise deadline_error(e)
+    except CircuitOpenError as e:
+        raise circuit_open_error(e)
+    except UpstreamOverloaded as e:
+        raise overloaded_error(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/search-neo4j")
-async def search_neo4j(payload: Neo4jSearchQuery):
+async def search_neo4j(payload: Neo4jSearchQuery, x_request_timeout: Optional[float] = Header(None)):
     """
     Neo4j Graph DB를 검색하는 API 엔드포인트입니다.
     """
     try:
-        # 1. 질문 임베딩 (Gemini)
-        vector = embedding_query(payload)
-        
-        # 2. Neo4j 검색 수행
-        results = await search_neo4j_graph(payload, vector)
+        # 1~2. 질문 임베딩 (Gemini) + Neo4j 검색 수행 (동일 질문은 캐시에서 반환)
+        results = await run_with_deadline(search_neo4j_by_text(payload), request_timeout(x_request_timeout))
         
         # 3. 결과 반환
         return {
@@ -100,8 +145,240 @@ async def search_neo4j(payload: Neo4jSearchQuery):
         
     except Exception as e:
         print(f"❌ [NEO4J API ERROR] {e}")
+        if isinstance(e, DeadlineExceeded):
+            raise deadline_error(e)
+        if isinstance(e, CircuitOpenError):
+            raise circuit_open_error(e)
+        if isinstance(e, UpstreamOverloaded):
+            raise overloaded_error(e)
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/search-federated")
+async def search_federated(payload: FederatedSearchQuery, x_request_timeout: Optional[float] = Header(None)):
+    """
+    Supabase / Weaviate / Neo4j를 한 번에 검색하는 통합 검색 API입니다.
+    질문은 1번만 임베딩하고, 데드라인 안에 응답한 백엔드 결과만 순위 합산(RRF)하여 반환합니다.
+    """
+    try:
+        return await run_with_deadline(federated_search(payload), request_timeout(x_request_timeout))
+    except DeadlineExceeded as e:
+        raise deadline_error(e)
+    except CircuitOpenError as e:
+        raise circuit_open_error(e)
+    except UpstreamOverloaded as e:
+        raise overloaded_error(e)
+    except Exception as e:
+        print(f"❌ [FEDERATED API ERROR] {e}")
         raise HTTPException(status_code=500, detail=str(e))
     
+# ==========================================
+# 임베딩 캐시 / 배칭 상태 조회 API
+# ==========================================
+@router.get("/cache/embedding")
+async def embedding_cache_stats():
+    """
+    질문 임베딩 캐시의 적중/실패 횟수와 배칭 서비스의 처리 현황을 반환합니다.
+    """
+    return {
+        "cache": embedding_cache.stats(),
+        "batcher": embedding_batcher.stats()
+    }
+
+# ==========================================
+# 검색 결과 캐시 상태 조회 / 무효화 API
+# ==========================================
+@router.get("/cache/results")
+async def result_cache_stats():
+    """
+    검색 결과 캐시의 적중률, 동시 요청 합치기 횟수, 백엔드별 데이터 버전을 반환합니다.
+    """
+    return result_cache.stats()
+
+@router.post("/cache/invalidate")
+async def invalidate_result_cache(backend: Optional[str] = None):
+    """
+    데이터 적재(ingestion) 후 호출하여 해당 백엔드(supabase, weaviate, neo4j, local)의 검색 결과 캐시를 무효화합니다.
+    backend를 생략하면 전체 캐시를 비웁니다.
+    """
+    return {"versions": result_cache.bump_version(backend)}
+
+# ==========================================
+# 클로바 응답 캐시 상태 조회 / 비우기 API
+# ==========================================
+@router.get("/cache/completions")
+async def completion_cache_stats():
+    """
+    /v1/chat/completions 응답 캐시의 적중률, 합쳐진(coalesced) 요청 수, 보관 건수를 반환합니다.
+    """
+    return completion_cache.stats()
+
+@router.post("/cache/completions/clear")
+async def clear_completion_cache():
+    """
+    프롬프트/모델 변경 후 캐시된 클로바 응답을 모두 비웁니다.
+    """
+    completion_cache.clear()
+    return completion_cache.stats()
+
+# ==========================================
+# 컬렉션 스키마 캐시 조회 / 무효화 API
+# ==========================================
+@router.get("/cache/schema")
+async def schema_cache_stats():
+    """
+    캐싱된 컬렉션별 참조 관계(edge) 목록과 적중 횟수를 반환합니다.
+    """
+    return schema_cache.stats()
+
+@router.post("/cache/schema/invalidate")
+async def invalidate_schema_cache(collection: Optional[str] = None):
+    """
+    Weaviate 스키마(참조 관계)를 변경한 뒤 호출합니다. collection을 생략하면 전체 무효화.
+    """
+    schema_cache.invalidate(collection)
+    return schema_cache.stats()
+
+# ==========================================
+# Neo4j 커넥션 풀 사용 현황 조회 API
+# ==========================================
+@router.get("/neo4j/pool")
+async def neo4j_pool_stats():
+    """
+    공유 Neo4j 드라이버의 세션 사용 현황과 풀 설정값을 반환합니다.
+    """
+    return get_neo4j_pool_stats()
+
+# ==========================================
+# 테이블 라우터 상태 조회 / 재계산 API
+# ==========================================
+@router.get("/router/stats")
+async def router_stats():
+    """
+    centroid 라우터의 모드, 인덱스 상태, 전체 검색 대비 정확도(shadow 측정)를 반환합니다.
+    """
+    return collection_router.stats()
+
+@router.post("/router/refresh")
+async def router_refresh():
+    """
+    컬렉션별 centroid를 즉시 다시 계산합니다. (대량 데이터 적재 직후 호출)
+    """
+    try:
+        await asyncio.to_thread(collection_router.build, TARGET_COLLECTIONS)
+        return collection_router.stats()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+# ==========================================
+# 로컬 벡터 인덱스 상태 조회 / 동기화 API
+# ==========================================
+@router.get("/local-index/stats")
+async def local_index_stats():
+    """
+    프로세스 내부에 미러링된 컬렉션별 건수, 용량, 마지막 동기화 시각을 반환합니다.
+    """
+    return local_indexes.stats()
+
+@router.post("/local-index/{name}/sync")
+async def local_index_sync(name: str, full: bool = False):
+    """
+    지정한 로컬 인덱스를 소스 DB와 즉시 동기화합니다. (full=true면 삭제분까지 반영)
+    """
+    index = local_indexes.get(name)
+    if index is None:
+        raise HTTPException(status_code=404, detail=f"Local index '{name}' is not configured.")
+    try:
+        changed = await asyncio.to_thread(index.sync, full)
+        return {"changed": changed, **index.stats()}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+# ==========================================
+# 요청 데드라인 / 헤징 통계 조회 API
+# ==========================================
+@router.get("/latency/stats")
+async def latency_stats():
+    """
+    호출 대상별 p50/p95/p99 지연 시간, 헤징(복제 요청) 횟수와 승률, 단계별 데드라인 초과 횟수를 반환합니다.
+    """
+    return deadline_stats()
+
+# ==========================================
+# 서킷 브레이커 상태 조회 / 초기화 API
+# ==========================================
+@router.get("/breakers")
+async def breaker_stats():
+    """
+    백엔드/컬렉션별 서킷 브레이커 상태(closed/open/half_open), 최근 실패율, 차단 횟수를 반환합니다.
+    """
+    return breakers.stats()
+
+@router.post("/breakers/reset")
+async def breaker_reset(name: Optional[str] = None):
+    """
+    장애 복구 후 차단을 즉시 해제합니다. name을 생략하면 전체 초기화. (예: name=weaviate:Receipt)
+    """
+    breakers.reset(name)
+    return breakers.stats()
+
+# ==========================================
+# 입장 제어(업스트림별 동시 실행 제한 / 대기열) 상태 조회 API
+# ==========================================
+@router.get("/admission/stats")
+async def admission_stats():
+    """
+    업스트림별 동시 실행 수, 대기열 길이, 거절(429)/대기 시간 초과/우선순위 밀림 횟수, 평균 대기/처리 시간을 반환합니다.
+    """
+    return admission.stats()
+
+# ==========================================
+# Prometheus 메트릭 API
+# ==========================================
+@router.get("/metrics")
+async def metrics():
+    """
+    단계별 지연 시간 히스토그램(rag_stage_duration_seconds), 요청 수, 후보 수 / 페이로드 크기 게이지를
+    Prometheus 텍스트 형식으로 반환합니다. (진입점 / 백엔드 / 컬렉션별 라벨)
+    """
+    body, content_type = metrics_payload()
+    return Response(content=body, media_type=content_type)
+
+@router.get("/query-log/stats")
+async def query_log_stats():
+    """
+    쿼리 로그(요청 기록) 설정과 기록 / 파일 쓰기 / 버림(대기열 초과) 건수를 반환합니다.
+    """
+    return query_log.stats()
+
+# ==========================================
+# 헬스 체크 API (liveness / readiness)
+# ==========================================
+@router.get("/health/live")
+async def health_live():
+    """
+    프로세스가 요청을 받을 수 있는지만 확인합니다. (백엔드 연결 여부와 무관)
+    """
+    return {"status": "ok"}
+
+@router.get("/health/ready")
+async def health_ready():
+    """
+    백엔드별 연결 상태와 기동 단계별 소요 시간을 반환합니다.
+    BACKENDS_REQUIRED에 지정된 백엔드가 아직 준비되지 않았으면 503을 반환합니다.
+    """
+    backends = backend_status()
+    pending = [name for name in BACKENDS_REQUIRED if backends.get(name, {}).get("state") != "ready"]
+    body = {
+        "status": "ready" if not pending else "not_ready",
+        "pending": pending,
+        "backends": backends,
+        "startup_timings": startup_timings,
+        "import_timings": import_timings,
+    }
+    if pending:
+        return JSONResponse(status_code=503, content=body)
+    return body
+
 # ==========================================
 # n8n 인증 모델 리스트 반환 API
 # ==========================================
@@ -122,63 +399,115 @@ async def dummy_models():
 # ==========================================
 # NCP - n8n 통역사 (Proxy) API
 # ==========================================
+async def call_clova(openai_data: dict, x_request_timeout: Optional[float] = None):
+    """
+    클로바에 요청을 보내고 OpenAI 규격 응답(또는 스트리밍 응답)을 반환합니다.
+    앱 전체에서 공유하는 keep-alive / HTTP2 커넥션 풀을 사용합니다.
+    """
+    model = openai_data.get("model", "HCX-005")
+    stream = bool(openai_data.get("stream"))
+
+    # NCP HCX-005 규격으로 페이로드 변환 (Mapping)
+    ncp_payload = build_ncp_payload(openai_data)
+
+    client = await get_clova_client()
+
+    async def post_clova() -> httpx.Response:
+        clova_request = client.build_request(
+            "POST", NCP_CLOVA_URL, headers=ncp_headers(stream), json=ncp_payload, timeout=timeout
+        )
+        clova_response = await client.send(clova_request, stream=stream)
+        # 5xx는 클로바 장애로 보고 서킷 브레이커에 실패로 기록 (4xx는 요청 문제이므로 제외)
+        if clova_response.status_code >= 500:
+            detail = f"NCP API Error: {(await clova_response.aread()).decode(errors='replace')}"
+            await clova_response.aclose()
+            raise HTTPException(status_code=clova_response.status_code, detail=detail)
+        return clova_response
+
+    # 클로바 동시 호출 수 제한: 슬롯이 없으면 우선순위 대기열에서 기다리고, 넘치면 429
+    # 스트리밍은 응답이 끝날 때까지 슬롯을 잡고 있다가 스트림이 닫힐 때 반납
+    # 대기열에서 기다린 시간도 요청 예산(X-Request-Timeout)에서 차감: 대기는 남은 예산까지만,
+    # 응답 대기시간은 최대 CLOVA_TIMEOUT을 슬롯을 얻은 뒤 남은 시간으로 줄임
+    limiter = admission.get("clova")
+    with request_deadline(x_request_timeout):
+        await limiter.acquire()
+        timeout = clamp_timeout(CLOVA_TIMEOUT)
+    started = time.monotonic()
+    released = False
+    handed_off = False  # 스트리밍 응답에 반납을 넘겼는지 (넘긴 뒤에는 이 함수의 finally에서 반납하지 않음)
+
+    def release_slot() -> None:
+        nonlocal released
+        if not released:
+            released = True
+            limiter.release(time.monotonic() - started)
+
+    try:
+        observe_payload("clova_request", text_size(json.dumps(ncp_payload, ensure_ascii=False)))
+        # 응답 헤더를 받을 때까지의 시간 (스트리밍이면 이후 토큰 시간은 clova_stream으로 따로 기록)
+        with span("clova_upstream", backend="clova"):
+            response = await breakers.get("clova").call(post_clova)
+
+        # 클로바 서버에서 에러를 뱉었을 경우 디버깅을 위해 예외 처리
+        if response.status_code != 200:
+            detail = f"NCP API Error: {(await response.aread()).decode(errors='replace')}"
+            await response.aclose()
+            raise HTTPException(status_code=response.status_code, detail=detail)
+
+        # 스트리밍: 클로바 SSE 토큰을 받는 즉시 OpenAI chat.completion.chunk로 변환하여 전달
+        if stream:
+            include_usage = bool((openai_data.get("stream_options") or {}).get("include_usage"))
+            async def close_stream() -> None:
+                await response.aclose()
+                release_slot()
+
+            streaming = ClovaStreamingResponse(
+                stream_openai_chunks(response, model, include_usage, on_close=release_slot),
+                on_close=close_stream,
+                media_type="text/event-stream",
+                headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+            )
+            handed_off = True  # 이후 반납은 스트림 종료 시 on_close / close_stream이 담당
+            return streaming
+
+        # NCP의 응답을 다시 OpenAI 규격으로 포장해서 n8n에 리턴
+        observe_payload("clova_response", len(response.content))
+        with span("clova_translate", backend="clova"):
+            return to_openai_response(response.json(), model)
+    finally:
+        if not handed_off:
+            release_slot()
+
 @router.post("/v1/chat/completions")
-async def proxy_to_clova(request: Request):
+async def proxy_to_clova(request: Request, x_request_timeout: Optional[float] = Header(None),
+                         x_completion_cache: Optional[str] = Header(None)):
     try:
         # 1. n8n (OpenAI Chat Model 노드)에서 넘어온 JSON 데이터 받기
         openai_data = await request.json()
-        
-        # 2. NCP HCX-005 규격으로 페이로드 변환 (Mapping)
-        ncp_payload = {
-            "messages": openai_data.get("messages", []),
-            "topP": openai_data.get("top_p", 0.8),
-            "temperature": openai_data.get("temperature", 0.5)
-        }
-        
-        # n8n이 MCP Tool(함수) 정보를 보냈다면 NCP 포맷에 맞춰 추가
-        if "tools" in openai_data:
-            ncp_payload["tools"] = openai_data["tools"]
-
-        NCP_HEADERS = {
-            "Authorization": f"Bearer {NCP_CLOVA_TOKEN}",
-            "Content-Type": "application/json",
-            "Accept": "application/json",
-            "X-NCP-CLOVASTUDIO-REQUEST-ID": NCP_CLOVA_REQUEST_ID
-        }
+        model = openai_data.get("model", "HCX-005")
 
-        # 3. NCP 서버로 실제 요청 쏘기 (응답 대기시간 30초 넉넉히 설정)
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.post(NCP_CLOVA_URL, headers=NCP_HEADERS, json=ncp_payload)
-            
-            # 클로바 서버에서 에러를 뱉었을 경우 디버깅을 위해 예외 처리
-            if response.status_code != 200:
-                raise HTTPException(status_code=response.status_code, detail=f"NCP API Error: {response.text}")
-                
-            ncp_result = response.json()
+        # 2. 같은 프롬프트의 결정적(저온) 요청은 캐시에서 바로 반환하고,
+        #    동시에 들어온 같은 요청은 클로바 호출 1번으로 합침 (CLOVA_CACHE_ENABLED=true일 때만)
+        ncp_payload = build_ncp_payload(openai_data)
+        if is_cacheable(openai_data, ncp_payload, x_completion_cache):
+            return await completion_cache.get_or_compute(
+                "clova", "", completion_cache_params(model, ncp_payload),
+                lambda: call_clova(openai_data, x_request_timeout)
+            )
 
-        # 4. NCP의 응답을 다시 OpenAI 규격으로 포장해서 n8n에 리턴
-        clova_message = ncp_result.get("result", {}).get("message", {})
-        
-        # 💡 핵심: 클로바가 일반 대답을 한 건지, 아니면 '툴을 써라'고 지시한 건지 상태값 매핑
-        finish_reason = "stop"
-        if "tool_calls" in clova_message:
-            finish_reason = "tool_calls"
-        
-        # OpenAI 표준 포맷으로 최종 조립
-        openai_response = {
-            "id": "chatcmpl-" + ncp_result.get("result", {}).get("id", "clova-proxy"),
-            "object": "chat.completion",
-            "model": openai_data.get("model", "HCX-005"),
-            "choices": [
-                {
-                    "index": 0,
-                    "message": clova_message,
-                    "finish_reason": finish_reason
-                }
-            ]
-        }
-        
-        return openai_response
+        # 3. NCP 서버로 실제 요청 쏘기
+        return await call_clova(openai_data, x_request_timeout)
 
+    except HTTPException:
+        # 클로바가 돌려준 4xx / 5xx 상태 코드는 그대로 전달
+        raise
+    except httpx.TimeoutException as e:
+        raise HTTPException(status_code=504, detail=f"NCP API Timeout: {e}")
+    except DeadlineExceeded as e:
+        raise deadline_error(e)
+    except CircuitOpenError as e:
+        raise circuit_open_error(e)
+    except UpstreamOverloaded as e:
+        raise overloaded_error(e)
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
@@ -0,0 +1,259 @@
+# app/core/admission.py
+import os
+import time
+import heapq
+import asyncio
+import itertools
+
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from dotenv import load_dotenv
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, TypeVar
+
+from app.core.deadline import check_deadline, clamp_timeout
+
+load_dotenv()
+
+T = TypeVar("T")
+
+# 입장 제어(동시 실행 제한 + 대기열) 사용 여부
+ADMISSION_ENABLED = os.getenv("ADMISSION_ENABLED", "true").lower() == "true"
+
+# 대기열에서 기다릴 수 있는 최대 시간(초). 넘으면 429로 바로 돌려보냅니다.
+ADMISSION_QUEUE_TIMEOUT = float(os.getenv("ADMISSION_QUEUE_TIMEOUT", "2"))
+
+# 업스트림별 기본 동시 실행 수 / 대기열 길이. ADMISSION_<이름>_CONCURRENCY, ADMISSION_<이름>_QUEUE로 변경할 수 있습니다.
+# - gemini  : 임베딩이 필요한 요청 수 (실제 API 호출은 EmbeddingBatcher가 배치로 묶음)
+# - weaviate: 테이블 단위 조회 수 (검색 1건이 최대 15개 테이블을 동시에 조회)
+DEFAULT_LIMITS: Dict[str, Tuple[int, int]] = {
+    "gemini": (64, 256),
+    "supabase": (16, 64),
+    "weaviate": (32, 256),
+    "neo4j": (20, 64),
+    "clova": (16, 64),
+}
+
+# 요청 우선순위 (숫자가 작을수록 먼저 처리). 요청 헤더 X-Priority로 지정합니다.
+# 헤더가 없거나 알 수 없는 값이면 default (interactive는 명시적으로 요청한 경우에만)
+PRIORITIES = {"interactive": 0, "default": 1, "batch": 2}
+
+_priority: ContextVar[int] = ContextVar("request_priority", default=PRIORITIES["default"])
+
+
+class UpstreamOverloaded(Exception):
+    """업스트림 대기열이 가득 찼거나 대기 시간이 초과되어 요청을 받지 않을 때 발생합니다. (HTTP 429)"""
+
+    def __init__(self, upstream: str, retry_after: float, reason: str = "queue_full"):
+        super().__init__(f"Upstream '{upstream}' is overloaded ({reason}), retry after {retry_after:.0f}s")
+        self.upstream = upstream
+        self.retry_after = retry_after
+        self.reason = reason
+
+
+def parse_priority(value: Optional[str]) -> int:
+    if value is None:
+        return PRIORITIES["default"]
+    value = value.strip().lower()
+    if value in PRIORITIES:
+        return PRIORITIES[value]
+    try:
+        # 숫자는 정의된 범위(interactive ~ batch)로 제한 (음수로 interactive 요청을 밀어내지 못하도록)
+        return min(max(int(value), min(PRIORITIES.values())), max(PRIORITIES.values()))
+    except ValueError:
+        return PRIORITIES["default"]
+
+
+@contextmanager
+def request_priority(priority: int):
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def current_priority() -> int:
+    return _priority.get()
+
+
+class AdmissionLimiter:
+    """
+    업스트림 1개에 대한 동시 실행 제한 + 우선순위 대기열입니다.
+    - 동시 실행 수가 concurrency 미만이면 바로 실행
+    - 아니면 대기열(우선순위 → 도착 순)에서 기다리고, 슬롯이 나면 우선순위가 높은 요청부터 실행
+    - 대기열이 가득 차면 즉시 UpstreamOverloaded (더 높은 우선순위 요청이 오면 가장 낮은 대기 요청을 밀어냄)
+    - 대기 시간이 queue_timeout(또는 요청 데드라인)을 넘으면 UpstreamOverloaded
+    """
+
+    def __init__(self, name: str, concurrency: int, max_queue: int, queue_timeout: float = ADMISSION_QUEUE_TIMEOUT):
+        self.name = name
+        self.concurrency = concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+
+        self.in_flight = 0
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []  # (우선순위, 순번, future) 힙
+        self._seq = itertools.count()
+
+        # 모니터링용 카운터
+        self.admitted = 0
+        self.queued_total = 0
+        self.shed = 0
+        self.timeouts = 0
+        self.evicted = 0
+        self.total_wait = 0.0
+        self.total_service = 0.0
+        self.completed = 0
+
+    @property
+    def queued(self) -> int:
+        return sum(1 for _, _, future in self._waiters if not future.done())
+
+    def retry_after(self) -> float:
+        """대기열이 빠지는 데 걸릴 예상 시간(초). 최소 1초."""
+        avg_service = self.total_service / self.completed if self.completed else 1.0
+        return max(1.0, avg_service * (self.queued + 1) / max(1, self.concurrency))
+
+    def _overloaded(self, reason: str) -> UpstreamOverloaded:
+        return UpstreamOverloaded(self.name, self.retry_after(), reason)
+
+    async def acquire(self, priority: Optional[int] = None) -> None:
+        if not ADMISSION_ENABLED:
+            return
+        priority = current_priority() if priority is None else priority
+
+        if self.in_flight < self.concurrency and not self.queued:
+            self.in_flight += 1
+            self.admitted += 1
+            return
+
+        # 대기열이 가득 찼으면: 새 요청이 더 급하면 가장 덜 급한 대기 요청을 밀어내고, 아니면 바로 거절
+        if self.queued >= self.max_queue:
+            pending = [entry for entry in self._waiters if not entry[2].done()]
+            worst = max(pending, key=lambda entry: (entry[0], entry[1]), default=None)
+            if worst is None or worst[0] <= priority:
+                self.shed += 1
+                raise self._overloaded("queue_full")
+            worst[2].set_exception(self._overloaded("evicted"))
+            self.evicted += 1
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        heapq.heappush(self._waiters, (priority, next(self._seq), future))
+        self.queued_total += 1
+
+        started = time.monotonic()
+        timeout = clamp_timeout(self.queue_timeout)
+        try:
+            await asyncio.wait_for(asyncio.shield(future), timeout=timeout)
+        except asyncio.TimeoutError:
+            if future.done() and not future.cancelled() and future.exception() is None:
+                # 타임아웃 직전에 슬롯을 넘겨받았다면 다음 대기자에게 넘김
+                self.release()
+            future.cancel()
+            self.timeouts += 1
+            # 대기열 시간 제한보다 요청 데드라인이 먼저 끝났다면 429가 아니라 데드라인 초과(504)로 알림
+            check_deadline(f"admission:{self.name}")
+            raise self._overloaded("queue_timeout") from None
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled() and future.exception() is None:
+                self.release()
+            future.cancel()
+            raise
+        finally:
+            self.total_wait += time.monotonic() - started
+        self.admitted += 1
+
+    def release(self, service_seconds: Optional[float] = None) -> None:
+        """슬롯을 반납합니다. service_seconds(슬롯을 잡고 실행한 시간)를 주면 retry_after 계산에 반영합니다."""
+        if service_seconds is not None:
+            self.total_service += service_seconds
+            self.completed += 1
+        if not ADMISSION_ENABLED:
+            return
+        # 기다리는 요청이 있으면 슬롯을 그대로 넘겨줌 (in_flight는 유지)
+        while self._waiters:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                future.set_result(None)
+                return
+        self.in_flight = max(0, self.in_flight - 1)
+
+    @asynccontextmanager
+    async def slot(self, priority: Optional[int] = None):
+        await self.acquire(priority)
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.release(time.monotonic() - started)
+
+    async def run(self, factory: Callable[[], Awaitable[T]], priority: Optional[int] = None) -> T:
+        """슬롯을 얻은 뒤 factory()를 실행합니다. (factory는 호출할 때마다 새 코루틴을 만들어야 합니다)"""
+        async with self.slot(priority):
+            return await factory()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "concurrency": self.concurrency,
+            "max_queue": self.max_queue,
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "admitted": self.admitted,
+            "queued_total": self.queued_total,
+            "shed": self.shed,
+            "queue_timeouts": self.timeouts,
+            "evicted": self.evicted,
+            "avg_wait_ms": round(self.total_wait / self.queued_total * 1000, 2) if self.queued_total else 0.0,
+            "avg_service_ms": round(self.total_service / self.completed * 1000, 2) if self.completed else 0.0,
+        }
+
+
+class AdmissionRegistry:
+    """업스트림 이름별 AdmissionLimiter를 보관합니다."""
+
+    def __init__(self, defaults: Dict[str, Tuple[int, int]] = DEFAULT_LIMITS):
+        self.defaults = defaults
+        self._limiters: Dict[str, AdmissionLimiter] = {}
+
+    def get(self, name: str) -> AdmissionLimiter:
+        limiter = self._limiters.get(name)
+        if limiter is None:
+            concurrency, max_queue = self.defaults.get(name, (32, 128))
+            key = name.upper()
+            limiter = AdmissionLimiter(
+                name,
+                concurrency=int(os.getenv(f"ADMISSION_{key}_CONCURRENCY", str(concurrency))),
+                max_queue=int(os.getenv(f"ADMISSION_{key}_QUEUE", str(max_queue))),
+            )
+            self._limiters[name] = limiter
+        return limiter
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": ADMISSION_ENABLED,
+            "queue_timeout": ADMISSION_QUEUE_TIMEOUT,
+            "upstreams": {name: limiter.stats() for name, limiter in sorted(self._limiters.items())},
+        }
+
+
+class PriorityMiddleware:
+    """요청 헤더 X-Priority(interactive / default / batch)를 읽어 요청 전체의 우선순위로 설정하는 ASGI 미들웨어입니다."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        header = None
+        for name, value in scope.get("headers") or []:
+            if name == b"x-priority":
+                header = value.decode("latin-1")
+                break
+        with request_priority(parse_priority(header)):
+            await self.app(scope, receive, send)
+
+
+# 앱 전체에서 공유하는 입장 제어 레지스트리
+admission = AdmissionRegistry()
@@ -0,0 +1,184 @@
+# app/core/backends.py
+import time
+import asyncio
+import importlib
+import threading
+
+from typing import Any, Callable, Dict, List, Optional
+
+# 모듈별 import 소요 시간(초) 기록 - 기동 지연 원인 분석용
+import_timings: Dict[str, float] = {}
+
+# 기동 단계별 소요 시간(초) 기록 (예: app_import, lifespan_ready)
+startup_timings: Dict[str, float] = {}
+
+# 프로세스 시작 기준 시각
+PROCESS_STARTED_AT = time.perf_counter()
+
+
+def timed_import(name: str):
+    """모듈을 import하고 소요 시간을 기록합니다."""
+    started = time.perf_counter()
+    module = importlib.import_module(name)
+    import_timings.setdefault(name, round(time.perf_counter() - started, 4))
+    return module
+
+
+def record_startup(stage: str) -> None:
+    """프로세스 시작 후 해당 단계까지 걸린 시간을 기록합니다."""
+    startup_timings[stage] = round(time.perf_counter() - PROCESS_STARTED_AT, 4)
+
+
+class LazyModule:
+    """
+    무거운 라이브러리(weaviate, google.generativeai, neo4j 등)를 실제로 사용할 때 import하는 모듈 대리 객체입니다.
+    `wvc = lazy_import("weaviate.classes")`처럼 선언하고 평소처럼 `wvc.query...`로 사용합니다.
+    """
+
+    def __init__(self, name: str):
+        self._name = name
+        self._module = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        if self._module is None:
+            with self._lock:
+                if self._module is None:
+                    self._module = timed_import(self._name)
+        return self._module
+
+    def __getattr__(self, attr: str) -> Any:
+        return getattr(self._load(), attr)
+
+    def __repr__(self) -> str:
+        state = "loaded" if self._module is not None else "not loaded"
+        return f"<LazyModule {self._name} ({state})>"
+
+
+def lazy_import(name: str) -> LazyModule:
+    return LazyModule(name)
+
+
+class BackendUnavailable(ConnectionError):
+    """백엔드를 지금 사용할 수 없음 (연결 실패 후 재시도 대기 중이거나, 다른 스레드가 연결 중)"""
+
+
+def _on_event_loop() -> bool:
+    try:
+        asyncio.get_running_loop()
+        return True
+    except RuntimeError:
+        return False
+
+
+class LazyBackend:
+    """
+    외부 백엔드 연결 핸들입니다.
+    - import 시점에는 아무 연결도 하지 않고, 첫 사용(get) 또는 lifespan의 병렬 warm-up 때 연결합니다.
+    - 연결 실패 시 retry_interval 동안은 같은 에러를 바로 돌려주고(재연결 폭주 방지), 이후 다시 시도합니다.
+    - 이벤트 루프에서 연결 전에 get()을 호출하면 루프를 막지 않도록 BackendUnavailable을 바로 발생시킵니다. (루프에서는 aget 사용)
+    - 상태(idle/connecting/ready/failed/closed)는 /health/ready에서 조회할 수 있습니다.
+    """
+
+    def __init__(self, name: str, factory: Callable[[], Any], closer: Optional[Callable[[Any], None]] = None,
+                 retry_interval: float = 5.0):
+        self.name = name
+        self._factory = factory
+        self._closer = closer
+        self.retry_interval = retry_interval
+
+        self._value: Any = None
+        self._lock = threading.Lock()
+        self.state = "idle"
+        self.error: Optional[str] = None
+        self._last_exception: Optional[BaseException] = None
+        self.failed_at: Optional[float] = None
+        self.connected_at: Optional[float] = None
+        self.connect_seconds: Optional[float] = None
+
+    def get(self) -> Any:
+        """연결된 클라이언트를 반환합니다. 아직 연결 전이면 이 자리에서 연결합니다. (동기 함수 - 스레드에서 호출)"""
+        value = self._value
+        if value is not None:
+            return value
+
+        if _on_event_loop():
+            # 이벤트 루프 스레드에서는 연결(블로킹 factory)을 직접 실행하지도, 다른 스레드의 연결을 기다리지도 않음
+            raise BackendUnavailable(
+                f"[{self.name}] 아직 연결되지 않았습니다. 이벤트 루프에서는 get() 대신 await aget()을 사용하세요."
+            )
+
+        self._lock.acquire()
+        try:
+            if self._value is not None:
+                return self._value
+
+            if self.state == "failed" and self.failed_at and time.time() - self.failed_at < self.retry_interval:
+                # 저장된 예외를 그대로 다시 던지면 traceback이 계속 쌓이므로 새 예외로 감싸서 발생
+                raise BackendUnavailable(
+                    f"[{self.name}] 연결 실패 후 재시도 대기 중: {self.error}"
+                ) from self._last_exception
+
+            self.state = "connecting"
+            started = time.perf_counter()
+            try:
+                self._value = self._factory()
+            except Exception as e:
+                self.state = "failed"
+                self.error = str(e)
+                self._last_exception = e
+                self.failed_at = time.time()
+                print(f"❌ [{self.name}] 연결 실패: {e}")
+                raise
+
+            self.connect_seconds = round(time.perf_counter() - started, 4)
+            self.connected_at = time.time()
+            self.state = "ready"
+            self.error = None
+            print(f"✅ [{self.name}] 연결 완료 ({self.connect_seconds}s)")
+            return self._value
+        finally:
+            self._lock.release()
+
+    async def aget(self) -> Any:
+        """이벤트 루프를 막지 않도록 스레드에서 연결합니다. (warm-up이 연결 중이면 그 스레드에서 끝날 때까지 대기)"""
+        if self._value is not None:
+            return self._value
+        return await asyncio.to_thread(self.get)
+
+    def override(self, value: Any) -> None:
+        """테스트/벤치마크용: 실제 연결 대신 주어진 객체를 사용합니다."""
+        with self._lock:
+            self._value = value
+            self.state = "ready"
+            self.error = None
+            self.connected_at = time.time()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._value is not None and self._closer is not None:
+                try:
+                    self._closer(self._value)
+                except Exception as e:
+                    print(f"⚠️ [{self.name}] 종료 중 에러: {e}")
+            self._value = None
+            self.state = "closed"
+
+    @property
+    def ready(self) -> bool:
+        return self._value is not None
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "error": self.error,
+            "connected_at": self.connected_at,
+            "connect_seconds": self.connect_seconds,
+        }
+
+
+async def warm_up(backends: List[LazyBackend]) -> None:
+    """여러 백엔드를 동시에 연결합니다. 일부가 실패해도 나머지는 정상적으로 준비됩니다."""
+    results = await asyncio.gather(*(backend.aget() for backend in backends), return_exceptions=True)
+    ready = sum(1 for result in results if not isinstance(result, BaseException))
+    print(f"🚀 [BACKENDS] {ready}/{len(backends)}개 백엔드 준비 완료")
@@ -0,0 +1,238 @@
+# app/core/circuit_breaker.py
+import os
+import time
+import asyncio
+import threading
+
+from collections import deque
+from dotenv import load_dotenv
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, Tuple, TypeVar
+
+from app.core.deadline import DeadlineExceeded
+from app.core.admission import UpstreamOverloaded
+
+load_dotenv()
+
+T = TypeVar("T")
+
+# 서킷 브레이커 사용 여부
+BREAKER_ENABLED = os.getenv("BREAKER_ENABLED", "true").lower() == "true"
+
+# 실패율을 계산할 최근 구간(초)
+BREAKER_WINDOW = float(os.getenv("BREAKER_WINDOW", "30"))
+
+# 구간 안에 최소 이만큼 호출이 있어야 차단 여부를 판단합니다. (호출 1~2번 실패로 차단되지 않도록)
+BREAKER_MIN_CALLS = int(os.getenv("BREAKER_MIN_CALLS", "5"))
+
+# 구간 내 실패율이 이 값 이상이면 차단(open)
+BREAKER_FAILURE_RATE = float(os.getenv("BREAKER_FAILURE_RATE", "0.5"))
+
+# 차단 유지 시간(초). 지나면 시험 호출(half-open)을 1건 허용합니다.
+BREAKER_OPEN_SECONDS = float(os.getenv("BREAKER_OPEN_SECONDS", "30"))
+
+# half-open 상태에서 동시에 허용할 시험 호출 수
+BREAKER_HALF_OPEN_PROBES = int(os.getenv("BREAKER_HALF_OPEN_PROBES", "1"))
+
+
+class CircuitOpenError(Exception):
+    """차단된 의존성을 호출하려 할 때 즉시 발생합니다. (타임아웃까지 기다리지 않음)"""
+
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(f"Circuit '{name}' is open (retry after {retry_after:.1f}s)")
+        self.name = name
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """
+    백엔드(또는 컬렉션) 1개에 대한 서킷 브레이커입니다.
+    - closed   : 정상. 최근 BREAKER_WINDOW초의 실패율이 기준을 넘으면 open으로 전환
+    - open     : 호출 즉시 CircuitOpenError. BREAKER_OPEN_SECONDS가 지나면 half_open으로 전환
+    - half_open: 시험 호출만 허용. 성공하면 closed, 실패하면 다시 open
+    동기(스레드 풀) 호출과 async 호출 모두에서 사용하므로 상태 변경은 Lock으로 보호합니다.
+    """
+
+    def __init__(self, name: str, window: float = BREAKER_WINDOW, min_calls: int = BREAKER_MIN_CALLS,
+                 failure_rate: float = BREAKER_FAILURE_RATE, open_seconds: float = BREAKER_OPEN_SECONDS,
+                 half_open_probes: int = BREAKER_HALF_OPEN_PROBES):
+        self.name = name
+        self.window = window
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.open_seconds = open_seconds
+        self.half_open_probes = half_open_probes
+
+        self.state = "closed"
+        self._results: Deque[Tuple[float, bool]] = deque()  # (시각, 성공 여부)
+        self._lock = threading.Lock()
+        self._probes = 0
+        self.opened_at: Optional[float] = None
+        self.last_error: Optional[str] = None
+
+        # 모니터링용 카운터
+        self.times_opened = 0
+        self.rejected = 0
+
+    def _prune(self, now: float) -> None:
+        while self._results and now - self._results[0][0] > self.window:
+            self._results.popleft()
+
+    def _open(self, now: float) -> None:
+        self.state = "open"
+        self.opened_at = now
+        self.times_opened += 1
+        self._probes = 0
+        print(f"⛔ [BREAKER] '{self.name}' 차단 (최근 에러: {self.last_error})")
+
+    def allow(self) -> bool:
+        """
+        호출해도 되는지 확인합니다. 차단 중이면 CircuitOpenError를 발생시킵니다.
+        반환값이 True이면 half-open 시험 호출이므로, 끝난 뒤 반드시 성공/실패를 기록해야 합니다.
+        """
+        if not BREAKER_ENABLED:
+            return False
+        now = time.monotonic()
+        with self._lock:
+            if self.state == "open":
+                elapsed = now - self.opened_at
+                if elapsed < self.open_seconds:
+                    self.rejected += 1
+                    raise CircuitOpenError(self.name, self.open_seconds - elapsed)
+                self.state = "half_open"
+                self._probes = 0
+
+            if self.state == "half_open":
+                if self._probes >= self.half_open_probes:
+                    self.rejected += 1
+                    raise CircuitOpenError(self.name, 0.0)
+                self._probes += 1
+                return True
+        return False
+
+    def record_success(self, probe: bool = False) -> None:
+        if not BREAKER_ENABLED:
+            return
+        now = time.monotonic()
+        with self._lock:
+            if self.state == "half_open" and probe:
+                print(f"✅ [BREAKER] '{self.name}' 복구 확인 - 차단 해제")
+                self.state = "closed"
+                self.opened_at = None
+                self._results.clear()
+                self._probes = 0
+            self._results.append((now, True))
+            self._prune(now)
+
+    def record_failure(self, error: BaseException, probe: bool = False) -> None:
+        if not BREAKER_ENABLED:
+            return
+        now = time.monotonic()
+        with self._lock:
+            self.last_error = f"{type(error).__name__}: {error}"
+            if self.state == "half_open" and probe:
+                self._open(now)
+                return
+            if self.state == "open":
+                return
+
+            self._results.append((now, False))
+            self._prune(now)
+            calls = len(self._results)
+            failures = sum(1 for _, ok in self._results if not ok)
+            if calls >= self.min_calls and failures / calls >= self.failure_rate:
+                self._open(now)
+
+    def release(self, probe: bool) -> None:
+        """결과를 판단할 수 없이 끝난 호출(취소, 요청 데드라인 초과)의 시험 호출 슬롯을 반납합니다."""
+        if probe:
+            with self._lock:
+                self._probes = max(0, self._probes - 1)
+
+    async def call(self, factory: Callable[[], Awaitable[T]]) -> T:
+        """async 호출을 브레이커로 감쌉니다. (factory는 호출할 때마다 새 코루틴을 만들어야 합니다)"""
+        probe = self.allow()
+        try:
+            result = await factory()
+        except (asyncio.CancelledError, DeadlineExceeded, CircuitOpenError, UpstreamOverloaded):
+            # 요청 쪽 사정(취소/데드라인/우리 쪽 대기열 초과)은 백엔드 장애로 보지 않음
+            self.release(probe)
+            raise
+        except Exception as e:
+            self.record_failure(e, probe)
+            raise
+        self.record_success(probe)
+        return result
+
+    def call_sync(self, fn: Callable[..., T], *args, **kwargs) -> T:
+        """동기 호출을 브레이커로 감쌉니다."""
+        probe = self.allow()
+        try:
+            result = fn(*args, **kwargs)
+        except Exception as e:
+            self.record_failure(e, probe)
+            raise
+        self.record_success(probe)
+        return result
+
+    def reset(self) -> None:
+        with self._lock:
+            self.state = "closed"
+            self.opened_at = None
+            self._results.clear()
+            self._probes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        with self._lock:
+            self._prune(now)
+            calls = len(self._results)
+            failures = sum(1 for _, ok in self._results if not ok)
+            retry_after = None
+            if self.state == "open":
+                retry_after = round(max(0.0, self.opened_at + self.open_seconds - now), 2)
+            return {
+                "state": self.state,
+                "window_calls": calls,
+                "window_failures": failures,
+                "failure_rate": round(failures / calls, 4) if calls else 0.0,
+                "times_opened": self.times_opened,
+                "rejected": self.rejected,
+                "retry_after": retry_after,
+                "last_error": self.last_error,
+            }
+
+
+class CircuitBreakerRegistry:
+    """이름(예: "supabase", "neo4j", "weaviate:Receipt")별 서킷 브레이커를 필요할 때 만들어 보관합니다."""
+
+    def __init__(self):
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def get(self, name: str) -> CircuitBreaker:
+        breaker = self._breakers.get(name)
+        if breaker is None:
+            with self._lock:
+                breaker = self._breakers.setdefault(name, CircuitBreaker(name))
+        return breaker
+
+    def is_open(self, name: str) -> bool:
+        breaker = self._breakers.get(name)
+        return breaker is not None and breaker.state == "open"
+
+    def reset(self, name: Optional[str] = None) -> None:
+        for breaker_name, breaker in list(self._breakers.items()):
+            if name is None or breaker_name == name:
+                breaker.reset()
+
+    def stats(self) -> Dict[str, Any]:
+        breakers = {name: breaker.stats() for name, breaker in sorted(self._breakers.items())}
+        return {
+            "enabled": BREAKER_ENABLED,
+            "open": [name for name, state in breakers.items() if state["state"] != "closed"],
+            "breakers": breakers,
+        }
+
+
+# 앱 전체에서 공유하는 서킷 브레이커 레지스트리
+breakers = CircuitBreakerRegistry()
@@ -1,8 +1,14 @@
 import os
-import weaviate
-import google.generativeai as genai
+import json
+import time
+import asyncio
 from dotenv import load_dotenv
-from supabase import create_client, Client
+from contextlib import asynccontextmanager
+from typing import Optional, Dict, Any, List
+from app.core.backends import LazyBackend, lazy_import, timed_import, warm_up
+
+# 무거운 라이브러리는 실제로 사용할 때 import합니다. (기동 시간 단축)
+neo4j = lazy_import("neo4j")
 
 load_dotenv()
 
@@ -12,25 +18,272 @@ SUPABASE_URL = os.getenv("SUPABASE_URL")
 
 SUPABASE_KEY = os.getenv("SUPABASE_KEY")
 
-# 1. Google Gemini 설정
-genai.configure(api_key=GOOGLE_API_KEY)
+NEO4J_URI = os.getenv("NEO4J_URI")
+
+NEO4J_USER = os.getenv("NEO4J_USER")
+
+NEO4J_PASSWORD = os.getenv("NEO4J_PASSWORD")
+
+# Supabase 벡터 검색 경로 선택
+# - sync    : 기존 동기 클라이언트 (스레드에서 실행)
+# - async   : supabase AsyncClient (PostgREST, HTTP/2 keep-alive 커넥션 풀)
+# - asyncpg : Postgres에 직접 연결하여 match_documents 함수 호출 (asyncpg 커넥션 풀 + prepared statement)
+SUPABASE_VECTOR_BACKEND = os.getenv("SUPABASE_VECTOR_BACKEND", "async").lower()
+
+# asyncpg 경로에서 사용할 Postgres 접속 문자열 (Supabase > Project Settings > Database)
+SUPABASE_DB_DSN = os.getenv("SUPABASE_DB_DSN")
+
+SUPABASE_DB_POOL_MIN = int(os.getenv("SUPABASE_DB_POOL_MIN", "1"))
+
+SUPABASE_DB_POOL_MAX = int(os.getenv("SUPABASE_DB_POOL_MAX", "10"))
+
+# prepared statement 캐시 크기. Supabase pooler(pgbouncer transaction 모드)를 쓰면 0으로 설정하세요.
+SUPABASE_DB_STATEMENT_CACHE_SIZE = int(os.getenv("SUPABASE_DB_STATEMENT_CACHE_SIZE", "100"))
+
+# Weaviate 접속 정보 (기본값: n8n 이미지에서 확인된 192.168.0.210 주소와 포트)
+WEAVIATE_HOST = os.getenv("WEAVIATE_HOST", "192.168.0.210")
+
+WEAVIATE_PORT = int(os.getenv("WEAVIATE_PORT", "28082"))          # HTTP Port
+
+WEAVIATE_GRPC_PORT = int(os.getenv("WEAVIATE_GRPC_PORT", "50051"))  # gRPC Port
+
+# 앱 시작 시 병렬로 미리 연결할 백엔드 목록 (나머지는 첫 사용 시 연결)
+BACKENDS_EAGER = [name.strip() for name in os.getenv("BACKENDS_EAGER", "gemini,supabase,weaviate,neo4j").split(",") if name.strip()]
+
+# /health/ready가 200을 반환하기 위해 반드시 연결되어 있어야 하는 백엔드 목록 (비우면 기동 즉시 ready)
+BACKENDS_REQUIRED = [name.strip() for name in os.getenv("BACKENDS_REQUIRED", "").split(",") if name.strip()]
+
+# Neo4j 커넥션 풀 설정
+NEO4J_MAX_POOL_SIZE = int(os.getenv("NEO4J_MAX_POOL_SIZE", "50"))
+
+# 풀에서 커넥션을 얻기까지 기다리는 최대 시간(초)
+NEO4J_ACQUISITION_TIMEOUT = float(os.getenv("NEO4J_ACQUISITION_TIMEOUT", "10"))
+
+# 커넥션 최대 수명(초). 방화벽/LB가 유휴 연결을 끊기 전에 교체되도록 설정합니다.
+NEO4J_MAX_CONNECTION_LIFETIME = float(os.getenv("NEO4J_MAX_CONNECTION_LIFETIME", "1800"))
+
+# 1. Google Gemini 설정 (첫 임베딩 요청 시 import + configure)
+def create_gemini():
+    genai = timed_import("google.generativeai")
+    genai.configure(api_key=GOOGLE_API_KEY)
+    return genai
+
+gemini_backend = LazyBackend("gemini", create_gemini)
+
+def get_genai():
+    return gemini_backend.get()
+
+# 2. Supabase 클라이언트 생성 (첫 사용 시 연결)
+def create_supabase():
+    return timed_import("supabase").create_client(SUPABASE_URL, SUPABASE_KEY)
+
+supabase_backend = LazyBackend("supabase", create_supabase)
+
+def get_supabase():
+    return supabase_backend.get()
+
+# 2-1. Supabase 비동기 클라이언트 / asyncpg 풀 (첫 사용 시 또는 lifespan에서 생성)
+supabase_async = None
+supabase_pg_pool = None
+_supabase_async_lock = asyncio.Lock()
+
+async def get_supabase_async():
+    """PostgREST 비동기 클라이언트를 반환합니다. (내부 httpx 클라이언트가 HTTP/2 커넥션을 재사용)"""
+    global supabase_async
+    if supabase_async is None:
+        async with _supabase_async_lock:
+            if supabase_async is None:
+                supabase_async = await timed_import("supabase").acreate_client(SUPABASE_URL, SUPABASE_KEY)
+    return supabase_async
+
+async def _init_pg_connection(conn) -> None:
+    # jsonb(metadata, filter)를 dict로 주고받기 위한 코덱 등록
+    await conn.set_type_codec("jsonb", encoder=json.dumps, decoder=json.loads, schema="pg_catalog")
+
+async def get_supabase_pg_pool():
+    """Supabase Postgres에 직접 연결하는 asyncpg 커넥션 풀을 반환합니다."""
+    global supabase_pg_pool
+    if supabase_pg_pool is None:
+        async with _supabase_async_lock:
+            if supabase_pg_pool is None:
+                asyncpg = timed_import("asyncpg")  # asyncpg 경로를 쓸 때만 필요
+
+                if not SUPABASE_DB_DSN:
+                    raise RuntimeError("SUPABASE_VECTOR_BACKEND=asyncpg 사용 시 SUPABASE_DB_DSN을 설정해야 합니다.")
+                supabase_pg_pool = await asyncpg.create_pool(
+                    SUPABASE_DB_DSN,
+                    min_size=SUPABASE_DB_POOL_MIN,
+                    max_size=SUPABASE_DB_POOL_MAX,
+                    statement_cache_size=SUPABASE_DB_STATEMENT_CACHE_SIZE,
+                    init=_init_pg_connection,
+                )
+    return supabase_pg_pool
+
+async def init_supabase_async() -> None:
+    """앱 시작 시 설정된 Supabase 비동기 경로를 미리 연결합니다."""
+    try:
+        if SUPABASE_VECTOR_BACKEND == "asyncpg":
+            await get_supabase_pg_pool()
+            print("✅ Supabase asyncpg pool is ready.")
+        elif SUPABASE_VECTOR_BACKEND == "async":
+            await get_supabase_async()
+            print("✅ Supabase async client is ready.")
+    except Exception as e:
+        print(f"❌ Supabase async init failed: {e}")
+
+async def close_supabase_async() -> None:
+    global supabase_async, supabase_pg_pool
+    if supabase_pg_pool is not None:
+        await supabase_pg_pool.close()
+        supabase_pg_pool = None
+    if supabase_async is not None:
+        await supabase_async.postgrest.aclose()
+        supabase_async = None
+
+# 3. Weaviate 클라이언트 생성 (첫 사용 시 연결)
+def create_weaviate():
+    weaviate = timed_import("weaviate")
+    return weaviate.connect_to_local(
+        host=WEAVIATE_HOST,
+        port=WEAVIATE_PORT,
+        grpc_port=WEAVIATE_GRPC_PORT
+    )
+
+weaviate_backend = LazyBackend("weaviate", create_weaviate, closer=lambda client: client.close())
+
+def get_weaviate():
+    return weaviate_backend.get()
+
+# 4. Neo4j 드라이버 (앱 수명주기 동안 1개만 생성하여 커넥션 풀을 공유)
+neo4j_driver = None
+
+# 풀 사용 현황 (드라이버가 공개 API로 풀 상태를 제공하지 않으므로 세션 단위로 직접 집계)
+neo4j_pool_stats = {
+    "sessions_in_use": 0,
+    "peak_sessions_in_use": 0,
+    "sessions_total": 0,
+    "session_errors": 0,
+    "total_session_seconds": 0.0,
+    "driver_created_at": None,
+    "verified": False,
+}
+
+def create_neo4j_driver():
+    return neo4j.AsyncGraphDatabase.driver(
+        NEO4J_URI,
+        auth=(NEO4J_USER, NEO4J_PASSWORD),
+        max_connection_pool_size=NEO4J_MAX_POOL_SIZE,
+        connection_acquisition_timeout=NEO4J_ACQUISITION_TIMEOUT,
+        max_connection_lifetime=NEO4J_MAX_CONNECTION_LIFETIME,
+    )
+
+async def init_neo4j_driver():
+    """
+    앱 시작 시(combined_lifespan) 공유 드라이버를 만들고 연결을 미리 검증(Warm-up)합니다.
+    검증에 실패해도 드라이버는 유지되며, 첫 요청 시 다시 연결을 시도합니다.
+    """
+    try:
+        await get_neo4j_driver().verify_connectivity()
+        neo4j_pool_stats["verified"] = True
+        print("✅ Neo4j driver is ready.")
+    except Exception as e:
+        neo4j_pool_stats["verified"] = False
+        print(f"❌ Neo4j connectivity check failed: {e}")
+
+    return neo4j_driver
+
+async def close_neo4j_driver() -> None:
+    global neo4j_driver
+    if neo4j_driver is not None:
+        await neo4j_driver.close()
+        neo4j_driver = None
+        neo4j_pool_stats["verified"] = False
+
+def get_neo4j_driver():
+    """공유 드라이버를 반환합니다. (lifespan 밖에서 호출된 경우 지연 생성)"""
+    global neo4j_driver
+    if neo4j_driver is None:
+        neo4j_driver = create_neo4j_driver()
+        neo4j_pool_stats["driver_created_at"] = time.time()
+    return neo4j_driver
+
+@asynccontextmanager
+async def neo4j_session(**kwargs):
+    """공유 드라이버의 풀에서 세션을 빌려오고 사용 현황을 기록합니다."""
+    started = time.perf_counter()
+    neo4j_pool_stats["sessions_in_use"] += 1
+    neo4j_pool_stats["sessions_total"] += 1
+    neo4j_pool_stats["peak_sessions_in_use"] = max(
+        neo4j_pool_stats["peak_sessions_in_use"], neo4j_pool_stats["sessions_in_use"]
+    )
+    try:
+        async with get_neo4j_driver().session(**kwargs) as session:
+            yield session
+    except Exception:
+        neo4j_pool_stats["session_errors"] += 1
+        raise
+    finally:
+        neo4j_pool_stats["sessions_in_use"] -= 1
+        neo4j_pool_stats["total_session_seconds"] += time.perf_counter() - started
+
+def get_neo4j_pool_stats() -> Dict[str, Any]:
+    stats = dict(neo4j_pool_stats)
+    total = stats.pop("total_session_seconds")
+    stats["avg_session_ms"] = round(total / stats["sessions_total"] * 1000, 2) if stats["sessions_total"] else 0.0
+    stats["max_pool_size"] = NEO4J_MAX_POOL_SIZE
+    stats["acquisition_timeout"] = NEO4J_ACQUISITION_TIMEOUT
+    stats["max_connection_lifetime"] = NEO4J_MAX_CONNECTION_LIFETIME
+    stats["driver_open"] = neo4j_driver is not None
+    return stats
+
+# 5. 백엔드 병렬 초기화 / 상태 조회
+async def init_backends(names: List[str] = BACKENDS_EAGER) -> None:
+    """
+    lifespan에서 백그라운드로 호출하여 설정된 백엔드들을 동시에 연결합니다.
+    요청이 먼저 들어오면 해당 백엔드는 그 자리에서 연결되므로, 기동 자체는 기다리지 않습니다.
+    """
+    lazy = {"gemini": gemini_backend, "weaviate": weaviate_backend}
+    if SUPABASE_VECTOR_BACKEND == "sync":
+        lazy["supabase"] = supabase_backend
+
+    tasks = [warm_up([lazy[name] for name in names if name in lazy])]
+    if "supabase" in names and SUPABASE_VECTOR_BACKEND != "sync":
+        tasks.append(init_supabase_async())
+    if "neo4j" in names:
+        tasks.append(init_neo4j_driver())
+
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+async def close_backends() -> None:
+    await close_supabase_async()
+    await close_neo4j_driver()
+    await asyncio.to_thread(weaviate_backend.close)
+    supabase_backend.close()
+    gemini_backend.close()
 
-# 2. Supabase 클라이언트 생성
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+def backend_status() -> Dict[str, Dict[str, Any]]:
+    """백엔드별 연결 상태를 반환합니다. (/health/ready)"""
+    if SUPABASE_VECTOR_BACKEND == "sync":
+        supabase_state = supabase_backend.status()
+    else:
+        connected = supabase_pg_pool is not None if SUPABASE_VECTOR_BACKEND == "asyncpg" else supabase_async is not None
+        supabase_state = {"state": "ready" if connected else "idle", "path": SUPABASE_VECTOR_BACKEND}
 
-# 3. Weaviate 클라이언트 생성 (n8n 설정 정보 반영)
-# n8n 이미지에서 확인된 192.168.0.210 주소와 포트를 사용합니다.
-weaviate_client = weaviate.connect_to_local(
-    host="192.168.0.210",
-    port=28082,          # HTTP Port
-    grpc_port=50051      # gRPC Port
-)
+    return {
+        "gemini": gemini_backend.status(),
+        "supabase": supabase_state,
+        "weaviate": weaviate_backend.status(),
+        "neo4j": {
+            "state": "ready" if neo4j_pool_stats["verified"] else ("idle" if neo4j_driver is None else "unverified"),
+        },
+    }
 
 # 서버 연결 상태 확인을 위한 헬스 체크 (선택 사항)
 def check_db_connections():
     try:
-        if weaviate_client.is_ready():
+        if get_weaviate().is_ready():
             print("✅ Weaviate is ready.")
+        get_supabase()
         print("✅ Supabase is connected.")
     except Exception as e:
-        print(f"❌ Connection error: {e}")
\ No newline at end of file
+        print(f"❌ Connection error: {e}")
@@ -0,0 +1,244 @@
+# app/core/deadline.py
+import os
+import time
+import asyncio
+
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dotenv import load_dotenv
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, TypeVar
+
+load_dotenv()
+
+T = TypeVar("T")
+
+# REST API 요청 1건의 전체 응답 시간 예산(초). 요청 헤더 X-Request-Timeout으로 더 짧게 지정할 수 있습니다.
+REQUEST_DEADLINE = float(os.getenv("REQUEST_DEADLINE", "20"))
+
+# MCP 도구 호출 1건의 전체 응답 시간 예산(초)
+MCP_DEADLINE = float(os.getenv("MCP_DEADLINE", "20"))
+
+# 헤징(느린 요청에 복제 요청 추가 발송) 사용 여부 - 읽기 전용 벡터 조회에만 적용됩니다.
+HEDGE_ENABLED = os.getenv("HEDGE_ENABLED", "true").lower() == "true"
+
+# 이 백분위 지연 시간이 지나도 응답이 없으면 복제 요청을 보냅니다.
+HEDGE_PERCENTILE = float(os.getenv("HEDGE_PERCENTILE", "95"))
+
+# 헤징 지연 계산에 필요한 최소 샘플 수 (그 전에는 헤징하지 않음)
+HEDGE_MIN_SAMPLES = int(os.getenv("HEDGE_MIN_SAMPLES", "20"))
+
+# 헤징 지연의 하한(ms) - 너무 빠른 구간에서 복제 요청이 남발되지 않도록 합니다.
+HEDGE_MIN_DELAY_MS = float(os.getenv("HEDGE_MIN_DELAY_MS", "20"))
+
+# 전체 호출 대비 복제 요청 비율 상한 (백엔드 부하가 2배로 늘어나는 것을 방지)
+HEDGE_MAX_RATIO = float(os.getenv("HEDGE_MAX_RATIO", "0.1"))
+
+# 백분위 계산에 사용할 최근 지연 시간 샘플 수
+HEDGE_WINDOW = int(os.getenv("HEDGE_WINDOW", "200"))
+
+
+class DeadlineExceeded(asyncio.TimeoutError):
+    """요청의 응답 시간 예산을 모두 써버렸을 때 발생합니다. (stage: 초과가 감지된 단계)"""
+
+    def __init__(self, stage: str):
+        super().__init__(f"Request deadline exceeded during '{stage}'")
+        self.stage = stage
+
+
+# 현재 요청의 마감 시각 (time.monotonic 기준). asyncio 태스크/스레드 풀로 자동 전파됩니다.
+_deadline: ContextVar[Optional[float]] = ContextVar("request_deadline", default=None)
+
+# 단계별 데드라인 초과 횟수
+deadline_exceeded: Dict[str, int] = {}
+
+
+@contextmanager
+def request_deadline(seconds: Optional[float]):
+    """
+    블록 안에서 실행되는 모든 검색 단계에 마감 시각을 적용합니다.
+    이미 더 짧은 마감 시각이 설정되어 있으면(중첩 호출) 그대로 유지합니다.
+    """
+    if seconds is None or seconds <= 0:
+        yield
+        return
+
+    new_deadline = time.monotonic() + seconds
+    current = _deadline.get()
+    token = _deadline.set(new_deadline if current is None else min(current, new_deadline))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining() -> Optional[float]:
+    """남은 시간(초). 데드라인이 없으면 None."""
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def _exceeded(stage: str) -> DeadlineExceeded:
+    deadline_exceeded[stage] = deadline_exceeded.get(stage, 0) + 1
+    print(f"⏱️ [DEADLINE] '{stage}' 단계에서 응답 시간 예산 초과")
+    return DeadlineExceeded(stage)
+
+
+def check_deadline(stage: str) -> None:
+    """다음 단계를 시작하기 전에 남은 시간이 있는지 확인합니다."""
+    left = remaining()
+    if left is not None and left <= 0:
+        raise _exceeded(stage)
+
+
+def clamp_timeout(default: Optional[float]) -> Optional[float]:
+    """단계별 기본 타임아웃을 남은 시간으로 줄입니다. (데드라인이 없으면 기본값 그대로)"""
+    left = remaining()
+    if left is None:
+        return default
+    left = max(left, 0.0)
+    return left if default is None else min(default, left)
+
+
+async def with_deadline(aw: Awaitable[T], stage: str) -> T:
+    """남은 시간 안에 끝나지 않으면 작업을 취소하고 DeadlineExceeded를 발생시킵니다."""
+    left = remaining()
+    if left is None:
+        return await aw
+
+    if left <= 0:
+        # 시작하지도 않은 작업은 정리만 하고 바로 실패 처리
+        if asyncio.iscoroutine(aw):
+            aw.close()
+        elif isinstance(aw, asyncio.Future):
+            aw.cancel()
+        raise _exceeded(stage)
+
+    try:
+        return await asyncio.wait_for(aw, timeout=left)
+    except DeadlineExceeded:
+        raise
+    except asyncio.TimeoutError:
+        # 내부 작업 자체의 타임아웃(예: 테이블별 타임아웃)과 구분
+        if (remaining() or 0) <= 0:
+            raise _exceeded(stage) from None
+        raise
+
+
+async def run_with_deadline(aw: Awaitable[T], seconds: Optional[float], stage: str = "request") -> T:
+    """진입점(route / MCP 도구)에서 요청 전체에 데드라인을 걸고 실행합니다."""
+    with request_deadline(seconds):
+        return await with_deadline(aw, stage)
+
+
+class LatencyTracker:
+    """호출 대상별 최근 지연 시간 샘플을 보관하고 백분위를 계산합니다."""
+
+    def __init__(self, window: int = HEDGE_WINDOW):
+        self.samples: Deque[float] = deque(maxlen=window)
+        self.calls = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+
+    def record(self, seconds: float) -> None:
+        self.samples.append(seconds)
+
+    def percentile(self, p: float) -> Optional[float]:
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        index = min(len(ordered) - 1, int(round(p / 100.0 * (len(ordered) - 1))))
+        return ordered[index]
+
+    def hedge_delay(self) -> Optional[float]:
+        """복제 요청을 보낼 대기 시간(초). 헤징 조건이 안 되면 None."""
+        if not HEDGE_ENABLED or len(self.samples) < HEDGE_MIN_SAMPLES:
+            return None
+        if self.calls and self.hedged / self.calls >= HEDGE_MAX_RATIO:
+            return None
+        return max(self.percentile(HEDGE_PERCENTILE), HEDGE_MIN_DELAY_MS / 1000.0)
+
+    def stats(self) -> Dict[str, Any]:
+        def ms(value: Optional[float]) -> Optional[float]:
+            return round(value * 1000, 2) if value is not None else None
+
+        return {
+            "samples": len(self.samples),
+            "p50_ms": ms(self.percentile(50)),
+            "p95_ms": ms(self.percentile(95)),
+            "p99_ms": ms(self.percentile(99)),
+            "calls": self.calls,
+            "hedged": self.hedged,
+            "hedge_wins": self.hedge_wins,
+        }
+
+
+# 호출 대상 이름(예: "weaviate:Receipt", "supabase") -> 지연 시간 추적기
+latency_trackers: Dict[str, LatencyTracker] = {}
+
+
+def get_tracker(name: str) -> LatencyTracker:
+    tracker = latency_trackers.get(name)
+    if tracker is None:
+        tracker = latency_trackers.setdefault(name, LatencyTracker())
+    return tracker
+
+
+async def _timed(factory: Callable[[], Awaitable[T]]) -> "tuple[T, float]":
+    started = time.monotonic()
+    result = await factory()
+    return result, time.monotonic() - started
+
+
+async def hedged(name: str, factory: Callable[[], Awaitable[T]]) -> T:
+    """
+    읽기 전용 호출을 실행하고, p95 지연 시간이 지나도 응답이 없으면 같은 요청을 한 번 더 보내
+    먼저 도착한 결과를 사용합니다. (factory는 호출할 때마다 새 요청을 만들어야 합니다)
+
+    스레드 풀에서 실행 중인 동기 호출은 취소해도 스레드 자체는 끝까지 실행되지만,
+    요청은 더 이상 그 결과를 기다리지 않습니다.
+    """
+    tracker = get_tracker(name)
+    tracker.calls += 1
+    delay = tracker.hedge_delay()
+
+    # 남은 시간이 헤징 대기 시간보다 짧으면 복제 요청을 보내도 의미가 없음
+    left = remaining()
+    if delay is not None and left is not None and delay >= left:
+        delay = None
+
+    primary = asyncio.ensure_future(_timed(factory))
+    tasks = {primary}
+    try:
+        if delay is not None:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if not done:
+                tracker.hedged += 1
+                tasks.add(asyncio.ensure_future(_timed(factory)))
+
+        error: Optional[BaseException] = None
+        while tasks:
+            done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    result, elapsed = task.result()
+                    tracker.record(elapsed)
+                    if task is not primary:
+                        tracker.hedge_wins += 1
+                    return result
+                error = error or task.exception()
+        raise error
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+def deadline_stats() -> Dict[str, Any]:
+    return {
+        "request_deadline": REQUEST_DEADLINE,
+        "mcp_deadline": MCP_DEADLINE,
+        "hedge_enabled": HEDGE_ENABLED,
+        "hedge_percentile": HEDGE_PERCENTILE,
+        "deadline_exceeded": dict(deadline_exceeded),
+        "targets": {name: tracker.stats() for name, tracker in latency_trackers.items()},
+    }
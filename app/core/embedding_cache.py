@@ -0,0 +1,206 @@
+# app/core/embedding_cache.py
+import os
+import time
+import sqlite3
+import hashlib
+import threading
+from array import array
+from collections import OrderedDict
+from dotenv import load_dotenv
+from typing import List, Dict, Any, Optional, Tuple
+
+load_dotenv()
+
+# 메모리 캐시 최대 항목 수 (벡터 1개 = 3072 float ≈ 24KB 이므로 2048개 ≈ 50MB)
+EMBEDDING_CACHE_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", "2048"))
+
+# 캐시 유효 시간(초). 0 이하이면 만료 없이 LRU로만 밀어냅니다.
+EMBEDDING_CACHE_TTL = float(os.getenv("EMBEDDING_CACHE_TTL", "86400"))
+
+# 영속 캐시(SQLite) 파일 경로. 비워두면 메모리 캐시만 사용합니다.
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", "")
+
+
+def normalize_query(text: str) -> str:
+    """
+    같은 질문이 공백 차이로 캐시를 놓치지 않도록 정규화합니다.
+    대소문자는 임베딩 결과에 영향을 주므로(예: 'IT' vs 'it') 그대로 유지합니다.
+    예: '  야근   식대 한도 ' -> '야근 식대 한도'
+    """
+    return " ".join((text or "").split())
+
+
+def make_cache_key(text: str, model: str, task_type: str) -> str:
+    """정규화된 질문 + 모델 + task_type 조합으로 캐시 키를 만듭니다."""
+    raw = f"{model}\x1f{task_type}\x1f{normalize_query(text)}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class SQLiteEmbeddingStore:
+    """
+    서버 재시작 후에도 살아남는 2차(디스크) 캐시입니다.
+    벡터는 float64 배열 bytes(BLOB)로 저장하여 원본 값과 완전히 동일하게 복원됩니다.
+    """
+
+    def __init__(self, path: str, ttl: float):
+        self.path = path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        # 읽기 성능을 위해 mmap 사용 (256MB)
+        self._conn.execute("PRAGMA mmap_size=268435456")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS embedding_cache (
+                cache_key  TEXT PRIMARY KEY,
+                vector     BLOB NOT NULL,
+                created_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[Tuple[List[float], float]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT vector, created_at FROM embedding_cache WHERE cache_key = ?", (key,)
+            ).fetchone()
+
+        if row is None:
+            return None
+
+        blob, created_at = row
+        if self.ttl > 0 and time.time() - created_at > self.ttl:
+            self.delete(key)
+            return None
+
+        vector = array("d")
+        vector.frombytes(blob)
+        return vector.tolist(), created_at
+
+    def set(self, key: str, vector: List[float], created_at: float) -> None:
+        blob = array("d", vector).tobytes()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO embedding_cache (cache_key, vector, created_at) VALUES (?, ?, ?)",
+                (key, blob, created_at),
+            )
+            self._conn.commit()
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM embedding_cache WHERE cache_key = ?", (key,))
+            self._conn.commit()
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM embedding_cache").fetchone()[0]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM embedding_cache")
+            self._conn.commit()
+
+
+class EmbeddingCache:
+    """
+    질문 임베딩 결과를 보관하는 LRU + TTL 캐시입니다.
+    1차: 메모리(OrderedDict, 최대 max_size개), 2차: 선택적 SQLite 영속 저장소.
+    """
+
+    def __init__(self, max_size: int = EMBEDDING_CACHE_SIZE, ttl: float = EMBEDDING_CACHE_TTL, persist_path: str = EMBEDDING_CACHE_PATH):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._memory: "OrderedDict[str, Tuple[List[float], float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._store = SQLiteEmbeddingStore(persist_path, ttl) if persist_path else None
+
+        # 적중률 모니터링용 카운터
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _is_expired(self, created_at: float) -> bool:
+        return self.ttl > 0 and time.time() - created_at > self.ttl
+
+    def _put_memory(self, key: str, vector: List[float], created_at: float) -> None:
+        with self._lock:
+            self._memory[key] = (vector, created_at)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_size:
+                self._memory.popitem(last=False)
+                self.evictions += 1
+
+    def get(self, text: str, model: str, task_type: str) -> Optional[List[float]]:
+        key = make_cache_key(text, model, task_type)
+
+        # 1. 메모리 캐시 조회
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                vector, created_at = entry
+                if not self._is_expired(created_at):
+                    self._memory.move_to_end(key)
+                    self.hits += 1
+                    return vector
+                # 만료된 항목은 즉시 제거
+                del self._memory[key]
+
+        # 2. 디스크 캐시 조회 (적중 시 메모리로 승격)
+        if self._store is not None:
+            stored = self._store.get(key)
+            if stored is not None:
+                vector, created_at = stored
+                self._put_memory(key, vector, created_at)
+                with self._lock:
+                    self.disk_hits += 1
+                return vector
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def set(self, text: str, model: str, task_type: str, vector: List[float]) -> None:
+        key = make_cache_key(text, model, task_type)
+        created_at = time.time()
+        self._put_memory(key, vector, created_at)
+
+        if self._store is not None:
+            try:
+                self._store.set(key, vector, created_at)
+            except sqlite3.Error as e:
+                # 디스크 캐시 실패는 검색 자체를 막지 않도록 경고만 남깁니다.
+                print(f"⚠️ [EMBEDDING CACHE] 디스크 저장 실패: {e}")
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+        if self._store is not None:
+            self._store.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.disk_hits + self.misses
+            return {
+                "size": len(self._memory),
+                "max_size": self.max_size,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round((self.hits + self.disk_hits) / total, 4) if total else 0.0,
+                "persistent": self._store is not None,
+                "disk_size": self._store.count() if self._store is not None else 0,
+            }
+
+
+# 앱 전체에서 공유하는 임베딩 캐시 인스턴스
+embedding_cache = EmbeddingCache()
@@ -0,0 +1,240 @@
+# app/core/metrics.py
+import os
+import time
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dotenv import load_dotenv
+from typing import Any, Dict, Optional, Tuple
+
+from prometheus_client import Counter, Gauge, Histogram, CONTENT_TYPE_LATEST, generate_latest
+from starlette.routing import Match
+
+load_dotenv()
+
+# 단계별 지연 시간 / 후보 수 / 응답 크기 수집 여부
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+
+# 응답 헤더 Server-Timing에 단계별 소요 시간을 함께 내려줄지 여부 (브라우저 개발자 도구 / curl -v로 확인)
+SERVER_TIMING_ENABLED = os.getenv("SERVER_TIMING_ENABLED", "true").lower() == "true"
+
+# 단계 지연 시간 히스토그램 구간(초) - 임베딩 수 ms ~ 클로바 응답 수십 초까지
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0)
+
+STAGE_LABELS = ("entry", "stage", "backend", "collection")
+
+STAGE_SECONDS = Histogram(
+    "rag_stage_duration_seconds", "검색/프록시 단계별 소요 시간",
+    STAGE_LABELS, buckets=LATENCY_BUCKETS
+)
+STAGE_ERRORS = Counter(
+    "rag_stage_errors_total", "검색/프록시 단계별 에러 수",
+    STAGE_LABELS + ("error",)
+)
+REQUEST_SECONDS = Histogram(
+    "rag_request_duration_seconds", "REST API 요청 전체 소요 시간 (응답 헤더 전송까지)",
+    ("entry",), buckets=LATENCY_BUCKETS
+)
+REQUESTS = Counter(
+    "rag_requests_total", "REST API / MCP 요청 수",
+    ("entry", "status")
+)
+CANDIDATES = Gauge(
+    "rag_candidates", "단계별 최근 후보(결과) 수",
+    STAGE_LABELS
+)
+PAYLOAD_BYTES = Gauge(
+    "rag_payload_bytes", "단계별 최근 페이로드 크기(bytes)",
+    ("entry", "stage")
+)
+
+# 현재 요청의 진입점(route 경로 또는 "mcp:도구명"). asyncio 태스크로 자동 전파됩니다.
+_entry: ContextVar[str] = ContextVar("metrics_entry", default="internal")
+
+# 현재 요청의 단계별 누적 소요 시간(ms) - Server-Timing 헤더용 (미들웨어가 설정)
+_timings: ContextVar[Optional[Dict[str, float]]] = ContextVar("metrics_timings", default=None)
+
+# labels() 조회 비용을 줄이기 위해 라벨 조합별 child 메트릭을 보관
+_stage_children: Dict[Tuple[str, ...], Any] = {}
+
+
+def _stage_histogram(labels: Tuple[str, ...]):
+    child = _stage_children.get(labels)
+    if child is None:
+        child = _stage_children.setdefault(labels, STAGE_SECONDS.labels(*labels))
+    return child
+
+
+@contextmanager
+def entry_point(name: str):
+    """블록 안에서 기록되는 모든 단계에 진입점(route / MCP 도구) 라벨을 붙입니다."""
+    token = _entry.set(name)
+    try:
+        yield
+    finally:
+        _entry.reset(token)
+
+
+def current_entry() -> str:
+    return _entry.get()
+
+
+def current_timings() -> Optional[Dict[str, float]]:
+    """현재 요청에서 지금까지 기록된 단계별 소요 시간(ms)"""
+    return _timings.get()
+
+
+@contextmanager
+def collect_timings():
+    """
+    단계별 소요 시간을 모을 dict를 설정합니다. (MCP 도구처럼 MetricsMiddleware를 거치지 않는 호출용)
+    이미 수집 중이면 그 dict를 그대로 사용합니다.
+    """
+    timings = _timings.get()
+    if timings is not None:
+        yield timings
+        return
+    timings = {}
+    token = _timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _timings.reset(token)
+
+
+def record_stage(stage: str, seconds: float, backend: str = "", collection: str = "",
+                 error: Optional[str] = None) -> None:
+    if not METRICS_ENABLED:
+        return
+    labels = (_entry.get(), stage, backend, collection)
+    _stage_histogram(labels).observe(seconds)
+    if error is not None:
+        STAGE_ERRORS.labels(*labels, error).inc()
+
+    # 순차 단계는 합산하고, 컬렉션별 단계(동시 실행)는 가장 느린 컬렉션 시간만 Server-Timing에 남김
+    timings = _timings.get()
+    if timings is not None:
+        ms = seconds * 1000
+        timings[stage] = max(timings.get(stage, 0.0), ms) if collection else timings.get(stage, 0.0) + ms
+
+
+@contextmanager
+def span(stage: str, backend: str = "", collection: str = ""):
+    """
+    블록 실행 시간을 단계 히스토그램에 기록합니다. 예외가 나면 에러 카운터도 올립니다.
+    (async 함수 안에서도 await를 감싸서 그대로 사용할 수 있습니다)
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    except BaseException as e:
+        record_stage(stage, time.perf_counter() - started, backend, collection, type(e).__name__)
+        raise
+    record_stage(stage, time.perf_counter() - started, backend, collection)
+
+
+@contextmanager
+def tool_call(name: str):
+    """MCP 도구 1회 호출을 진입점("mcp:도구명")으로 설정하고 전체 소요 시간 / 성공 여부를 기록합니다."""
+    entry = f"mcp:{name}"
+    token = _entry.set(entry)
+    status = "error"
+    try:
+        with span("tool"):
+            yield
+        status = "ok"
+    finally:
+        _entry.reset(token)
+        count_request(entry, status)
+
+
+def observe_candidates(stage: str, count: int, backend: str = "", collection: str = "") -> None:
+    if METRICS_ENABLED:
+        CANDIDATES.labels(_entry.get(), stage, backend, collection).set(count)
+
+
+def observe_payload(stage: str, size: int) -> None:
+    if METRICS_ENABLED:
+        PAYLOAD_BYTES.labels(_entry.get(), stage).set(size)
+
+
+def text_size(text: str) -> int:
+    return len(text.encode("utf-8"))
+
+
+def count_request(entry: str, status: str) -> None:
+    if METRICS_ENABLED:
+        REQUESTS.labels(entry, status).inc()
+
+
+def server_timing(timings: Dict[str, float], total_ms: Optional[float] = None) -> str:
+    parts = [f"{stage};dur={ms:.1f}" for stage, ms in timings.items()]
+    if total_ms is not None:
+        parts.append(f"total;dur={total_ms:.1f}")
+    return ", ".join(parts)
+
+
+def metrics_payload() -> Tuple[bytes, str]:
+    """/metrics 응답 본문과 Content-Type"""
+    return generate_latest(), CONTENT_TYPE_LATEST
+
+
+def resolve_entry(scope) -> str:
+    """요청 경로를 라벨로 쓸 route 경로 템플릿으로 바꿉니다. (예: /local-index/{name}/sync, 모르는 경로는 other)"""
+    app = scope.get("app")
+    for route in getattr(app, "routes", ()):
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return getattr(route, "path", "other")
+    return "other"
+
+
+class MetricsMiddleware:
+    """
+    REST 요청의 전체 소요 시간 / 상태 코드를 기록하고, 진입점 라벨을 설정하는 ASGI 미들웨어입니다.
+    응답 헤더 Server-Timing에 단계별 소요 시간(embedding, vector_fetch, rerank ...)을 붙여줍니다.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._entries: Dict[str, str] = {}
+
+    def _entry_for(self, scope) -> str:
+        path = scope.get("path", "")
+        entry = self._entries.get(path)
+        if entry is None:
+            entry = resolve_entry(scope)
+            # 경로 파라미터가 있는 route는 경로마다 캐시되므로 크기를 제한
+            if entry != "other" and len(self._entries) < 1024:
+                self._entries[path] = entry
+        return entry
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not METRICS_ENABLED:
+            return await self.app(scope, receive, send)
+
+        entry = self._entry_for(scope)
+        timings: Dict[str, float] = {}
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                elapsed = time.perf_counter() - started
+                REQUEST_SECONDS.labels(entry).observe(elapsed)
+                if SERVER_TIMING_ENABLED and timings:
+                    headers = list(message.get("headers") or [])
+                    headers.append((b"server-timing", server_timing(timings, elapsed * 1000).encode("latin-1")))
+                    message = {**message, "headers": headers}
+            await send(message)
+
+        entry_token = _entry.set(entry)
+        timings_token = _timings.set(timings)
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _timings.reset(timings_token)
+            _entry.reset(entry_token)
+            count_request(entry, str(status))
@@ -0,0 +1,281 @@
+# app/core/query_log.py
+import os
+import re
+import json
+import time
+import queue
+import random
+import threading
+
+from contextlib import contextmanager
+from dotenv import load_dotenv
+from typing import Any, Dict, List, Optional
+
+from app.core.metrics import tool_call, collect_timings, current_timings
+
+load_dotenv()
+
+# 요청 기록(쿼리 로그) 사용 여부 - 기본 꺼짐. 켜면 검색 요청의 엔드포인트/파라미터/도착 시각/지연 시간을 JSONL로 남깁니다.
+QUERY_LOG_ENABLED = os.getenv("QUERY_LOG_ENABLED", "false").lower() == "true"
+
+# 기록 파일 경로 (QUERY_LOG_MAX_BYTES를 넘으면 .1로 교체 후 새 파일에 기록)
+QUERY_LOG_PATH = os.getenv("QUERY_LOG_PATH", os.path.join(os.getcwd(), "data", "query_log", "queries.jsonl"))
+QUERY_LOG_MAX_BYTES = int(os.getenv("QUERY_LOG_MAX_BYTES", str(100 * 1024 * 1024)))
+
+# 기록 비율 (0.1이면 요청 10건 중 1건만 기록)
+QUERY_LOG_SAMPLE_RATE = float(os.getenv("QUERY_LOG_SAMPLE_RATE", "1.0"))
+
+# 개인정보(이메일, 전화번호, 주민/카드 번호 등) 마스킹 여부
+QUERY_LOG_ANONYMIZE = os.getenv("QUERY_LOG_ANONYMIZE", "true").lower() == "true"
+
+# 기록할 REST 경로 (대화 내용 전체가 들어오는 /v1/chat/completions는 기본 제외)
+QUERY_LOG_ROUTES = [path.strip() for path in os.getenv(
+    "QUERY_LOG_ROUTES", "/search-docs,/search_table,/search-neo4j,/search-federated"
+).split(",") if path.strip()]
+
+# 요청 본문 최대 기록 크기(bytes). 넘으면 본문은 기록하지 않습니다.
+QUERY_LOG_MAX_BODY = int(os.getenv("QUERY_LOG_MAX_BODY", "65536"))
+
+# 기록 대기열 길이. 파일 쓰기가 밀리면 요청을 막지 않고 기록을 버립니다.
+QUERY_LOG_QUEUE_SIZE = int(os.getenv("QUERY_LOG_QUEUE_SIZE", "10000"))
+
+# 마스킹 규칙 (순서대로 적용)
+MASK_PATTERNS = [
+    (re.compile(r"[\w.+-]+@[\w-]+(\.[\w-]+)+"), "<email>"),
+    (re.compile(r"\b\d{6}\s*-\s*[1-4]\d{6}\b"), "<rrn>"),                    # 주민등록번호
+    (re.compile(r"\b(?:\d{4}[\s-]?){3}\d{4}\b"), "<card>"),                   # 카드 번호
+    (re.compile(r"\b01[016789][\s-]?\d{3,4}[\s-]?\d{4}\b"), "<phone>"),       # 휴대전화
+    (re.compile(r"\b0\d{1,2}[\s-]?\d{3,4}[\s-]?\d{4}\b"), "<phone>"),         # 일반 전화
+    (re.compile(r"\d{7,}"), "<number>"),                                       # 그 밖의 긴 숫자 (계좌 등)
+]
+
+
+def mask_text(text: str) -> str:
+    for pattern, replacement in MASK_PATTERNS:
+        text = pattern.sub(replacement, text)
+    return text
+
+
+def anonymize(value: Any) -> Any:
+    """문자열 값의 개인정보를 마스킹합니다. (dict / list 안쪽까지)"""
+    if isinstance(value, str):
+        return mask_text(value)
+    if isinstance(value, dict):
+        return {key: anonymize(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [anonymize(item) for item in value]
+    return value
+
+
+class QueryLogWriter:
+    """
+    요청 기록을 대기열에 넣고 별도 스레드에서 JSONL 파일에 씁니다. (요청 경로에서는 파일 I/O를 하지 않음)
+    대기열이 가득 차면 기록을 버리고 dropped 카운터만 올립니다.
+    """
+
+    def __init__(self, path: str = QUERY_LOG_PATH, enabled: bool = QUERY_LOG_ENABLED,
+                 sample_rate: float = QUERY_LOG_SAMPLE_RATE, max_bytes: int = QUERY_LOG_MAX_BYTES,
+                 queue_size: int = QUERY_LOG_QUEUE_SIZE):
+        self.path = path
+        self.enabled = enabled
+        self.sample_rate = sample_rate
+        self.max_bytes = max_bytes
+
+        self._queue: "queue.Queue[Optional[Dict[str, Any]]]" = queue.Queue(maxsize=queue_size)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+        # 모니터링용 카운터
+        self.recorded = 0
+        self.written = 0
+        self.dropped = 0
+        self.sampled_out = 0
+        self.write_errors = 0
+
+    def _ensure_thread(self) -> None:
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="query-log", daemon=True)
+                    self._thread.start()
+
+    def should_record(self) -> bool:
+        if not self.enabled:
+            return False
+        if self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+            self.sampled_out += 1
+            return False
+        return True
+
+    def record(self, kind: str, entry: str, params: Dict[str, Any], started_at: float,
+               latency_ms: float, status: str, stages: Optional[Dict[str, float]] = None,
+               priority: Optional[str] = None) -> None:
+        """요청 1건을 기록합니다. (호출 전에 should_record()로 샘플링 여부를 확인)"""
+        record = {
+            "ts": round(started_at, 6),  # 도착 시각 (epoch 초) - 재생 시 도착 간격 계산에 사용
+            "kind": kind,                # route / mcp
+            "entry": entry,              # REST 경로 또는 "서버/도구명"
+            "params": anonymize(params) if QUERY_LOG_ANONYMIZE else params,
+            "status": status,
+            "latency_ms": round(latency_ms, 3),
+        }
+        if stages:
+            record["stages"] = {stage: round(ms, 3) for stage, ms in stages.items()}
+        if priority:
+            record["priority"] = priority
+
+        self._ensure_thread()
+        try:
+            self._queue.put_nowait(record)
+            self.recorded += 1
+        except queue.Full:
+            self.dropped += 1
+
+    def _rotate_if_needed(self) -> None:
+        try:
+            if self.max_bytes > 0 and os.path.getsize(self.path) >= self.max_bytes:
+                os.replace(self.path, self.path + ".1")
+        except FileNotFoundError:
+            pass
+
+    def _run(self) -> None:
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        while True:
+            record = self._queue.get()
+            if record is None:
+                return
+            # 밀린 기록을 한 번에 모아 씀
+            batch: List[Dict[str, Any]] = [record]
+            while len(batch) < 1000:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._write(batch)
+                    return
+                batch.append(item)
+            self._write(batch)
+
+    def _write(self, batch: List[Dict[str, Any]]) -> None:
+        try:
+            self._rotate_if_needed()
+            with open(self.path, "a", encoding="utf-8") as f:
+                for record in batch:
+                    f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            self.written += len(batch)
+        except Exception as e:
+            self.write_errors += 1
+            print(f"⚠️ [QUERY LOG] 기록 실패: {e}")
+
+    def close(self, timeout: float = 5.0) -> None:
+        """남은 기록을 모두 쓰고 스레드를 종료합니다. (앱 종료 시 호출)"""
+        thread = self._thread
+        if thread is None:
+            return
+        try:
+            self._queue.put(None, timeout=timeout)
+        except queue.Full:
+            pass
+        thread.join(timeout)
+        self._thread = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "path": self.path,
+            "sample_rate": self.sample_rate,
+            "anonymize": QUERY_LOG_ANONYMIZE,
+            "routes": QUERY_LOG_ROUTES,
+            "recorded": self.recorded,
+            "written": self.written,
+            "pending": self._queue.qsize(),
+            "dropped": self.dropped,
+            "sampled_out": self.sampled_out,
+            "write_errors": self.write_errors,
+        }
+
+
+class QueryLogMiddleware:
+    """
+    QUERY_LOG_ROUTES에 해당하는 REST 요청의 JSON 본문 / 도착 시각 / 상태 코드 / 지연 시간 / 단계별 소요 시간을 기록하는 ASGI 미들웨어입니다.
+    (단계별 소요 시간은 MetricsMiddleware가 수집한 값을 사용하므로 MetricsMiddleware 안쪽에 둡니다)
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.routes = set(QUERY_LOG_ROUTES)
+
+    async def __call__(self, scope, receive, send):
+        if (scope["type"] != "http" or scope.get("path") not in self.routes
+                or not query_log.should_record()):
+            return await self.app(scope, receive, send)
+
+        # 라우트가 본문을 읽을 때 함께 복사
+        chunks: List[bytes] = []
+        size = 0
+
+        async def receive_and_copy():
+            nonlocal size
+            message = await receive()
+            if message["type"] == "http.request":
+                body = message.get("body", b"")
+                size += len(body)
+                if size <= QUERY_LOG_MAX_BODY:
+                    chunks.append(body)
+            return message
+
+        status = 500
+
+        async def send_and_watch(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        started_at = time.time()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive_and_copy, send_and_watch)
+        finally:
+            latency_ms = (time.perf_counter() - started) * 1000
+            params: Dict[str, Any] = {}
+            if size <= QUERY_LOG_MAX_BODY and chunks:
+                try:
+                    params = json.loads(b"".join(chunks))
+                except ValueError:
+                    params = {}
+            priority = None
+            for name, value in scope.get("headers") or []:
+                if name == b"x-priority":
+                    priority = value.decode("latin-1")
+                    break
+            query_log.record("route", scope["path"], params, started_at, latency_ms, str(status),
+                             current_timings(), priority)
+
+
+@contextmanager
+def capture_tool(name: str, params: Dict[str, Any]):
+    """
+    MCP 도구 1회 호출의 메트릭(tool_call)을 기록하고, 쿼리 로그가 켜져 있으면 파라미터 / 도착 시각 / 지연 시간도 기록합니다.
+    """
+    if not query_log.should_record():
+        with tool_call(name):
+            yield
+        return
+
+    started_at = time.time()
+    started = time.perf_counter()
+    status = "error"
+    with collect_timings() as timings:
+        try:
+            with tool_call(name):
+                yield
+            status = "ok"
+        finally:
+            query_log.record("mcp", name, params, started_at, (time.perf_counter() - started) * 1000,
+                             status, timings)
+
+
+# 앱 전체에서 공유하는 쿼리 로그 기록기
+query_log = QueryLogWriter()
@@ -0,0 +1,196 @@
+# app/core/result_cache.py
+import os
+import time
+import json
+import asyncio
+import hashlib
+from collections import OrderedDict
+from contextvars import ContextVar
+from dotenv import load_dotenv
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from app.core.embedding_cache import normalize_query
+from app.core.deadline import DeadlineExceeded
+
+load_dotenv()
+
+# 검색 결과 캐시 사용 여부
+RESULT_CACHE_ENABLED = os.getenv("RESULT_CACHE_ENABLED", "true").lower() == "true"
+
+# 최대 보관 결과 수
+RESULT_CACHE_SIZE = int(os.getenv("RESULT_CACHE_SIZE", "1024"))
+
+# 결과 유효 시간(초). 데이터 버전이 바뀌면 TTL과 관계없이 무효화됩니다.
+RESULT_CACHE_TTL = float(os.getenv("RESULT_CACHE_TTL", "300"))
+
+# 계산 중인 결과가 부분 결과인지 기록하는 목록 (하위 태스크 / 스레드로 복사된 컨텍스트도 같은 리스트를 공유)
+_degraded: ContextVar[Optional[List[str]]] = ContextVar("result_degraded", default=None)
+
+
+def mark_degraded(reason: str) -> None:
+    """
+    지금 계산 중인 결과가 불완전함을 알립니다. (예: 데드라인 / 서킷 브레이커로 빠진 테이블, 실패한 상세 조회)
+    이렇게 표시된 결과는 호출한 요청에만 돌려주고 캐시에 저장하지 않습니다.
+    """
+    reasons = _degraded.get()
+    if reasons is not None:
+        reasons.append(reason)
+
+
+class ResultCache:
+    """
+    검색 결과 전체를 보관하는 LRU + TTL 캐시입니다.
+    - 키: 백엔드 + 정규화된 질문 + 검색 파라미터 + 백엔드 데이터 버전
+    - 데이터 적재(ingestion) 후 bump_version()을 호출하면 해당 백엔드의 캐시가 한 번에 무효화됩니다.
+    - 동일한 요청이 동시에 몰리면 백엔드 검색은 1번만 수행하고 나머지는 그 결과를 기다립니다. (Single-flight)
+    - 계산 중 mark_degraded()가 호출된 부분 결과와, 먼저 계산하던 요청의 데드라인 초과는 공유하지 않습니다.
+      (짧은 X-Request-Timeout을 보낸 요청 1건 때문에 다른 사용자가 잘못된 결과 / 504를 받지 않도록)
+
+    캐시된 결과는 여러 요청이 공유하므로 호출자는 결과를 수정하지 않아야 합니다.
+    """
+
+    def __init__(self, max_size: int = RESULT_CACHE_SIZE, ttl: float = RESULT_CACHE_TTL, enabled: bool = RESULT_CACHE_ENABLED):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.enabled = enabled
+        self._entries: "OrderedDict[str, Tuple[Any, float]]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._versions: Dict[str, int] = {}
+
+        # 모니터링용 카운터
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.invalidations = 0
+        self.degraded = 0
+
+    def version(self, backend: str) -> int:
+        return self._versions.get(backend, 0)
+
+    def bump_version(self, backend: Optional[str] = None) -> Dict[str, int]:
+        """
+        백엔드의 데이터 버전을 올려 기존 캐시를 무효화합니다. backend가 없으면 전체 무효화.
+        (이전 버전 키는 더 이상 조회되지 않고 LRU에 의해 자연스럽게 밀려납니다.)
+        """
+        if backend is None:
+            for name in list(self._versions):
+                self._versions[name] += 1
+            self._entries.clear()
+        else:
+            self._versions[backend] = self.version(backend) + 1
+        self.invalidations += 1
+        return dict(self._versions)
+
+    def make_key(self, backend: str, query_text: str, params: Dict[str, Any]) -> str:
+        raw = json.dumps(
+            {
+                "backend": backend,
+                "version": self.version(backend),
+                "query": normalize_query(query_text),
+                "params": params,
+            },
+            sort_keys=True, ensure_ascii=False, default=str
+        )
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _get(self, key: str) -> Tuple[bool, Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return False, None
+        value, created_at = entry
+        if self.ttl > 0 and time.time() - created_at > self.ttl:
+            del self._entries[key]
+            return False, None
+        self._entries.move_to_end(key)
+        return True, value
+
+    def _set(self, key: str, value: Any) -> None:
+        self._entries[key] = (value, time.time())
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    async def get_or_compute(self, backend: str, query_text: str, params: Dict[str, Any],
+                             compute: Callable[[], Awaitable[Any]]) -> Any:
+        """캐시에 결과가 있으면 바로 반환하고, 없으면 compute()를 1번만 실행하여 저장합니다."""
+        if not self.enabled:
+            return await compute()
+
+        key = self.make_key(backend, query_text, params)
+
+        found, value = self._get(key)
+        if found:
+            self.hits += 1
+            return value
+
+        # 같은 요청이 이미 진행 중이면 그 결과를 함께 기다림
+        future = self._inflight.get(key)
+        if future is not None:
+            self.coalesced += 1
+            try:
+                value, reasons = await asyncio.shield(future)
+            except asyncio.CancelledError:
+                # 먼저 계산하던 요청이 (데드라인 등으로) 취소된 경우, 이 요청이 직접 자기 데드라인으로 다시 계산
+                if future.cancelled() and not asyncio.current_task().cancelling():
+                    return await self.get_or_compute(backend, query_text, params, compute)
+                raise
+            if reasons:
+                # 먼저 계산하던 요청의 결과가 부분 결과면 이 요청의 남은 시간으로 다시 계산
+                return await self.get_or_compute(backend, query_text, params, compute)
+            return value
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        reasons: List[str] = []
+        token = _degraded.set(reasons)
+        try:
+            value = await compute()
+        except (asyncio.CancelledError, DeadlineExceeded):
+            # 데드라인 초과는 이 요청의 예산 문제이므로 공유하지 않음 - 기다리던 요청들은 취소를 보고 직접 다시 계산
+            future.cancel()
+            raise
+        except Exception as e:
+            # 실패한 결과는 캐시하지 않고, 기다리던 요청들에게 같은 에러를 전달
+            if not future.done():
+                future.set_exception(e)
+                # 기다리는 요청이 없을 때 "exception never retrieved" 경고 방지
+                future.exception()
+            raise
+        finally:
+            _degraded.reset(token)
+            self._inflight.pop(key, None)
+
+        if reasons:
+            # 부분 결과는 이 요청에만 반환 (캐시하지 않고, 이 결과를 포함하는 바깥 캐시 항목에도 전파)
+            self.degraded += 1
+            for reason in reasons:
+                mark_degraded(reason)
+        elif key == self.make_key(backend, query_text, params):
+            # 계산 도중 버전이 바뀌었다면(데이터 적재) 오래된 결과이므로 저장하지 않음
+            self._set(key, value)
+        future.set_result((value, reasons))
+        return value
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses + self.coalesced
+        return {
+            "enabled": self.enabled,
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "hit_rate": round((self.hits + self.coalesced) / total, 4) if total else 0.0,
+            "invalidations": self.invalidations,
+            "degraded": self.degraded,
+            "versions": dict(self._versions),
+        }
+
+
+# 앱 전체에서 공유하는 검색 결과 캐시 인스턴스
+result_cache = ResultCache()
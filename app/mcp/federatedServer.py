@@ -0,0 +1,29 @@
+from fastmcp import FastMCP
+from app.mcp.tools import get_federated_search_data
+from app.core.query_log import capture_tool
+
+# 1. MCP 서버 인스턴스 생성
+federated_mcp = FastMCP("federated Retriever Agent")
+
+@federated_mcp.tool(name="search_all_knowledge")
+async def search_all_knowledge(
+    query_text: str,
+    category: str = "",
+    file_name: str = ""
+) -> str:
+    """
+    복리후생규정(Supabase), 사내 업무 지원 정보(Weaviate), 사내 문서 그래프(Neo4j)를 한 번에 검색합니다.
+    어느 지식 베이스에 답이 있는지 확실하지 않을 때, 여러 검색 도구를 차례로 호출하는 대신 이 도구를 한 번만 사용하세요.
+    
+    Args:
+        query_text (str): 사용자의 질문에서 추출한 핵심 검색 키워드 또는 문장. (예: '야근 식대 한도', '학자금 지급대상')
+        category (str, optional): Graph DB 검색을 제한할 카테고리 영문명. 불확실하면 비워두세요. (예: 'Welfare_Doc', 'Receipt')
+        file_name (str, optional): Graph DB 검색을 특정 문서로 제한할 때 파일명을 입력하세요.
+    """
+    
+    with capture_tool("federated/search_all_knowledge", {"query_text": query_text, "category": category, "file_name": file_name}):
+        return await get_federated_search_data(
+            query_text=query_text,
+            category=category,
+            file_name=file_name
+        )
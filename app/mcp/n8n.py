@@ -1,5 +1,8 @@
 from fastmcp import FastMCP
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
+from app.service.asset_catalog import asset_catalog
+from app.service.asset_search import asset_search
+from app.service.workflow_templates import workflow_templates, deploy_composed_workflow
 from app.service.n8n_manager import (
     get_components_catalog,
     get_file_contents,
@@ -16,19 +19,46 @@ async def list_n8n_assets() -> List[Dict[str, Any]]:
     n8n 워크플로우 구축에 사용할 수 있는 모든 자산(Skeleton, Component) 목록을 가져옵니다.
     에이전트가 어떤 재료(노드 묶음, 뼈대)가 있는지 확인하고 계획을 세울 때 가장 먼저 호출하세요.
     """
+    await asset_catalog.arefresh_if_stale()
     return get_components_catalog()
 
+@n8n_mcp.tool(name="search_n8n_assets")
+async def search_n8n_assets(goal: str, top_k: int = 5) -> List[Dict[str, Any]]:
+    """
+    만들려는 워크플로우의 목표(자연어)와 관련 높은 자산(Skeleton, Component)을 점수 순으로 top_k개 찾습니다.
+    자산 설명, Sticky Note 내용, 노드 타입, 노드 이름을 기준으로 검색하며, 전체 목록(list_n8n_assets) 대신 먼저 사용하세요.
+    각 결과에는 자산 ID / 설명 / 크기(bytes, stripped_bytes) / 포함된 노드 타입이 들어 있습니다.
+    
+    Args:
+        goal (str): 만들려는 워크플로우의 목표 (예: '업로드한 PDF를 Neo4j에 저장하고 질문에 답하기')
+        top_k (int, optional): 반환할 자산 수 (기본 5)
+    """
+    return await asset_search.asearch(goal, top_k)
+
 @n8n_mcp.tool(name="read_n8n_asset_contents")
-async def read_n8n_asset_contents(target_ids: List[str]) -> List[Dict[str, Any]]:
+async def read_n8n_asset_contents(
+    target_ids: List[str],
+    node_names: Optional[List[str]] = None,
+    node_types: Optional[List[str]] = None,
+    connections_only: bool = False,
+    strip_metadata: bool = False
+) -> List[Dict[str, Any]]:
     """
     선택한 자산 ID들의 실제 내용(JSON/JS)을 읽어옵니다.
     조립할 노드의 세부 설정이나 연결 구조를 파악할 때 사용하세요.
     반환된 'content' 문자열은 유효한 JSON 포맷이며, 이를 파싱하여 워크플로우 조립에 사용하세요.
+    각 결과의 'bytes'는 반환된 내용의 크기, 'full_bytes'는 전체 자산의 크기입니다.
+    list_n8n_assets의 bytes / stripped_bytes를 보고 큰 자산은 필요한 부분만 요청하세요.
     
     Args:
         target_ids (List[str]): 읽어올 자산의 ID 리스트 (예: ['SKELETON_UPLOAD', 'COMPONENT_GMAIL'])
+        node_names (List[str], optional): 이 이름의 노드만 반환 (connections도 해당 노드 사이의 연결만 유지)
+        node_types (List[str], optional): 이 타입의 노드만 반환 (예: ['n8n-nodes-base.gmail'] 또는 ['gmail'])
+        connections_only (bool, optional): 노드 없이 connections(연결 구조)만 반환
+        strip_metadata (bool, optional): Sticky Note, pinData, meta를 제거하여 반환 (노드 position은 배포에 필요하므로 유지)
     """
-    return get_file_contents(target_ids)
+    await asset_catalog.arefresh_if_stale()
+    return get_file_contents(target_ids, node_names, node_types, connections_only, strip_metadata)
 
 @n8n_mcp.tool(name="deploy_workflow_to_n8n")
 async def deploy_workflow_to_n8n(workflow_json: Dict[str, Any], name: str = "AI Generated Workflow") -> Dict[str, Any]:
@@ -39,7 +69,7 @@ async def deploy_workflow_to_n8n(workflow_json: Dict[str, Any], name: str = "AI
         workflow_data (Dict[str, Any]): nodes와 connections 필드를 반드시 포함해야 합니다.
         name (str, optional): 생성할 워크플로우의 제목입니다. 지정하지 않으면 내용을 판단하여 자동으로 생성됩니다.
     """
-    result = upload_workflow_to_n8n(workflow_json, name)
+    result = await upload_workflow_to_n8n(workflow_json, name)
     
     if result:
         return {
@@ -49,16 +79,56 @@ async def deploy_workflow_to_n8n(workflow_json: Dict[str, Any], name: str = "AI
         }
     return {"status": "error", "workflow_id": None, "message": "업로드에 실패했습니다. API 키나 URL 설정을 확인하세요."}
 
+@n8n_mcp.tool(name="describe_n8n_templates")
+async def describe_n8n_templates(template_ids: List[str]) -> List[Dict[str, Any]]:
+    """
+    워크플로우 자산을 조립용 템플릿으로 요약합니다. (전체 JSON 대신 노드 이름 / 타입 / 수정 가능한 파라미터 키,
+    시작 / 끝 / 트리거 노드, 선언된 파라미터, 필요한 자격 증명만 반환)
+    compose_n8n_workflow에 넘길 params / node_parameters / links를 정할 때 사용하세요.
+    
+    Args:
+        template_ids (List[str]): 자산 ID 리스트 (예: ['SKELETON_SEND_MAIL', 'COMPONENT_SEND_KAKAO_MESSAGE'])
+    """
+    await asset_catalog.arefresh_if_stale()
+    return workflow_templates.describe(template_ids)
+
+@n8n_mcp.tool(name="compose_n8n_workflow")
+async def compose_n8n_workflow(
+    steps: List[Dict[str, Any]],
+    links: Optional[List[Dict[str, Any]]] = None,
+    name: str = "AI Generated Workflow",
+    deploy: bool = True,
+    return_workflow: bool = False
+) -> Dict[str, Any]:
+    """
+    템플릿 ID와 파라미터 값만으로 서버에서 워크플로우를 조립 / 검증하고 n8n에 업로드합니다.
+    전체 JSON을 읽고 수정하여 deploy_workflow_to_n8n으로 다시 보내는 대신 이 도구를 사용하세요.
+    
+    Args:
+        steps (List[Dict]): 조립 순서대로의 템플릿 목록.
+            예: [{"template_id": "SKELETON_SEND_MAIL", "node_parameters": {"Webhook": {"path": "mail"}}},
+                 {"template_id": "COMPONENT_SEND_KAKAO_MESSAGE", "params": {...}}]
+            - params: 템플릿에 선언된 파라미터 값 (describe_n8n_templates의 parameters)
+            - node_parameters: {노드 이름: {파라미터: 값}} 형태로 노드 parameters에 덮어쓸 값
+        links (List[Dict], optional): 단계 사이 연결. 예: [{"from_step": 0, "from_node": "AI Agent", "to_step": 1}]
+            from_node / to_node를 비우면 해당 단계의 끝 / 시작 노드를 사용합니다. 비우면 단계 순서대로 자동 연결합니다.
+        name (str, optional): 생성할 워크플로우 제목
+        deploy (bool, optional): False면 업로드하지 않고 조립 / 검증 결과만 반환
+        return_workflow (bool, optional): 조립된 워크플로우 JSON을 함께 반환 (필요할 때만 사용)
+    """
+    return await deploy_composed_workflow(steps, links, name, deploy, return_workflow)
+
 @n8n_mcp.tool(name="check_n8n_node_schema")
-async def check_n8n_node_schema(node_type_name: str) -> Dict[str, Any]:
+async def check_n8n_node_schema(node_type_name: str, node_version: Optional[float] = None) -> Dict[str, Any]:
     """
     특정 n8n 노드의 상세 파라미터 규격(Schema)을 조회합니다.
     노드 설정값(parameters)이 정확한지 확인이 필요할 때 사용하세요.
     
     Args:
         node_type_name (str): n8n 노드 타입 이름 (예: 'n8n-nodes-base.httpRequest')
+        node_version (float, optional): 노드의 typeVersion (예: 4.2). 비우면 기본(최신) 버전의 규격을 반환합니다.
     """
-    return get_node_info(node_type_name)
+    return await get_node_info(node_type_name, node_version)
 
 @n8n_mcp.tool(name="get_n8n_execution_status")
 async def get_n8n_execution_status(execution_id: str) -> Dict[str, Any]:
@@ -69,6 +139,4 @@ async def get_n8n_execution_status(execution_id: str) -> Dict[str, Any]:
     Args:
         execution_id (str): 확인하려는 실행 ID (예: '12345')
     """
-    # 서비스 함수가 동기(requests) 방식이므로 툴도 동기 방식으로 정의하여 
-    # FastMCP의 스레드 풀에서 안전하게 실행되도록 합니다.
     return await get_execution_logs(execution_id)
\ No newline at end of file
@@ -2,6 +2,7 @@
 from fastmcp import FastMCP
 from typing import Optional
 from app.mcp.tools import get_search_data
+from app.core.query_log import capture_tool
 
 neo4j_mcp = FastMCP("neo4j Retriever Agent")
 
@@ -21,8 +22,9 @@ async def search_company_knowledge(
         file_name (str, optional): 이전 대화에서 언급된 특정 문서 내에서만 검색을 제한할 때 파일명을 입력하세요. (예: 'AI_바우처_신청가이드.pdf')
     """
     
-    return await get_search_data(
-        query_text=query_text, 
-        category=category, 
-        file_name=file_name
-    )
\ No newline at end of file
+    with capture_tool("neo4j/search_company_knowledge", {"query_text": query_text, "category": category, "file_name": file_name}):
+        return await get_search_data(
+            query_text=query_text, 
+            category=category, 
+            file_name=file_name
+        )
\ No newline at end of file
@@ -1,5 +1,6 @@
 from fastmcp import FastMCP
-from app.mcp.tools import query_knowledge_base
+from app.mcp.tools import query_knowledge_base as search_knowledge_base
+from app.core.query_log import capture_tool
 
 # 1. MCP 서버 인스턴스 생성
 supabase_mcp = FastMCP("supabase Retriever Agent")
@@ -13,4 +14,6 @@ async def query_knowledge_base(query: str) -> str:
     Args:
         query: 검색할 키워드나 질문 문장 (예: "학자금 지급대상이 누구야?")
     """
-    return await query_knowledge_base(query, db_type="supabase")
\ No newline at end of file
+    # 도구 함수 이름과 겹치지 않도록 별칭으로 호출
+    with capture_tool("supabase/query_knowledge_base", {"query": query}):
+        return await search_knowledge_base(query, db_type="supabase")
\ No newline at end of file
@@ -2,7 +2,19 @@
 from typing import Optional
 from app.schemas import SearchQuery
 from app.schemas import Neo4jSearchQuery
-from app.service.retriever import search_logic, search_target_table, fetch_data_by_ids, embedding_query, search_neo4j_graph
+from app.schemas import FederatedSearchQuery
+from app.service.retriever import search_logic, search_table_details, search_neo4j_by_text
+from app.service.federated import federated_search
+from app.core.deadline import run_with_deadline, MCP_DEADLINE
+from app.core.metrics import observe_payload, text_size
+
+# 통합 검색 백엔드 상태별로 Agent에게 전달할 제외 사유
+FEDERATED_STATUS_REASONS = {
+    "timeout": "시간 내에 응답하지 않음",
+    "circuit_open": "반복된 장애로 일시 차단됨",
+    "overloaded": "요청이 몰려 처리하지 못함",
+    "error": "검색 중 오류 발생",
+}
 
 async def query_knowledge_base(query: str, db_type: str = "supabase") -> str:
     """
@@ -15,7 +27,7 @@ async def query_knowledge_base(query: str, db_type: str = "supabase") -> str:
         match_count=10 
     )
     
-    results = await search_logic(params, db_type)
+    results = await run_with_deadline(search_logic(params, db_type), MCP_DEADLINE)
     
     print(f"✅ [SEARCH DONE] Found: {len(results)} results from {db_type}")
 
@@ -34,16 +46,16 @@ async def get_search_data(query_text: str) -> str:
     )
     
     # 2. 질문과 유사한 데이터를 테이블별로 1차 검색
-    raw_candidates = await search_target_table(params)
+    table_search = await run_with_deadline(search_table_details(params), MCP_DEADLINE)
+    raw_candidates = table_search["candidates"]
     
     # 결과가 아예 없거나, 1등 후보의 유사도가 match_threshold 이하인 경우 필터링
     if not raw_candidates or raw_candidates[0].get('similarity', 0) < params.match_threshold:
         print(f"⚠️ 유사도 미달 또는 결과 없음 (최고 점수: {raw_candidates[0]['similarity'] if raw_candidates else 0:.4f})")
         return "관련된 사내 데이터를 찾을 수 없습니다."
     
-    # 3. 각 문서의 ID를 추출하여 fetch_data_by_ids 함수에 전달
-    ids = [doc['id'] for doc in raw_candidates]
-    detailed_results = await fetch_data_by_ids(raw_candidates[0]['collection'], ids)
+    # 3. 1등 테이블에서 ID로 조회한 상세/관계도 데이터 (fetch_data_by_ids 결과)
+    detailed_results = table_search["details"]
 
     # 4. LLM(Agent)이 읽고 요약하기 가장 좋은 형태로 문자열(String) 포장
     formatted_output = "다음은 사내 데이터베이스 검색 결과 및 연관 데이터입니다. 이를 바탕으로 답변하세요.\n\n"
@@ -69,6 +81,7 @@ async def get_search_data(query_text: str) -> str:
         # 구분선 추가로 AI가 문맥을 헷갈리지 않게 처리
         formatted_output += "-" * 40 + "\n\n"
 
+    observe_payload("formatted_output", text_size(formatted_output))
     return formatted_output
 
 
@@ -87,15 +100,12 @@ async def get_search_data(query_text: str, category: Optional[str] = None, file_
         match_count=5 
     )
     
-    # 2. 컴포넌트 재사용: 질문 임베딩 (객체 전달)
+    # 2~3. 질문 임베딩 + Neo4j 검색 로직 호출 (동일 질문은 캐시에서 반환)
     try:
-        query_vector = embedding_query(params)
+        raw_candidates = await run_with_deadline(search_neo4j_by_text(params), MCP_DEADLINE)
     except Exception as e:
-        print(f"[EMBEDDING ERROR] {e}")
-        return "오류: 검색어 임베딩 처리 중 문제가 발생했습니다."
-
-    # 3. Neo4j 검색 로직 호출 (객체 + 벡터 전달)
-    raw_candidates = await search_neo4j_graph(params=params, vector=query_vector)
+        print(f"[NEO4J SEARCH ERROR] {e}")
+        return "오류: 검색어 임베딩 또는 그래프 검색 처리 중 문제가 발생했습니다."
     
     # 4. 결과 검증 및 필터링
     # 결과가 아예 없거나, 1등 후보의 유사도가 match_threshold 이하인 경우 컷팅
@@ -144,4 +154,59 @@ async def get_search_data(query_text: str, category: Optional[str] = None, file_
         formatted_output += "\n"
         
     print(f"✅ [SEARCH DONE] Found: {len(raw_candidates)} results.")
-    return formatted_output
\ No newline at end of file
+    observe_payload("formatted_output", text_size(formatted_output))
+    return formatted_output
+
+
+async def get_federated_search_data(query_text: str, category: Optional[str] = None, file_name: Optional[str] = None) -> str:
+    """
+    Supabase / Weaviate / Neo4j 통합 검색 결과를 Agent가 읽기 좋은 문자열로 반환합니다.
+    """
+    print(f"🔍 [FEDERATED SEARCH START] Query: '{query_text}', Category: '{category}', File: '{file_name}'")
+
+    params = FederatedSearchQuery(
+        query_text=query_text,
+        category=category or None,
+        file_name=file_name or None,
+        return_count=8
+    )
+
+    try:
+        search = await run_with_deadline(federated_search(params), MCP_DEADLINE)
+    except Exception as e:
+        print(f"[FEDERATED SEARCH ERROR] {e}")
+        return "오류: 검색어 임베딩 또는 통합 검색 처리 중 문제가 발생했습니다."
+
+    results = search["results"]
+    if not results:
+        return "관련된 사내 데이터를 찾을 수 없습니다."
+
+    formatted_output = "다음은 사내 데이터베이스 통합 검색 결과입니다. 이를 바탕으로 답변하세요.\n\n"
+
+    # 결과에서 빠진 백엔드가 있으면 Agent가 알 수 있도록 실제 사유와 함께 명시
+    missing = [
+        f"{name}({FEDERATED_STATUS_REASONS.get(state['status'], state['status'])})"
+        for name, state in search["backends"].items() if state["status"] != "ok"
+    ]
+    if missing:
+        formatted_output += f"(참고: 다음 백엔드는 결과에서 제외되었습니다: {', '.join(missing)})\n\n"
+
+    for idx, doc in enumerate(results, 1):
+        source = doc.get('source') or '알 수 없음'
+        backends = ", ".join(doc.get('backends', []))
+
+        formatted_output += f"### 후보 {idx} (검색 경로: {backends} / 출처: {source})\n"
+        formatted_output += f"[본문 내용]\n{doc.get('content', '')}\n"
+
+        # Neo4j 결과의 연관 문서 내용
+        for doc_chunks in doc.get('supplementalContext') or []:
+            chunks = doc_chunks if isinstance(doc_chunks, list) else [doc_chunks]
+            for chunk in chunks:
+                if isinstance(chunk, dict) and chunk.get('text'):
+                    formatted_output += f"  * [연관 문서: {chunk.get('source', '알 수 없음')}] {chunk['text']}\n"
+
+        formatted_output += "-" * 40 + "\n\n"
+
+    print(f"✅ [FEDERATED SEARCH DONE] Found: {len(results)} results ({search['elapsed_ms']}ms)")
+    observe_payload("formatted_output", text_size(formatted_output))
+    return formatted_output
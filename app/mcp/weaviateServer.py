@@ -1,5 +1,6 @@
 from fastmcp import FastMCP
 from app.mcp.tools import get_search_data
+from app.core.query_log import capture_tool
 
 # 1. MCP 서버 인스턴스 생성
 weaviate_mcp = FastMCP("weaviate Retriever Agent")
@@ -16,6 +17,7 @@ async def search_company_knowledge(query_text: str) -> str:
         (예: '야근 식대 한도', '2026년 신년사', '경조사 지원금')
     """
     
-    return await get_search_data(query_text)
+    with capture_tool("weaviate/search_company_knowledge", {"query_text": query_text}):
+        return await get_search_data(query_text)
 
 
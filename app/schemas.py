@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 
 # 1. 기존 DB (Weaviate / Supabase) 전용 스키마
 class SearchQuery(BaseModel):
@@ -15,4 +15,14 @@ class Neo4jSearchQuery(BaseModel):
     match_threshold: float = 0.8
     match_count: int = 5
     category: Optional[str] = None
-    file_name: Optional[str] = None
\ No newline at end of file
+    file_name: Optional[str] = None
+    
+# 3. 통합 검색 (Supabase + Weaviate + Neo4j) 전용 스키마
+class FederatedSearchQuery(BaseModel):
+    query_text: str
+    backends: Optional[List[str]] = None  # 비우면 FEDERATED_BACKENDS 설정값 사용 (supabase, weaviate, neo4j)
+    return_count: int = 10
+    deadline: Optional[float] = None  # 백엔드 응답 대기 시간(초). 비우면 FEDERATED_DEADLINE 사용
+    filter: Optional[Dict[str, Any]] = {}  # Supabase 메타데이터 필터
+    category: Optional[str] = None  # Neo4j 카테고리 필터
+    file_name: Optional[str] = None  # Neo4j 파일명 필터
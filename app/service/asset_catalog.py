@@ -0,0 +1,456 @@
+# app/service/asset_catalog.py
+import os
+import json
+import time
+import asyncio
+import threading
+
+from dataclasses import dataclass, field
+from dotenv import load_dotenv
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+load_dotenv()
+
+# 자산(뼈대 / 살점) 경로 설정
+RESOURCES_PATH = os.path.join(os.getcwd(), "resources")
+
+BASE_DIRS = {
+    "SKELETON": os.path.join(RESOURCES_PATH, "skeletons"),
+    "COMPONENT": os.path.join(RESOURCES_PATH, "components")
+}
+
+ASSET_EXTENSIONS = (".txt", ".js", ".json")
+
+# 파일 변경 감지 방식 (watch: inotify 등 OS 알림(watchfiles) / poll: 주기적 stat 비교 / off: 백그라운드 감지 없음)
+ASSET_WATCH_MODE = os.getenv("ASSET_WATCH_MODE", "watch").lower()
+
+# poll 방식의 확인 주기(초)
+ASSET_POLL_INTERVAL = float(os.getenv("ASSET_POLL_INTERVAL", "5"))
+
+# 백그라운드 감지가 없을 때(앱 수명주기 밖 / off) 조회 시 변경 여부를 확인하는 최소 간격(초)
+ASSET_STAT_INTERVAL = float(os.getenv("ASSET_STAT_INTERVAL", "2"))
+
+STICKY_NOTE_TYPE = "n8n-nodes-base.stickyNote"
+
+# strip_metadata 시 제거하는 워크플로우 필드 (실행에 필요 없는 테스트 데이터 / 편집기 정보)
+# 노드 position은 n8n 워크플로우 생성 API의 필수 필드이므로 남김 (제거하면 다시 배포할 때 400)
+STRIPPED_WORKFLOW_FIELDS = ("pinData", "meta")
+
+# 자산 1개당 보관하는 부분 추출(projection) 결과 수
+PROJECTION_CACHE_SIZE = 32
+
+
+def minify(data: Any) -> str:
+    """공백 없는 JSON 문자열 (LLM에 전달할 토큰 수를 줄임)"""
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+
+
+def byte_size(text: str) -> int:
+    return len(text.encode("utf-8"))
+
+
+def _type_matches(node_type: str, wanted: List[str]) -> bool:
+    # 'n8n-nodes-base.gmail' 전체 또는 '.' 뒤 이름('gmail')으로 비교 (대소문자 무시)
+    node_type = node_type.lower()
+    short = node_type.rsplit(".", 1)[-1]
+    return any(item == node_type or item == short for item in wanted)
+
+
+def project_workflow(data: Dict[str, Any], node_names: Optional[List[str]] = None,
+                     node_types: Optional[List[str]] = None, connections_only: bool = False,
+                     strip_metadata: bool = False) -> Dict[str, Any]:
+    """
+    워크플로우 JSON에서 필요한 부분만 뽑아냅니다. (원본은 변경하지 않음)
+    - node_names / node_types: 해당 노드만 남기고, connections도 남은 노드 사이의 연결만 유지
+    - connections_only: connections만 반환
+    - strip_metadata: Sticky Note 노드, pinData, meta 제거 (결과는 그대로 다시 배포 가능)
+    """
+    nodes = data.get("nodes", [])
+    connections = data.get("connections", {})
+
+    if node_names or node_types:
+        names = set(node_names or [])
+        types = [item.lower() for item in node_types or []]
+        nodes = [
+            node for node in nodes
+            if node.get("name") in names or (types and _type_matches(node.get("type", ""), types))
+        ]
+    if strip_metadata:
+        nodes = [node for node in nodes if node.get("type") != STICKY_NOTE_TYPE]
+
+    if node_names or node_types:
+        kept = {node.get("name") for node in nodes}
+        filtered = {}
+        for source, outputs in connections.items():
+            if source not in kept:
+                continue
+            # {"main": [[{"node": "...", ...}], ...]} 구조에서 남은 노드로 가는 연결만 유지 (출력 인덱스는 보존)
+            kept_outputs = {
+                kind: [[link for link in branch or [] if link.get("node") in kept] for branch in branches or []]
+                for kind, branches in outputs.items()
+            }
+            if any(link for branches in kept_outputs.values() for branch in branches for link in branch):
+                filtered[source] = kept_outputs
+        connections = filtered
+
+    if connections_only:
+        return {"connections": connections}
+
+    if strip_metadata:
+        result = {key: value for key, value in data.items() if key not in STRIPPED_WORKFLOW_FIELDS}
+    else:
+        result = dict(data)
+    result["nodes"] = nodes
+    result["connections"] = connections
+    return result
+
+
+@dataclass
+class AssetEntry:
+    id: str
+    type: str
+    name: str
+    path: str
+    mtime_ns: int
+    size: int
+    description: str
+    content: str                   # 에이전트에게 전달할 내용 (JSON은 공백 없이 재직렬화)
+    data: Optional[Any] = None     # JSON 파싱 결과 (JS / TXT이거나 파싱 실패면 None)
+    content_bytes: int = 0         # content의 UTF-8 크기
+    stripped_bytes: Optional[int] = None   # strip_metadata 적용 시 크기 (워크플로우 JSON만)
+    node_count: Optional[int] = None
+    projections: Dict[Tuple, str] = field(default_factory=dict)   # 부분 추출 결과 캐시 (파일이 바뀌면 항목째 교체됨)
+
+    @property
+    def is_workflow(self) -> bool:
+        return isinstance(self.data, dict) and isinstance(self.data.get("nodes"), list)
+
+    def project(self, node_names: Optional[List[str]] = None, node_types: Optional[List[str]] = None,
+                connections_only: bool = False, strip_metadata: bool = False) -> str:
+        """부분 추출 결과(공백 없는 JSON)를 반환합니다. 같은 조건은 캐시된 문자열을 그대로 사용합니다."""
+        if not self.is_workflow or not (node_names or node_types or connections_only or strip_metadata):
+            return self.content
+        key = (tuple(sorted(node_names or [])), tuple(sorted(node_types or [])), connections_only, strip_metadata)
+        text = self.projections.get(key)
+        if text is None:
+            text = minify(project_workflow(self.data, node_names, node_types, connections_only, strip_metadata))
+            if len(self.projections) >= PROJECTION_CACHE_SIZE:
+                self.projections.clear()
+            self.projections[key] = text
+        return text
+
+
+def asset_id_for(prefix: str, filename: str) -> str:
+    """파일명 기반 ID 생성 (예: SKELETON_ + UPLOAD)"""
+    return f"{prefix}_{os.path.splitext(filename)[0].upper()}"
+
+
+def describe_asset(file_path: str, data: Any = None, text: str = "") -> str:
+    """
+    JSON 자산은 'description' 필드 또는 첫 번째 Sticky Note 내용, JS / TXT 자산은 첫 줄의 '// Description:' 주석을
+    설명으로 사용합니다. 찾지 못하면 파일명(확장자 제외)을 반환합니다.
+    """
+    if isinstance(data, dict):
+        # 가짜 필드로 넣어둔 description이 있다면 최우선 반환
+        if "description" in data:
+            return data["description"]
+
+        # n8n 노드 중 첫 번째 Sticky Note의 내용을 설명으로 활용 (마크다운 기호 제거 후 첫 줄만)
+        for node in data.get("nodes", []):
+            if node.get("type") == STICKY_NOTE_TYPE:
+                content = node.get("parameters", {}).get("content", "")
+                return content.replace("#", "").strip().split('\n')[0]
+    elif not file_path.endswith(".json"):
+        first_line = text.split("\n", 1)[0].strip()
+        if first_line.startswith("// Description:"):
+            return first_line.replace("// Description:", "").strip()
+
+    return os.path.splitext(os.path.basename(file_path))[0]
+
+
+def parse_asset(path: str) -> Tuple[str, Optional[Any]]:
+    """자산 파일을 1번 읽어 (에이전트에게 줄 내용, JSON 파싱 결과)를 반환합니다."""
+    with open(path, "r", encoding="utf-8") as f:
+        text = f.read()
+    if path.endswith(".json"):
+        try:
+            data = json.loads(text)
+            return minify(data), data
+        except json.JSONDecodeError:
+            pass
+    return text, None
+
+
+class AssetCatalog:
+    """
+    resources/skeletons, resources/components의 자산을 한 번만 읽어 메모리에 보관하는 카탈로그입니다.
+    - 파일마다 (mtime, size)를 기억하여 바뀐 파일만 다시 읽고 파싱 (수천 개 자산도 변경분만 처리)
+    - 변경 감지: watchfiles(inotify) 알림 또는 주기적 stat 비교. 평상시 조회(list / read)는 디스크를 읽지 않음
+    """
+
+    def __init__(self, base_dirs: Dict[str, str] = BASE_DIRS, watch_mode: str = ASSET_WATCH_MODE):
+        self.base_dirs = {prefix: os.path.abspath(directory) for prefix, directory in base_dirs.items()}
+        self.watch_mode = watch_mode
+
+        self._entries: Dict[str, AssetEntry] = {}   # 파일 경로 -> 자산
+        self._ids: Dict[str, AssetEntry] = {}       # 자산 ID -> 자산
+        self._catalog: List[Dict[str, Any]] = []    # list_n8n_assets 응답 (변경 시에만 다시 만듦)
+        self._lock = threading.Lock()
+
+        self.scanned_at: Optional[float] = None
+        self.version = 0                            # 카탈로그가 바뀔 때마다 증가 (파생 캐시 무효화용)
+        self._watch_task: Optional[asyncio.Task] = None
+        self.watching = False
+
+        # 모니터링용 카운터
+        self.scans = 0
+        self.parsed = 0
+        self.parse_errors = 0
+
+    # ------------------------------------------------------------------
+    # 디스크 → 메모리 반영
+    # ------------------------------------------------------------------
+    def _prefix_for(self, path: str) -> Optional[str]:
+        directory = os.path.dirname(path)
+        for prefix, base_dir in self.base_dirs.items():
+            if base_dir == directory:
+                return prefix
+        return None
+
+    def _load_entry(self, prefix: str, path: str, stat: os.stat_result) -> Optional[AssetEntry]:
+        filename = os.path.basename(path)
+        try:
+            content, data = parse_asset(path)
+        except Exception as e:
+            self.parse_errors += 1
+            print(f"⚠️ [ASSETS] 자산 읽기 실패 ({filename}): {e}")
+            return None
+        self.parsed += 1
+        entry = AssetEntry(
+            id=asset_id_for(prefix, filename),
+            # ID의 시작 단어에 따라 type을 분류 (SKELETON 또는 COMPONENT)
+            type="Skeleton (Core)" if prefix == "SKELETON" else "Component (Tool)",
+            name=filename,
+            path=path,
+            mtime_ns=stat.st_mtime_ns,
+            size=stat.st_size,
+            description=describe_asset(path, data, content),
+            content=content,
+            data=data,
+            content_bytes=byte_size(content),
+        )
+        if entry.is_workflow:
+            entry.node_count = len(data["nodes"])
+            entry.stripped_bytes = byte_size(entry.project(strip_metadata=True))
+        return entry
+
+    def _apply(self, path: str) -> bool:
+        """경로 1개의 현재 상태를 반영합니다. 바뀐 것이 있으면 True (잠금을 잡은 상태에서 호출)"""
+        prefix = self._prefix_for(path)
+        current = self._entries.get(path)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            stat = None
+
+        if prefix is None or stat is None or not path.endswith(ASSET_EXTENSIONS):
+            if current is None:
+                return False
+            del self._entries[path]
+            return True
+
+        if current is not None and current.mtime_ns == stat.st_mtime_ns and current.size == stat.st_size:
+            return False
+        entry = self._load_entry(prefix, path, stat)
+        if entry is None:
+            # 읽기에 실패하면 이전 내용을 유지 (저장 도중인 파일 등)
+            return False
+        self._entries[path] = entry
+        return True
+
+    def _rebuild(self) -> None:
+        entries = sorted(self._entries.values(), key=lambda entry: entry.id)
+        self._ids = {entry.id: entry for entry in entries}
+        self._catalog = [self._catalog_item(entry) for entry in entries]
+        self.version += 1
+
+    @staticmethod
+    def _catalog_item(entry: AssetEntry) -> Dict[str, Any]:
+        item = {"id": entry.id, "type": entry.type, "name": entry.name, "description": entry.description,
+                "bytes": entry.content_bytes}
+        if entry.is_workflow:
+            # 에이전트가 전체를 읽을지, 필요한 부분만 읽을지 판단할 수 있도록 크기를 함께 제공
+            item["nodes"] = entry.node_count
+            item["stripped_bytes"] = entry.stripped_bytes
+        return item
+
+    def scan(self) -> int:
+        """자산 디렉터리를 stat으로 훑어 추가 / 변경 / 삭제된 파일만 반영합니다. 바뀐 파일 수를 반환합니다."""
+        with self._lock:
+            seen = set()
+            changed = 0
+            for prefix, directory in self.base_dirs.items():
+                if not os.path.exists(directory):
+                    os.makedirs(directory, exist_ok=True)
+                    continue
+                with os.scandir(directory) as it:
+                    for item in it:
+                        if not item.name.endswith(ASSET_EXTENSIONS) or not item.is_file():
+                            continue
+                        seen.add(item.path)
+                        current = self._entries.get(item.path)
+                        stat = item.stat()
+                        if current is not None and current.mtime_ns == stat.st_mtime_ns and current.size == stat.st_size:
+                            continue
+                        entry = self._load_entry(prefix, item.path, stat)
+                        if entry is not None:
+                            self._entries[item.path] = entry
+                            changed += 1
+            for path in [path for path in self._entries if path not in seen]:
+                del self._entries[path]
+                changed += 1
+
+            if changed or self.scanned_at is None:
+                self._rebuild()
+            self.scanned_at = time.time()
+            self.scans += 1
+        if changed:
+            print(f"✅ [ASSETS] 자산 카탈로그 갱신: {changed}개 변경 / 전체 {len(self._ids)}개")
+        return changed
+
+    def update_paths(self, paths: Iterable[str]) -> int:
+        """변경 알림을 받은 경로들만 반영합니다."""
+        with self._lock:
+            changed = sum(1 for path in {os.path.abspath(path) for path in paths} if self._apply(path))
+            if changed:
+                self._rebuild()
+        if changed:
+            print(f"✅ [ASSETS] 자산 카탈로그 갱신: {changed}개 변경 / 전체 {len(self._ids)}개")
+        return changed
+
+    def _is_stale(self) -> bool:
+        if self.scanned_at is None:
+            return True
+        return not self.watching and time.time() - self.scanned_at >= ASSET_STAT_INTERVAL
+
+    def refresh_if_stale(self) -> None:
+        """아직 읽지 않았거나, 백그라운드 감지 없이 일정 시간이 지났으면 변경분을 반영합니다."""
+        if self._is_stale():
+            self.scan()
+
+    async def arefresh_if_stale(self) -> None:
+        """refresh_if_stale의 비동기 버전 (파일 I/O를 스레드에서 실행)"""
+        if self._is_stale():
+            await asyncio.to_thread(self.scan)
+
+    # ------------------------------------------------------------------
+    # 조회 (메모리만 사용)
+    # ------------------------------------------------------------------
+    def catalog(self) -> List[Dict[str, Any]]:
+        return list(self._catalog)
+
+    def get(self, asset_id: str) -> Optional[AssetEntry]:
+        return self._ids.get(asset_id)
+
+    def entries(self) -> List[AssetEntry]:
+        """자산 ID 순으로 정렬된 자산 목록"""
+        return list(self._ids.values())
+
+    def catalog_item(self, asset_id: str) -> Optional[Dict[str, Any]]:
+        entry = self._ids.get(asset_id)
+        return self._catalog_item(entry) if entry is not None else None
+
+    def asset_map(self) -> Dict[str, str]:
+        """자산 ID -> 파일 경로"""
+        return {asset_id: entry.path for asset_id, entry in self._ids.items()}
+
+    def contents(self, target_ids: List[str], node_names: Optional[List[str]] = None,
+                 node_types: Optional[List[str]] = None, connections_only: bool = False,
+                 strip_metadata: bool = False) -> List[Dict[str, Any]]:
+        """자산 내용(공백 없는 JSON)과 크기를 반환합니다. 부분 추출 조건을 주면 해당 부분만 반환합니다."""
+        results = []
+        for tid in target_ids:
+            entry = self._ids.get(tid)
+            if entry is None:
+                results.append({"id": tid, "content": f"ERROR: Asset {tid} not found"})
+                continue
+            content = entry.project(node_names, node_types, connections_only, strip_metadata)
+            size = entry.content_bytes if content is entry.content else byte_size(content)
+            result = {"id": tid, "content": content, "bytes": size, "full_bytes": entry.content_bytes}
+            if node_names and entry.is_workflow:
+                present = {node.get("name") for node in entry.data["nodes"]}
+                missing = [name for name in node_names if name not in present]
+                if missing:
+                    result["missing_nodes"] = missing
+            results.append(result)
+        return results
+
+    # ------------------------------------------------------------------
+    # 백그라운드 변경 감지
+    # ------------------------------------------------------------------
+    async def watch_loop(self) -> None:
+        await asyncio.to_thread(self.scan)
+        if self.watch_mode == "watch":
+            try:
+                from watchfiles import awatch
+            except ImportError:
+                print("⚠️ [ASSETS] watchfiles 패키지가 없어 주기적 확인(poll) 방식으로 변경을 감지합니다.")
+            else:
+                self.watching = True
+                try:
+                    async for changes in awatch(*self.base_dirs.values(), recursive=False):
+                        await asyncio.to_thread(self.update_paths, [path for _, path in changes])
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    print(f"⚠️ [ASSETS] 파일 변경 감지 중단, 주기적 확인으로 전환: {e}")
+                finally:
+                    self.watching = False
+
+        # poll 방식 (또는 watch 실패 시)
+        self.watching = True
+        try:
+            while True:
+                await asyncio.sleep(ASSET_POLL_INTERVAL)
+                try:
+                    await asyncio.to_thread(self.scan)
+                except Exception as e:
+                    print(f"⚠️ [ASSETS] 자산 디렉터리 확인 실패: {e}")
+        finally:
+            self.watching = False
+
+    def start(self) -> None:
+        """앱 시작 시 자산을 읽고 백그라운드 변경 감지를 시작합니다."""
+        if self.watch_mode == "off":
+            return
+        for directory in self.base_dirs.values():
+            os.makedirs(directory, exist_ok=True)
+        if self._watch_task is None:
+            self._watch_task = asyncio.get_running_loop().create_task(self.watch_loop())
+
+    async def stop(self) -> None:
+        if self._watch_task is not None:
+            self._watch_task.cancel()
+            try:
+                await self._watch_task
+            except asyncio.CancelledError:
+                pass
+            self._watch_task = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "assets": len(self._ids),
+            "watch_mode": self.watch_mode,
+            "watching": self.watching,
+            "scanned_at": self.scanned_at,
+            "version": self.version,
+            "scans": self.scans,
+            "parsed": self.parsed,
+            "parse_errors": self.parse_errors,
+            "content_bytes": sum(entry.content_bytes for entry in self._ids.values()),
+            "stripped_bytes": sum(entry.stripped_bytes or entry.content_bytes for entry in self._ids.values()),
+        }
+
+
+# 앱 전체에서 공유하는 자산 카탈로그
+asset_catalog = AssetCatalog()
@@ -0,0 +1,277 @@
+# app/service/asset_search.py
+import os
+import re
+import math
+import zlib
+import asyncio
+import threading
+import numpy as np
+
+from functools import lru_cache
+from collections import Counter
+from dataclasses import dataclass
+from dotenv import load_dotenv
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.service.asset_catalog import AssetCatalog, AssetEntry, asset_catalog, STICKY_NOTE_TYPE
+
+load_dotenv()
+
+# 해시 char n-gram 벡터 차원 (자산 수천 개 기준 충돌이 적고 행렬이 수십 MB를 넘지 않는 크기)
+ASSET_SEARCH_DIMENSIONS = int(os.getenv("ASSET_SEARCH_DIMENSIONS", "2048"))
+
+# 최종 점수 = 벡터 유사도 * weight + 키워드(BM25, 질문 내 최고점 기준 정규화) * (1 - weight)
+ASSET_SEARCH_VECTOR_WEIGHT = float(os.getenv("ASSET_SEARCH_VECTOR_WEIGHT", "0.5"))
+
+# BM25 파라미터
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# 문서 필드별 가중치 (텍스트를 반복하여 n-gram / 키워드 빈도에 반영)
+FIELD_WEIGHTS = {
+    "description": 3,
+    "name": 2,
+    "node_types": 2,
+    "node_names": 1,
+    "sticky_notes": 1,
+}
+
+# 결과에 함께 보여줄 노드 타입 수
+RESULT_NODE_TYPES = 12
+
+WORD_PATTERN = re.compile(r"[a-z0-9]+|[ㄱ-ㅎ가-힣]+")
+CAMEL_PATTERN = re.compile(r"(?<=[a-z0-9])(?=[A-Z])")
+NGRAM_CLEAN_PATTERN = re.compile(r"[^a-z0-9ㄱ-ㅎ가-힣]")
+
+
+def short_type(node_type: str) -> str:
+    """'n8n-nodes-base.httpRequest' -> 'httpRequest'"""
+    return node_type.rsplit(".", 1)[-1]
+
+
+def tokenize(text: str) -> List[str]:
+    """영문 camelCase를 나누고 소문자로 바꾼 뒤 영문/숫자/한글 단어 단위로 자릅니다. (2글자 이상)"""
+    text = CAMEL_PATTERN.sub(" ", text).lower()
+    return [word for word in WORD_PATTERN.findall(text) if len(word) >= 2]
+
+
+@lru_cache(maxsize=65536)
+def _gram_slot(gram: str, dimensions: int) -> Tuple[int, float]:
+    # 파이썬 hash()는 프로세스마다 달라지므로 crc32 사용. 부호 비트로 충돌 편향을 상쇄
+    digest = zlib.crc32(gram.encode("utf-8"))
+    return digest % dimensions, 1.0 if digest & 0x80000000 else -1.0
+
+
+def ngram_vector(text: str, dimensions: int = ASSET_SEARCH_DIMENSIONS) -> np.ndarray:
+    """
+    공백 / 기호를 제거한 문자열의 2-gram, 3-gram을 해시하여 L2 정규화한 벡터를 만듭니다.
+    (한글은 형태소 분석 없이도 2-gram만으로 '야근'/'식대' 같은 단어 조각이 잘 맞음)
+    """
+    vector = np.zeros(dimensions, dtype=np.float32)
+    for word in text.lower().split():
+        clean = NGRAM_CLEAN_PATTERN.sub("", word)
+        for size in (2, 3):
+            for i in range(len(clean) - size + 1):
+                slot, sign = _gram_slot(clean[i:i + size], dimensions)
+                vector[slot] += sign
+    norm = float(np.linalg.norm(vector))
+    if norm > 0:
+        vector /= norm
+    return vector
+
+
+def asset_fields(entry: AssetEntry) -> Dict[str, str]:
+    """검색에 사용할 자산의 텍스트 필드 (설명 / 파일명 / 노드 타입 / 노드 이름 / Sticky Note 내용)"""
+    name = os.path.splitext(entry.name)[0].replace("_", " ")
+    fields = {"description": str(entry.description or ""), "name": name}
+    if entry.is_workflow:
+        types, names, notes = [], [], []
+        for node in entry.data["nodes"]:
+            node_type = node.get("type", "")
+            if node_type == STICKY_NOTE_TYPE:
+                notes.append(str(node.get("parameters", {}).get("content", "")).replace("#", " "))
+                continue
+            types.append(short_type(node_type))
+            names.append(str(node.get("name", "")))
+        fields["node_types"] = " ".join(dict.fromkeys(types))
+        fields["node_names"] = " ".join(names)
+        fields["sticky_notes"] = " ".join(notes)
+    else:
+        # JS / TXT 자산은 본문 앞부분을 Sticky Note 대신 사용
+        fields["sticky_notes"] = entry.content[:4000]
+    return fields
+
+
+@dataclass
+class AssetDocument:
+    key: Tuple[str, int, int]        # (경로, mtime_ns, size) - 바뀌면 다시 만듦
+    vector: np.ndarray
+    terms: Counter
+    length: int
+    node_types: List[str]
+
+
+def build_document(entry: AssetEntry, dimensions: int) -> AssetDocument:
+    fields = asset_fields(entry)
+    weighted = " ".join(" ".join([text] * FIELD_WEIGHTS.get(field, 1)) for field, text in fields.items() if text)
+    # camelCase 노드 타입('httpRequest')은 'http request'로도 n-gram을 만들어 자연어 질문과 맞춤
+    weighted += " " + CAMEL_PATTERN.sub(" ", fields.get("node_types", ""))
+    terms = Counter(tokenize(weighted))
+    return AssetDocument(
+        key=(entry.path, entry.mtime_ns, entry.size),
+        vector=ngram_vector(weighted, dimensions),
+        terms=terms,
+        length=sum(terms.values()),
+        node_types=fields.get("node_types", "").split()[:RESULT_NODE_TYPES],
+    )
+
+
+@dataclass
+class SearchSnapshot:
+    """검색에 쓰는 색인 묶음 (sync가 통째로 교체하므로 검색 도중 갱신되어도 서로 어긋나지 않음)"""
+    ids: List[str]
+    matrix: np.ndarray
+    postings: Dict[str, List[Tuple[int, int]]]
+    lengths: np.ndarray
+    avg_length: float
+    documents: Dict[str, AssetDocument]
+
+
+class AssetSearchIndex:
+    """
+    n8n 자산(뼈대 / 살점)에 대한 로컬 검색 인덱스입니다. (외부 임베딩 호출 없음)
+    - 벡터: 설명 / Sticky Note / 노드 타입 / 노드 이름의 해시 char n-gram (코사인 유사도, 행렬-벡터 곱 1번)
+    - 키워드: 단어 역색인 BM25
+    - 자산 카탈로그가 바뀌면(version 증가) 바뀐 자산의 문서만 다시 만들고 행렬 / 역색인을 교체합니다.
+    """
+
+    def __init__(self, catalog: AssetCatalog = asset_catalog, dimensions: int = ASSET_SEARCH_DIMENSIONS,
+                 vector_weight: float = ASSET_SEARCH_VECTOR_WEIGHT):
+        self.catalog = catalog
+        self.dimensions = dimensions
+        self.vector_weight = vector_weight
+
+        self._lock = threading.Lock()
+        self._version = -1
+        self._snapshot = SearchSnapshot([], np.zeros((0, dimensions), dtype=np.float32), {},
+                                        np.zeros(0, dtype=np.float32), 0.0, {})
+
+        # 모니터링용 카운터
+        self.builds = 0
+        self.searches = 0
+
+    def is_stale(self) -> bool:
+        return self._version != self.catalog.version
+
+    def sync(self) -> int:
+        """카탈로그 변경분을 반영합니다. 다시 만든 문서 수를 반환합니다."""
+        with self._lock:
+            version = self.catalog.version
+            if version == self._version:
+                return 0
+            entries = self.catalog.entries()
+            documents: Dict[str, AssetDocument] = {}
+            rebuilt = 0
+            previous = self._snapshot.documents
+            for entry in entries:
+                document = previous.get(entry.id)
+                if document is None or document.key != (entry.path, entry.mtime_ns, entry.size):
+                    document = build_document(entry, self.dimensions)
+                    rebuilt += 1
+                documents[entry.id] = document
+
+            ids = list(documents)
+            postings: Dict[str, List[Tuple[int, int]]] = {}
+            for row, asset_id in enumerate(ids):
+                for term, count in documents[asset_id].terms.items():
+                    postings.setdefault(term, []).append((row, count))
+            lengths = np.array([documents[asset_id].length for asset_id in ids], dtype=np.float32)
+
+            matrix = (np.stack([documents[asset_id].vector for asset_id in ids])
+                      if ids else np.zeros((0, self.dimensions), dtype=np.float32))
+            self._snapshot = SearchSnapshot(ids, matrix, postings, lengths,
+                                            float(lengths.mean()) if len(lengths) else 0.0, documents)
+            self._version = version
+            self.builds += rebuilt
+        if rebuilt:
+            print(f"✅ [ASSET SEARCH] 자산 검색 인덱스 갱신: {rebuilt}개 문서 / 전체 {len(ids)}개")
+        return rebuilt
+
+    @staticmethod
+    def _bm25(snapshot: SearchSnapshot, terms: List[str]) -> np.ndarray:
+        scores = np.zeros(len(snapshot.ids), dtype=np.float32)
+        total = len(snapshot.ids)
+        if not total:
+            return scores
+        for term in set(terms):
+            postings = snapshot.postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (total - len(postings) + 0.5) / (len(postings) + 0.5))
+            for row, count in postings:
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * snapshot.lengths[row] / (snapshot.avg_length or 1.0))
+                scores[row] += idf * count * (BM25_K1 + 1) / (count + norm)
+        return scores
+
+    def search(self, goal: str, top_k: int = 5) -> List[Dict[str, Any]]:
+        """자연어 목표(goal)와 관련 높은 자산 top_k개를 점수 순으로 반환합니다. (메모리만 사용)"""
+        if self.is_stale():
+            self.sync()
+        self.searches += 1
+        snapshot = self._snapshot
+        ids = snapshot.ids
+        if not ids or not goal.strip():
+            return []
+
+        vector_scores = snapshot.matrix @ _query_vector(goal, self.dimensions)
+        keyword_scores = self._bm25(snapshot, tokenize(goal))
+        best_keyword = float(keyword_scores.max()) if len(keyword_scores) else 0.0
+        if best_keyword > 0:
+            keyword_scores = keyword_scores / best_keyword
+        scores = self.vector_weight * np.clip(vector_scores, 0.0, None) + (1 - self.vector_weight) * keyword_scores
+
+        top_k = max(1, min(top_k, len(ids)))
+        rows = np.argpartition(-scores, top_k - 1)[:top_k] if top_k < len(ids) else np.arange(len(ids))
+        rows = rows[np.argsort(-scores[rows])]
+
+        results = []
+        for row in rows:
+            score = round(float(scores[row]), 4)
+            if score <= 0:
+                continue
+            asset_id = ids[row]
+            item = self.catalog.catalog_item(asset_id)
+            if item is None:
+                continue
+            item["score"] = score
+            item["node_types"] = snapshot.documents[asset_id].node_types
+            results.append(item)
+        return results
+
+    async def asearch(self, goal: str, top_k: int = 5) -> List[Dict[str, Any]]:
+        """search의 비동기 버전 (카탈로그 확인 / 인덱스 갱신이 필요하면 스레드에서 실행)"""
+        await self.catalog.arefresh_if_stale()
+        if self.is_stale():
+            await asyncio.to_thread(self.sync)
+        return self.search(goal, top_k)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "documents": len(self._snapshot.ids),
+            "terms": len(self._snapshot.postings),
+            "dimensions": self.dimensions,
+            "vector_weight": self.vector_weight,
+            "catalog_version": self._version,
+            "builds": self.builds,
+            "searches": self.searches,
+        }
+
+
+@lru_cache(maxsize=256)
+def _query_vector(goal: str, dimensions: int) -> np.ndarray:
+    # 같은 목표 문장이 반복되는 경우가 많아 질문 벡터를 캐싱
+    return ngram_vector(goal + " " + CAMEL_PATTERN.sub(" ", goal), dimensions)
+
+
+# 앱 전체에서 공유하는 자산 검색 인덱스
+asset_search = AssetSearchIndex()
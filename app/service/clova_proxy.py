@@ -0,0 +1,358 @@
+# app/service/clova_proxy.py
+import os
+import json
+import time
+import asyncio
+import httpx
+
+from dotenv import load_dotenv
+from fastapi.responses import StreamingResponse
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+from app.core.result_cache import ResultCache
+from app.core.metrics import record_stage, observe_payload
+
+load_dotenv()
+
+NCP_CLOVA_URL = os.getenv("NCP_CLOVA_URL")
+
+NCP_CLOVA_TOKEN = os.getenv("NCP_CLOVA_TOKEN")
+
+NCP_CLOVA_REQUEST_ID = os.getenv("NCP_CLOVA_REQUEST_ID")
+
+# 클로바 응답 대기 시간(초) - 요청 데드라인이 있으면 남은 시간으로 줄어듭니다.
+CLOVA_TIMEOUT = float(os.getenv("CLOVA_TIMEOUT", "30"))
+
+# 커넥션 풀 크기 / keep-alive 유지 시간(초)
+CLOVA_MAX_CONNECTIONS = int(os.getenv("CLOVA_MAX_CONNECTIONS", "50"))
+
+CLOVA_MAX_KEEPALIVE = int(os.getenv("CLOVA_MAX_KEEPALIVE", "20"))
+
+CLOVA_KEEPALIVE_EXPIRY = float(os.getenv("CLOVA_KEEPALIVE_EXPIRY", "60"))
+
+# HTTP/2 사용 여부 (h2 패키지 필요)
+CLOVA_HTTP2 = os.getenv("CLOVA_HTTP2", "true").lower() == "true"
+
+# 응답 캐시 사용 여부 (기본 꺼짐 - 켜면 아래 조건을 만족하는 요청만 캐시)
+CLOVA_CACHE_ENABLED = os.getenv("CLOVA_CACHE_ENABLED", "false").lower() == "true"
+
+# temperature가 이 값 이하인 요청만 캐시합니다. (결과가 거의 결정적인 분류/추출 요청)
+CLOVA_CACHE_MAX_TEMPERATURE = float(os.getenv("CLOVA_CACHE_MAX_TEMPERATURE", "0.2"))
+
+CLOVA_CACHE_SIZE = int(os.getenv("CLOVA_CACHE_SIZE", "512"))
+
+CLOVA_CACHE_TTL = float(os.getenv("CLOVA_CACHE_TTL", "3600"))
+
+# 클로바 finishReason -> OpenAI finish_reason
+FINISH_REASONS = {
+    "stop": "stop",
+    "stop_before": "stop",
+    "end_token": "stop",
+    "length": "length",
+    "tool_calls": "tool_calls",
+}
+
+# 앱 수명주기 동안 재사용하는 클로바 전용 HTTP 클라이언트 (요청마다 TLS 연결을 새로 맺지 않음)
+clova_client: Optional[httpx.AsyncClient] = None
+_clova_client_lock = asyncio.Lock()
+
+
+# 동일한 프롬프트의 응답 캐시 (LRU + TTL, 동시에 들어온 같은 요청은 클로바 호출 1번으로 합침)
+completion_cache = ResultCache(max_size=CLOVA_CACHE_SIZE, ttl=CLOVA_CACHE_TTL, enabled=CLOVA_CACHE_ENABLED)
+
+
+async def get_clova_client() -> httpx.AsyncClient:
+    global clova_client
+    if clova_client is None:
+        async with _clova_client_lock:
+            if clova_client is None:
+                http2 = CLOVA_HTTP2
+                if http2:
+                    try:
+                        import h2  # noqa: F401  (httpx HTTP/2 지원에 필요)
+                    except ImportError:
+                        print("⚠️ [CLOVA] h2 패키지가 없어 HTTP/1.1 keep-alive로 연결합니다.")
+                        http2 = False
+                clova_client = httpx.AsyncClient(
+                    http2=http2,
+                    timeout=CLOVA_TIMEOUT,
+                    limits=httpx.Limits(
+                        max_connections=CLOVA_MAX_CONNECTIONS,
+                        max_keepalive_connections=CLOVA_MAX_KEEPALIVE,
+                        keepalive_expiry=CLOVA_KEEPALIVE_EXPIRY,
+                    ),
+                )
+    return clova_client
+
+
+async def close_clova_client() -> None:
+    global clova_client
+    if clova_client is not None:
+        await clova_client.aclose()
+        clova_client = None
+
+
+def build_ncp_payload(openai_data: Dict[str, Any]) -> Dict[str, Any]:
+    """n8n (OpenAI Chat Model 노드) 요청을 NCP HCX-005 규격으로 변환합니다."""
+    ncp_payload = {
+        "messages": openai_data.get("messages", []),
+        "topP": openai_data.get("top_p", 0.8),
+        "temperature": openai_data.get("temperature", 0.5)
+    }
+
+    # n8n이 MCP Tool(함수) 정보를 보냈다면 NCP 포맷에 맞춰 추가
+    if "tools" in openai_data:
+        ncp_payload["tools"] = openai_data["tools"]
+
+    return ncp_payload
+
+
+def is_cacheable(openai_data: Dict[str, Any], ncp_payload: Dict[str, Any], cache_header: Optional[str] = None) -> bool:
+    """
+    캐시해도 되는 요청인지 판단합니다.
+    - X-Completion-Cache: off  -> 항상 클로바 호출
+    - X-Completion-Cache: on   -> temperature와 관계없이 캐시
+    - 그 외: temperature <= CLOVA_CACHE_MAX_TEMPERATURE 인 경우만 캐시
+    스트리밍 요청은 토큰을 바로 흘려보내야 하므로 캐시하지 않습니다.
+    """
+    if not completion_cache.enabled or openai_data.get("stream"):
+        return False
+    mode = (cache_header or "").strip().lower()
+    if mode in ("off", "no", "bypass"):
+        return False
+    if mode in ("on", "yes", "force"):
+        return True
+    try:
+        return float(ncp_payload.get("temperature", 1.0)) <= CLOVA_CACHE_MAX_TEMPERATURE
+    except (TypeError, ValueError):
+        return False
+
+
+def completion_cache_params(model: str, ncp_payload: Dict[str, Any]) -> Dict[str, Any]:
+    """캐시 키에 들어갈 요청 내용 (messages / tools / topP / temperature). 키 순서와 무관하게 같은 해시가 나옵니다."""
+    return {
+        "model": model,
+        "messages": ncp_payload.get("messages", []),
+        "tools": ncp_payload.get("tools"),
+        "topP": ncp_payload.get("topP"),
+        "temperature": ncp_payload.get("temperature"),
+    }
+
+
+def ncp_headers(stream: bool = False) -> Dict[str, str]:
+    return {
+        "Authorization": f"Bearer {NCP_CLOVA_TOKEN}",
+        "Content-Type": "application/json",
+        "Accept": "text/event-stream" if stream else "application/json",
+        "X-NCP-CLOVASTUDIO-REQUEST-ID": NCP_CLOVA_REQUEST_ID
+    }
+
+
+def to_openai_response(ncp_result: Dict[str, Any], model: str) -> Dict[str, Any]:
+    """NCP의 응답을 다시 OpenAI 규격으로 포장합니다."""
+    clova_message = ncp_result.get("result", {}).get("message", {})
+
+    # 💡 핵심: 클로바가 일반 대답을 한 건지, 아니면 '툴을 써라'고 지시한 건지 상태값 매핑
+    finish_reason = "stop"
+    if "tool_calls" in clova_message:
+        finish_reason = "tool_calls"
+
+    # OpenAI 표준 포맷으로 최종 조립
+    return {
+        "id": "chatcmpl-" + ncp_result.get("result", {}).get("id", "clova-proxy"),
+        "object": "chat.completion",
+        "model": model,
+        "choices": [
+            {
+                "index": 0,
+                "message": clova_message,
+                "finish_reason": finish_reason
+            }
+        ]
+    }
+
+
+async def iter_sse_events(response: httpx.Response) -> AsyncIterator[tuple]:
+    """SSE 스트림을 (event, data) 단위로 나눕니다."""
+    event, data_lines = None, []
+    async for line in response.aiter_lines():
+        if not line:
+            if data_lines:
+                yield event or "message", "\n".join(data_lines)
+            event, data_lines = None, []
+            continue
+        if line.startswith(":"):
+            continue
+        field, _, value = line.partition(":")
+        value = value[1:] if value.startswith(" ") else value
+        if field == "event":
+            event = value
+        elif field == "data":
+            data_lines.append(value)
+    if data_lines:
+        yield event or "message", "\n".join(data_lines)
+
+
+class ChunkTranslator:
+    """
+    클로바 SSE 이벤트(token / result / error)를 OpenAI chat.completion.chunk 이벤트로 변환합니다.
+    - token : 새로 생성된 content 조각과 toolCalls 조각을 delta로 전달
+    - result: finishReason을 finish_reason으로 매핑하여 마지막 chunk 전송
+    """
+
+    def __init__(self, model: str, include_usage: bool = False):
+        self.model = model
+        self.include_usage = include_usage
+        self.id = f"chatcmpl-clova-{int(time.time() * 1000)}"
+        self.created = int(time.time())
+        self.tool_indexes: Dict[str, int] = {}  # 클로바 toolCall id -> OpenAI tool_calls index
+        self.finished = False
+
+    def chunk(self, delta: Dict[str, Any], finish_reason: Optional[str] = None, usage: Optional[Dict[str, Any]] = None) -> str:
+        body = {
+            "id": self.id,
+            "object": "chat.completion.chunk",
+            "created": self.created,
+            "model": self.model,
+            "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+        }
+        if usage is not None:
+            body["usage"] = usage
+        return f"data: {json.dumps(body, ensure_ascii=False)}\n\n"
+
+    def start(self) -> str:
+        return self.chunk({"role": "assistant", "content": ""})
+
+    def tool_call_deltas(self, tool_calls: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        deltas = []
+        for position, call in enumerate(tool_calls):
+            call_id = call.get("id") or f"call_{position}"
+            function = call.get("function") or {}
+            arguments = function.get("arguments", "")
+            if not isinstance(arguments, str):
+                arguments = json.dumps(arguments, ensure_ascii=False)
+
+            if call_id not in self.tool_indexes:
+                # 처음 등장한 도구 호출: id / type / 함수 이름을 함께 전달
+                self.tool_indexes[call_id] = len(self.tool_indexes)
+                deltas.append({
+                    "index": self.tool_indexes[call_id],
+                    "id": call_id,
+                    "type": "function",
+                    "function": {"name": function.get("name", ""), "arguments": arguments},
+                })
+            elif arguments:
+                # 이어지는 조각: arguments만 이어 붙이도록 전달
+                deltas.append({"index": self.tool_indexes[call_id], "function": {"arguments": arguments}})
+        return deltas
+
+    def translate(self, event: str, data: str) -> List[str]:
+        if self.finished:
+            return []
+        try:
+            payload = json.loads(data) if data else {}
+        except json.JSONDecodeError:
+            return []
+        message = payload.get("message") or {}
+
+        if event == "token":
+            chunks = []
+            content = message.get("content")
+            if content:
+                chunks.append(self.chunk({"content": content}))
+            tool_calls = message.get("toolCalls") or message.get("tool_calls")
+            if tool_calls:
+                deltas = self.tool_call_deltas(tool_calls)
+                if deltas:
+                    chunks.append(self.chunk({"tool_calls": deltas}))
+            return chunks
+
+        if event == "result":
+            chunks = []
+            tool_calls = message.get("toolCalls") or message.get("tool_calls")
+            # token 이벤트로 오지 않은 도구 호출이 result에만 있으면 여기서 한 번에 전달
+            if tool_calls and not self.tool_indexes:
+                chunks.append(self.chunk({"tool_calls": self.tool_call_deltas(tool_calls)}))
+
+            finish_reason = FINISH_REASONS.get(payload.get("finishReason", "stop"), "stop")
+            if self.tool_indexes:
+                finish_reason = "tool_calls"
+
+            usage = None
+            if self.include_usage and payload.get("usage"):
+                clova_usage = payload["usage"]
+                usage = {
+                    "prompt_tokens": clova_usage.get("promptTokens", 0),
+                    "completion_tokens": clova_usage.get("completionTokens", 0),
+                    "total_tokens": clova_usage.get("totalTokens", 0),
+                }
+            chunks.append(self.chunk({}, finish_reason=finish_reason, usage=usage))
+            self.finished = True
+            return chunks
+
+        if event == "error":
+            self.finished = True
+            status = payload.get("status") or {}
+            error = {"error": {"message": status.get("message") or data, "code": status.get("code")}}
+            return [f"data: {json.dumps(error, ensure_ascii=False)}\n\n"]
+
+        return []
+
+
+async def stream_openai_chunks(response: httpx.Response, model: str, include_usage: bool = False,
+                               on_close: Optional[Callable[[], None]] = None) -> AsyncIterator[str]:
+    """
+    클로바 SSE 응답을 받는 즉시 OpenAI 스트리밍 형식으로 흘려보냅니다. (응답 완료를 기다리지 않음)
+    스트림이 끝나거나 클라이언트 연결이 끊기면 클로바 연결도 풀로 반납하고 on_close를 호출합니다.
+    """
+    translator = ChunkTranslator(model, include_usage)
+    started = time.perf_counter()
+    first_token = True
+    streamed_bytes = 0
+    error: Optional[str] = None
+    try:
+        yield translator.start()
+        async for event, data in iter_sse_events(response):
+            for chunk in translator.translate(event, data):
+                if first_token:
+                    # 첫 토큰까지 걸린 시간 (체감 응답 속도)
+                    record_stage("clova_first_token", time.perf_counter() - started, "clova")
+                    first_token = False
+                streamed_bytes += len(chunk)
+                yield chunk
+        if not translator.finished:
+            yield translator.chunk({}, finish_reason="stop")
+        yield "data: [DONE]\n\n"
+    except BaseException as e:
+        error = type(e).__name__
+        raise
+    finally:
+        await response.aclose()
+        record_stage("clova_stream", time.perf_counter() - started, "clova", error=error)
+        observe_payload("clova_response", streamed_bytes)
+        if on_close is not None:
+            on_close()
+
+
+class ClovaStreamingResponse(StreamingResponse):
+    """
+    스트림 전송이 어떻게 끝나든 on_close(클로바 연결 반납 + 입장 제어 슬롯 반납)를 실행하는 StreamingResponse입니다.
+    첫 청크를 보내기 전에 클라이언트 연결이 끊기면 생성기가 시작되지 않아 생성기의 finally가 실행되지 않으므로,
+    응답 전송을 감싸는 쪽에서 한 번 더 정리합니다. (on_close는 여러 번 호출되어도 안전해야 함)
+    """
+
+    def __init__(self, content: AsyncIterator[str], on_close: Callable[[], Awaitable[None]], **kwargs):
+        super().__init__(content, **kwargs)
+        self.on_close = on_close
+
+    async def __call__(self, scope, receive, send) -> None:
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            # 중간에 끊긴 생성기는 여기서 닫아 finally(지표 기록 / 반납)를 바로 실행
+            aclose = getattr(self.body_iterator, "aclose", None)
+            if aclose is not None:
+                try:
+                    await aclose()
+                except Exception as e:
+                    print(f"⚠️ [CLOVA] 스트림 정리 중 에러: {e}")
+            await self.on_close()
@@ -0,0 +1,244 @@
+# app/service/collection_router.py
+import os
+import json
+import time
+import random
+import asyncio
+import numpy as np
+
+from dotenv import load_dotenv
+from dataclasses import dataclass, field
+from typing import List, Dict, Any, Optional
+from app.core.database import get_weaviate
+
+load_dotenv()
+
+# 라우터 동작 모드 (기본값 off: 명시적으로 켜야 동작하는 opt-in 기능)
+# - off    : 라우터 사용 안 함 (항상 전체 테이블 검색)
+# - shadow : 항상 전체 테이블을 검색하되, 라우터가 골랐을 테이블과 비교하여 정확도만 측정
+# - on     : 라우터가 고른 상위 N개 테이블만 검색 (신뢰도가 낮으면 전체 검색으로 대체)
+ROUTER_MODE = os.getenv("ROUTER_MODE", "off").lower()
+
+# 라우터가 선택할 후보 테이블 수
+ROUTER_TOP_N = int(os.getenv("ROUTER_TOP_N", "4"))
+
+# 1등 centroid 유사도가 이 값보다 낮으면 전체 검색으로 대체
+ROUTER_MIN_SIMILARITY = float(os.getenv("ROUTER_MIN_SIMILARITY", "0.3"))
+
+# 선택된 N등과 탈락한 N+1등의 점수 차이가 이 값보다 작으면 전체 검색으로 대체
+ROUTER_MIN_MARGIN = float(os.getenv("ROUTER_MIN_MARGIN", "0.02"))
+
+# on 모드에서도 정확도를 계속 측정하기 위해 전체 검색을 함께 수행할 요청 비율 (0~1)
+ROUTER_SHADOW_RATE = float(os.getenv("ROUTER_SHADOW_RATE", "0.05"))
+
+# centroid 계산에 사용할 컬렉션별 최대 샘플 객체 수
+ROUTER_SAMPLE_SIZE = int(os.getenv("ROUTER_SAMPLE_SIZE", "2000"))
+
+# 백그라운드 재계산 주기(초)
+ROUTER_REFRESH_INTERVAL = float(os.getenv("ROUTER_REFRESH_INTERVAL", "3600"))
+
+# 인덱스 저장 위치 (centroid 행렬 .npy + 컬렉션 이름 .json)
+ROUTER_INDEX_DIR = os.getenv("ROUTER_INDEX_DIR", os.path.join(os.getcwd(), "data", "router"))
+
+
+@dataclass
+class RouteDecision:
+    collections: List[str]
+    scores: Dict[str, float] = field(default_factory=dict)
+    fallback: bool = False
+    reason: str = ""
+
+
+def extract_object_vector(obj) -> Optional[List[float]]:
+    """Weaviate 객체의 벡터를 꺼냅니다. (named vector인 경우 'default' 또는 첫 번째 벡터)"""
+    vector = obj.vector
+    if isinstance(vector, dict):
+        if not vector:
+            return None
+        vector = vector.get("default") or next(iter(vector.values()))
+    return vector or None
+
+
+class CollectionRouter:
+    """
+    컬렉션별 대표 벡터(centroid)를 로컬에 보관하고,
+    질문 벡터와의 행렬-벡터 곱 1번으로 검색할 상위 N개 컬렉션을 고르는 라우터입니다.
+    """
+
+    def __init__(self, index_dir: str = ROUTER_INDEX_DIR):
+        self.index_dir = index_dir
+        self.names: List[str] = []
+        self.centroids: Optional[np.ndarray] = None  # (컬렉션 수, 차원), 행마다 L2 정규화
+        self.built_at: Optional[float] = None
+        self._refresh_task: Optional[asyncio.Task] = None
+
+        # 정확도 측정용 카운터
+        self.routed = 0
+        self.fallbacks = 0
+        self.shadow_checks = 0
+        self.shadow_hits = 0
+
+    @property
+    def matrix_path(self) -> str:
+        return os.path.join(self.index_dir, "centroids.npy")
+
+    @property
+    def meta_path(self) -> str:
+        return os.path.join(self.index_dir, "collections.json")
+
+    def load(self) -> bool:
+        """디스크에 저장된 centroid 인덱스를 메모리 맵으로 불러옵니다."""
+        if not (os.path.exists(self.matrix_path) and os.path.exists(self.meta_path)):
+            return False
+        try:
+            with open(self.meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            self.centroids = np.load(self.matrix_path, mmap_mode="r")
+            self.names = meta["collections"]
+            self.built_at = meta.get("built_at")
+            print(f"✅ [ROUTER] centroid 인덱스 로드: {len(self.names)}개 컬렉션")
+            return True
+        except Exception as e:
+            print(f"⚠️ [ROUTER] 인덱스 로드 실패: {e}")
+            return False
+
+    def build(self, collection_names: List[str]) -> None:
+        """
+        각 컬렉션에서 최대 ROUTER_SAMPLE_SIZE개의 벡터를 읽어 centroid를 계산하고 디스크에 저장합니다.
+        (동기 함수 - 백그라운드 스레드에서 실행)
+        """
+        names, rows = [], []
+        for collection_name in collection_names:
+            try:
+                collection = get_weaviate().collections.get(collection_name)
+                vectors = []
+                for obj in collection.iterator(include_vector=True, return_properties=[]):
+                    vector = extract_object_vector(obj)
+                    if vector:
+                        vectors.append(vector)
+                    if len(vectors) >= ROUTER_SAMPLE_SIZE:
+                        break
+                if not vectors:
+                    continue
+
+                matrix = np.asarray(vectors, dtype=np.float32)
+                matrix /= np.linalg.norm(matrix, axis=1, keepdims=True) + 1e-12
+                centroid = matrix.mean(axis=0)
+                centroid /= np.linalg.norm(centroid) + 1e-12
+
+                names.append(collection_name)
+                rows.append(centroid)
+            except Exception as e:
+                print(f"⚠️ [ROUTER] {collection_name} centroid 계산 실패: {e}")
+
+        if not rows:
+            print("⚠️ [ROUTER] centroid를 계산할 수 있는 컬렉션이 없습니다.")
+            return
+
+        centroids = np.stack(rows).astype(np.float32)
+        built_at = time.time()
+
+        # 임시 파일에 쓴 뒤 교체하여, 읽는 쪽이 반쯤 쓰인 파일을 보지 않도록 합니다.
+        os.makedirs(self.index_dir, exist_ok=True)
+        tmp_matrix = self.matrix_path + ".tmp.npy"
+        np.save(tmp_matrix, centroids)
+        os.replace(tmp_matrix, self.matrix_path)
+        with open(self.meta_path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump({"collections": names, "built_at": built_at}, f, ensure_ascii=False)
+        os.replace(self.meta_path + ".tmp", self.meta_path)
+
+        self.names, self.centroids, self.built_at = names, centroids, built_at
+        print(f"✅ [ROUTER] centroid 인덱스 갱신 완료: {len(names)}개 컬렉션")
+
+    def route(self, vector: List[float], all_collections: List[str], top_n: int = ROUTER_TOP_N) -> RouteDecision:
+        """질문 벡터로 검색할 컬렉션을 고릅니다. 판단이 어려우면 fallback=True와 함께 전체 목록을 돌려줍니다."""
+        if self.centroids is None or not self.names:
+            return RouteDecision(collections=list(all_collections), fallback=True, reason="no_index")
+
+        query = np.asarray(vector, dtype=np.float32)
+        if query.shape[0] != self.centroids.shape[1]:
+            return RouteDecision(collections=list(all_collections), fallback=True, reason="dimension_mismatch")
+        # asarray는 호출한 쪽의 float32 배열을 그대로 돌려주므로 제자리 나눗셈 대신 새 배열로 정규화
+        query = query / (np.linalg.norm(query) + 1e-12)
+
+        sims = self.centroids @ query
+        order = np.argsort(-sims)
+        scores = {self.names[i]: float(sims[i]) for i in order}
+
+        # 인덱스에 없는 컬렉션(새로 생긴 테이블 등)은 판단할 수 없으므로 항상 포함
+        unindexed = [name for name in all_collections if name not in scores]
+        selected = [self.names[i] for i in order[:top_n] if self.names[i] in all_collections]
+
+        top_score = float(sims[order[0]])
+        margin = float(sims[order[top_n - 1]] - sims[order[top_n]]) if len(order) > top_n else 1.0
+
+        if top_score < ROUTER_MIN_SIMILARITY:
+            return RouteDecision(collections=list(all_collections), scores=scores, fallback=True, reason="low_similarity")
+        if margin < ROUTER_MIN_MARGIN:
+            return RouteDecision(collections=list(all_collections), scores=scores, fallback=True, reason="low_margin")
+
+        return RouteDecision(collections=selected + unindexed, scores=scores)
+
+    def should_shadow(self) -> bool:
+        """이번 요청에서 전체 검색을 함께 수행하여 정확도를 측정할지 결정합니다."""
+        if ROUTER_MODE == "shadow":
+            return True
+        return ROUTER_MODE == "on" and random.random() < ROUTER_SHADOW_RATE
+
+    def record(self, decision: RouteDecision, best_table: Optional[str], shadow: bool) -> None:
+        if decision.fallback:
+            self.fallbacks += 1
+        else:
+            self.routed += 1
+
+        # 전체 검색 결과의 1등 테이블이 라우터가 고른 후보 안에 있었는지 기록
+        if shadow and best_table is not None and not decision.fallback:
+            self.shadow_checks += 1
+            if best_table in decision.collections:
+                self.shadow_hits += 1
+
+    async def refresh_loop(self, collection_names: List[str]) -> None:
+        """주기적으로 centroid를 다시 계산하는 백그라운드 작업입니다."""
+        if self.built_at is not None:
+            # 디스크에서 불러온 인덱스가 아직 유효하면 남은 시간만큼 기다립니다.
+            await asyncio.sleep(max(0.0, self.built_at + ROUTER_REFRESH_INTERVAL - time.time()))
+        while True:
+            try:
+                await asyncio.to_thread(self.build, collection_names)
+            except Exception as e:
+                print(f"⚠️ [ROUTER] centroid 갱신 실패: {e}")
+            await asyncio.sleep(ROUTER_REFRESH_INTERVAL)
+
+    def start(self, collection_names: List[str]) -> None:
+        """앱 시작 시 인덱스를 불러오고 백그라운드 갱신 작업을 시작합니다."""
+        if ROUTER_MODE == "off":
+            return
+        self.load()
+        if self._refresh_task is None:
+            self._refresh_task = asyncio.get_running_loop().create_task(self.refresh_loop(collection_names))
+
+    async def stop(self) -> None:
+        if self._refresh_task is not None:
+            self._refresh_task.cancel()
+            try:
+                await self._refresh_task
+            except asyncio.CancelledError:
+                pass
+            self._refresh_task = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "mode": ROUTER_MODE,
+            "top_n": ROUTER_TOP_N,
+            "indexed_collections": len(self.names),
+            "built_at": self.built_at,
+            "routed": self.routed,
+            "fallbacks": self.fallbacks,
+            "shadow_checks": self.shadow_checks,
+            "shadow_hits": self.shadow_hits,
+            "accuracy": round(self.shadow_hits / self.shadow_checks, 4) if self.shadow_checks else None,
+        }
+
+
+# 앱 전체에서 공유하는 라우터 인스턴스
+collection_router = CollectionRouter()
@@ -0,0 +1,158 @@
+# app/service/embedding_service.py
+import os
+import asyncio
+
+from dotenv import load_dotenv
+from typing import List, Dict, Tuple, Optional
+from app.core.embedding_cache import normalize_query
+from app.core.database import get_genai
+from app.core.circuit_breaker import breakers
+
+load_dotenv()
+
+# 같은 배치로 묶을 대기 시간(ms). 이 시간 안에 들어온 질문들은 한 번의 API 호출로 처리됩니다.
+EMBEDDING_BATCH_WINDOW_MS = float(os.getenv("EMBEDDING_BATCH_WINDOW_MS", "5"))
+
+# 한 번의 embed_content 호출에 담을 최대 질문 수 (Gemini batch 한도 100 이하)
+EMBEDDING_MAX_BATCH_SIZE = int(os.getenv("EMBEDDING_MAX_BATCH_SIZE", "32"))
+
+# 동시에 Gemini로 날아가는 배치 요청 수 상한
+EMBEDDING_MAX_INFLIGHT = int(os.getenv("EMBEDDING_MAX_INFLIGHT", "4"))
+
+
+class EmbeddingBatcher:
+    """
+    이벤트 루프를 막지 않는 임베딩 서비스입니다.
+    - 짧은 시간(window) 안에 들어온 질문들을 모아 한 번의 embed_content 호출로 처리 (Micro-batching)
+    - 이미 처리 중인 동일 질문은 같은 결과를 기다리도록 합침 (Coalescing)
+    - 동시에 진행되는 배치 요청 수를 세마포어로 제한 (In-flight limit)
+    """
+
+    def __init__(self, model: str, task_type: str,
+                 window_ms: float = EMBEDDING_BATCH_WINDOW_MS,
+                 max_batch_size: int = EMBEDDING_MAX_BATCH_SIZE,
+                 max_inflight: int = EMBEDDING_MAX_INFLIGHT):
+        self.model = model
+        self.task_type = task_type
+        self.window = window_ms / 1000.0
+        self.max_batch_size = max_batch_size
+        self.max_inflight = max_inflight
+
+        # 정규화된 질문 -> 결과를 기다리는 Future (중복 질문 합치기용)
+        self._inflight: Dict[str, asyncio.Future] = {}
+        # 아직 배치로 보내지 않은 (정규화 키, 원문) 목록
+        self._queue: List[Tuple[str, str]] = []
+        self._flush_task: Optional[asyncio.Task] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+        # 모니터링용 카운터
+        self.requests = 0
+        self.coalesced = 0
+        self.batches = 0
+        self.batched_items = 0
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        # 세마포어는 실행 중인 이벤트 루프에서 처음 사용할 때 만듭니다.
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_inflight)
+        return self._semaphore
+
+    async def embed(self, text: str) -> List[float]:
+        """질문 하나를 임베딩합니다. 동일 질문이 처리 중이면 그 결과를 같이 기다립니다."""
+        key = normalize_query(text)
+        self.requests += 1
+
+        future = self._inflight.get(key)
+        if future is not None:
+            self.coalesced += 1
+            return await asyncio.shield(future)
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._inflight[key] = future
+        self._queue.append((key, text))
+
+        if len(self._queue) >= self.max_batch_size:
+            # 배치가 꽉 찼으면 기다리지 않고 바로 전송
+            self._dispatch()
+        elif self._flush_task is None:
+            self._flush_task = loop.create_task(self._flush_after_window())
+
+        return await asyncio.shield(future)
+
+    async def _flush_after_window(self) -> None:
+        await asyncio.sleep(self.window)
+        self._flush_task = None
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        """대기열을 비우고 배치 요청을 백그라운드 태스크로 보냅니다."""
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            self._flush_task = None
+
+        while self._queue:
+            batch = self._queue[:self.max_batch_size]
+            self._queue = self._queue[self.max_batch_size:]
+            asyncio.get_running_loop().create_task(self._run_batch(batch))
+
+    async def _run_batch(self, batch: List[Tuple[str, str]]) -> None:
+        texts = [text for _, text in batch]
+        settled = False
+
+        try:
+            async with self._get_semaphore():
+                # genai 호출은 동기 함수이므로 스레드에서 실행하여 이벤트 루프를 막지 않습니다.
+                # (google.generativeai는 첫 호출 시 import + configure 됩니다.)
+                # Gemini 장애가 반복되면 서킷 브레이커가 차단하여 배치 전체가 즉시 실패합니다.
+                async def embed_batch():
+                    genai = await asyncio.to_thread(get_genai)
+                    return await asyncio.to_thread(
+                        genai.embed_content,
+                        model=self.model,
+                        content=texts,
+                        task_type=self.task_type
+                    )
+
+                result = await breakers.get("gemini").call(embed_batch)
+            vectors = result['embedding']
+
+            # 응답 벡터 수가 요청 수와 다르면 어느 벡터가 어느 요청의 것인지 알 수 없으므로 배치 전체를 실패 처리합니다.
+            if len(vectors) != len(batch):
+                raise ValueError(f"Gemini가 {len(batch)}개 요청에 {len(vectors)}개 벡터를 반환했습니다.")
+
+            self.batches += 1
+            self.batched_items += len(batch)
+
+            for (key, _), vector in zip(batch, vectors):
+                future = self._inflight.pop(key, None)
+                if future is not None and not future.done():
+                    future.set_result(vector)
+            settled = True
+
+        except Exception as e:
+            print(f"❌ [EMBEDDING BATCH ERROR] {e}")
+            for key, _ in batch:
+                future = self._inflight.pop(key, None)
+                if future is not None and not future.done():
+                    future.set_exception(e)
+            settled = True
+
+        finally:
+            # 취소 등 BaseException으로 빠져나가도 대기 중인 요청이 _inflight에 영원히 남지 않도록 정리합니다.
+            # (정상 처리된 뒤에는 같은 키로 새로 등록된 다른 요청의 Future를 건드리지 않도록 건너뜁니다.)
+            if not settled:
+                for key, _ in batch:
+                    future = self._inflight.pop(key, None)
+                    if future is not None and not future.done():
+                        future.set_exception(RuntimeError("임베딩 배치가 완료되지 않고 중단되었습니다."))
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "requests": self.requests,
+            "coalesced": self.coalesced,
+            "batches": self.batches,
+            "avg_batch_size": round(self.batched_items / self.batches, 2) if self.batches else 0.0,
+            "queued": len(self._queue),
+            "inflight_queries": len(self._inflight),
+        }
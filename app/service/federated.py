@@ -0,0 +1,191 @@
+# app/service/federated.py
+import os
+import time
+import asyncio
+
+from dotenv import load_dotenv
+from typing import List, Dict, Any, Callable, Awaitable
+from app.schemas import SearchQuery, Neo4jSearchQuery, FederatedSearchQuery
+from app.core.embedding_cache import normalize_query
+from app.core.result_cache import result_cache
+from app.core.deadline import request_deadline, clamp_timeout, DeadlineExceeded
+from app.core.circuit_breaker import CircuitOpenError
+from app.core.admission import UpstreamOverloaded
+from app.service.retriever import (
+    aembedding_query, search_logic, search_target_table, search_neo4j_by_text, cache_params
+)
+
+load_dotenv()
+
+# 통합 검색에서 기본으로 조회할 백엔드 목록
+FEDERATED_BACKENDS = [name.strip().lower() for name in os.getenv("FEDERATED_BACKENDS", "supabase,weaviate,neo4j").split(",") if name.strip()]
+
+# 통합 검색 데드라인(초). 질문 임베딩을 포함해 이 시간 안에 끝난 백엔드 결과만 합칩니다.
+FEDERATED_DEADLINE = float(os.getenv("FEDERATED_DEADLINE", "5"))
+
+# 백엔드별로 가져올 후보 수
+FEDERATED_PER_BACKEND = int(os.getenv("FEDERATED_PER_BACKEND", "10"))
+
+# Reciprocal Rank Fusion 상수 k (클수록 하위 순위의 영향이 커짐)
+FEDERATED_RRF_K = int(os.getenv("FEDERATED_RRF_K", "60"))
+
+
+def _supabase_hit(doc: Dict[str, Any]) -> Dict[str, Any]:
+    metadata = doc.get("metadata") or {}
+    return {
+        "source": metadata.get("fileName") or metadata.get("source") or "",
+        "content": doc.get("content", ""),
+        "score": doc.get("final_score", doc.get("similarity", 0.0)),
+    }
+
+
+def _weaviate_hit(doc: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "id": doc.get("id"),
+        "table": doc.get("collection"),
+        "source": doc.get("fileName", ""),
+        "content": doc.get("content", ""),
+        "score": doc.get("similarity", 0.0),
+    }
+
+
+def _neo4j_hit(doc: Dict[str, Any]) -> Dict[str, Any]:
+    primary = doc.get("primaryContent") or []
+    return {
+        "source": doc.get("fileName", ""),
+        "content": " ".join(primary) if isinstance(primary, list) else str(primary),
+        "score": doc.get("score", 0.0),
+        "supplementalContext": doc.get("supplementalContext", []),
+    }
+
+
+async def _search_supabase(params: FederatedSearchQuery, vector: List[float]) -> List[Dict[str, Any]]:
+    query = SearchQuery(query_text=params.query_text, return_count=FEDERATED_PER_BACKEND, filter=params.filter)
+    results = await search_logic(query, "supabase", vector)
+    return [_supabase_hit(doc) for doc in results]
+
+
+async def _search_weaviate(params: FederatedSearchQuery, vector: List[float]) -> List[Dict[str, Any]]:
+    query = SearchQuery(query_text=params.query_text, match_count=FEDERATED_PER_BACKEND)
+    results = await result_cache.get_or_compute(
+        "weaviate", params.query_text, cache_params(query, endpoint="search_target_table"),
+        lambda: search_target_table(query, vector)
+    )
+    return [_weaviate_hit(doc) for doc in results]
+
+
+async def _search_neo4j(params: FederatedSearchQuery, vector: List[float]) -> List[Dict[str, Any]]:
+    query = Neo4jSearchQuery(
+        query_text=params.query_text,
+        match_count=FEDERATED_PER_BACKEND,
+        category=params.category or None,
+        file_name=params.file_name or None,
+    )
+    results = await search_neo4j_by_text(query, vector)
+    return [_neo4j_hit(doc) for doc in results]
+
+
+# 백엔드 이름 -> (통합 검색 파라미터, 질문 벡터)를 받아 공통 형식 결과를 돌려주는 함수
+BACKEND_SEARCHES: Dict[str, Callable[[FederatedSearchQuery, List[float]], Awaitable[List[Dict[str, Any]]]]] = {
+    "supabase": _search_supabase,
+    "weaviate": _search_weaviate,
+    "neo4j": _search_neo4j,
+}
+
+
+def fuse_results(backend_results: Dict[str, List[Dict[str, Any]]], return_count: int,
+                 k: int = FEDERATED_RRF_K) -> List[Dict[str, Any]]:
+    """
+    백엔드별 순위를 Reciprocal Rank Fusion(1 / (k + 순위))으로 합칩니다.
+    백엔드마다 점수 척도가 달라(코사인 유사도, 하이브리드 점수, 그래프 점수) 점수 대신 순위를 사용합니다.
+    같은 내용이 여러 백엔드에서 나오면 하나로 합치고 점수를 더합니다.
+    """
+    fused: Dict[str, Dict[str, Any]] = {}
+    for backend, hits in backend_results.items():
+        for rank, hit in enumerate(hits, 1):
+            key = normalize_query(hit.get("content", ""))[:200] or f"{backend}:{rank}"
+            entry = fused.get(key)
+            if entry is None:
+                entry = {**hit, "backends": [], "ranks": {}, "fused_score": 0.0}
+                fused[key] = entry
+            entry["backends"].append(backend)
+            entry["ranks"][backend] = rank
+            entry["fused_score"] += 1.0 / (k + rank)
+
+    ranked = sorted(fused.values(), key=lambda item: item["fused_score"], reverse=True)
+    for item in ranked:
+        item["fused_score"] = round(item["fused_score"], 6)
+    return ranked[:return_count]
+
+
+async def federated_search(params: FederatedSearchQuery) -> Dict[str, Any]:
+    """
+    질문을 1번만 임베딩한 뒤 설정된 백엔드를 동시에 검색하고 순위를 합쳐 반환합니다.
+    데드라인 안에 끝나지 않은 백엔드는 기다리지 않고 제외합니다. (부분 결과 반환)
+    """
+    started = time.perf_counter()
+    backends = [name.lower() for name in (params.backends or FEDERATED_BACKENDS) if name.lower() in BACKEND_SEARCHES]
+
+    # 요청 전체 데드라인의 남은 시간이 더 짧으면 그 안에서 끝나도록 줄임
+    deadline = clamp_timeout(params.deadline if params.deadline is not None else FEDERATED_DEADLINE)
+
+    timings: Dict[str, float] = {}
+
+    async def run(name: str, vector: List[float]) -> List[Dict[str, Any]]:
+        backend_started = time.perf_counter()
+        try:
+            return await BACKEND_SEARCHES[name](params, vector)
+        finally:
+            timings[name] = round((time.perf_counter() - backend_started) * 1000, 2)
+
+    # 임베딩과 백엔드 내부 단계(벡터 조회, 재채점, 상세 조회)가 모두 같은 데드라인을 따르도록 설정
+    with request_deadline(deadline):
+        # 1. 임베딩은 한 번만 (모든 백엔드가 같은 Gemini 임베딩 공간을 사용)
+        vector = await aembedding_query(params)
+
+        # 2. 백엔드 동시 검색 (각 백엔드 결과는 기존 결과 캐시를 그대로 사용)
+        tasks = {name: asyncio.create_task(run(name, vector)) for name in backends}
+        # 임베딩에 쓴 시간을 뺀 나머지 시간만 백엔드를 기다림
+        wait_timeout = clamp_timeout(deadline)
+    done, pending = await asyncio.wait(tasks.values(), timeout=wait_timeout) if tasks else (set(), set())
+    for task in pending:
+        task.cancel()
+
+    # 3. 백엔드별 상태 정리
+    backend_results: Dict[str, List[Dict[str, Any]]] = {}
+    status: Dict[str, Dict[str, Any]] = {}
+    for name, task in tasks.items():
+        if task not in done:
+            print(f"⏱️ [FEDERATED] {name} 데드라인 초과로 제외 ({deadline}s)")
+            status[name] = {"status": "timeout"}
+            continue
+        try:
+            hits = task.result()
+        except DeadlineExceeded:
+            print(f"⏱️ [FEDERATED] {name} 데드라인 초과로 제외 ({deadline}s)")
+            status[name] = {"status": "timeout", "elapsed_ms": timings.get(name)}
+            continue
+        except CircuitOpenError as e:
+            status[name] = {"status": "circuit_open", "retry_after": round(e.retry_after, 2)}
+            continue
+        except UpstreamOverloaded as e:
+            status[name] = {"status": "overloaded", "retry_after": round(e.retry_after, 2)}
+            continue
+        except Exception as e:
+            print(f"⚠️ [FEDERATED] {name} 검색 중 에러 발생: {e}")
+            status[name] = {"status": "error", "error": str(e), "elapsed_ms": timings.get(name)}
+            continue
+        backend_results[name] = hits
+        status[name] = {"status": "ok", "count": len(hits), "elapsed_ms": timings.get(name)}
+
+    # 4. 순위 합치기
+    results = fuse_results(backend_results, params.return_count)
+    elapsed_ms = round((time.perf_counter() - started) * 1000, 2)
+    print(f"✅ [FEDERATED] {len(results)}건 반환 ({elapsed_ms}ms, 응답 백엔드: {list(backend_results)})")
+
+    return {
+        "results": results,
+        "backends": status,
+        "partial": len(backend_results) < len(backends),
+        "elapsed_ms": elapsed_ms,
+    }
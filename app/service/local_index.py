@@ -0,0 +1,479 @@
+# app/service/local_index.py
+import os
+import json
+import time
+import asyncio
+import numpy as np
+
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from dotenv import load_dotenv
+from typing import List, Dict, Any, Optional, Tuple
+from app.core.backends import lazy_import
+from app.core.database import get_supabase, get_weaviate
+from app.core.result_cache import result_cache
+from app.service.collection_router import extract_object_vector
+
+load_dotenv()
+
+wvc = lazy_import("weaviate.classes")
+
+# 로컬에 미러링할 컬렉션 목록 ("소스:이름" 콤마 구분, 예: "weaviate:Welfare_Doc,supabase:documents")
+LOCAL_INDEX_COLLECTIONS = os.getenv("LOCAL_INDEX_COLLECTIONS", "")
+
+# db_type="local"로 검색할 때 사용할 기본 인덱스 이름
+LOCAL_INDEX_DEFAULT = os.getenv("LOCAL_INDEX_DEFAULT", "Welfare_Doc")
+
+# 벡터 저장 정밀도 (float16: 절반 크기 / int8: 1/4 크기, 행별 스케일 사용)
+LOCAL_INDEX_DTYPE = os.getenv("LOCAL_INDEX_DTYPE", "float16").lower()
+
+# 인덱스 파일 저장 위치
+LOCAL_INDEX_DIR = os.getenv("LOCAL_INDEX_DIR", os.path.join(os.getcwd(), "data", "local_index"))
+
+# 증분 동기화 주기(초) / 삭제 반영을 위한 전체 동기화 주기(초)
+LOCAL_INDEX_SYNC_INTERVAL = float(os.getenv("LOCAL_INDEX_SYNC_INTERVAL", "300"))
+LOCAL_INDEX_FULL_SYNC_INTERVAL = float(os.getenv("LOCAL_INDEX_FULL_SYNC_INTERVAL", "86400"))
+
+# 소스 DB에서 한 번에 읽어올 객체 수
+LOCAL_INDEX_SYNC_BATCH = int(os.getenv("LOCAL_INDEX_SYNC_BATCH", "500"))
+
+# 검색 시 한 번에 float32로 변환하여 계산할 행 수
+SEARCH_BLOCK_ROWS = 4096
+
+
+def jsonb_contains(value: Any, pattern: Any) -> bool:
+    """Postgres jsonb `@>`(포함) 연산과 같은 규칙으로 metadata가 filter를 포함하는지 확인합니다."""
+    if isinstance(pattern, dict):
+        return isinstance(value, dict) and all(
+            key in value and jsonb_contains(value[key], item) for key, item in pattern.items()
+        )
+    if isinstance(pattern, list):
+        if not isinstance(value, list):
+            return False
+        return all(any(jsonb_contains(element, item) for element in value) for item in pattern)
+    if isinstance(value, list):
+        # 배열은 스칼라 원소를 포함할 수 있음 ('["a", "b"]' @> '"a"')
+        return any(jsonb_contains(element, pattern) for element in value)
+    return value == pattern
+
+
+@dataclass
+class IndexSnapshot:
+    """검색에 쓰는 인덱스 묶음 (동기화가 통째로 교체하므로 검색 도중 id와 행렬이 어긋나지 않음)"""
+    ids: List[str] = field(default_factory=list)
+    records: List[Dict[str, Any]] = field(default_factory=list)   # {"content", "metadata", "updated"}
+    matrix: Optional[np.ndarray] = None                           # (N, dim) float16 또는 int8
+    scales: Optional[np.ndarray] = None                           # int8일 때 행별 복원 스케일
+
+
+class LocalVectorIndex:
+    """
+    자주 검색되는 작은 컬렉션을 프로세스 메모리에 미러링한 벡터 인덱스입니다.
+    - 벡터: L2 정규화 후 float16 또는 int8로 양자화하여 .npy 파일(메모리 맵)로 저장
+    - 메타데이터: id / content / metadata / 수정 시각을 .json으로 저장
+    - 검색: 코퍼스가 작으므로 행렬-벡터 곱 1번의 brute-force 코사인 유사도 (네트워크 왕복 없음)
+    """
+
+    def __init__(self, name: str, source: str, dtype: str = LOCAL_INDEX_DTYPE, index_dir: str = LOCAL_INDEX_DIR):
+        self.name = name
+        self.source = source
+        self.dtype = dtype
+        self.index_dir = os.path.join(index_dir, name)
+
+        self.snapshot = IndexSnapshot()
+
+        self.last_sync: Optional[float] = None
+        self.last_full_sync: Optional[float] = None
+        self.cursor: Any = None                   # 소스별 증분 기준값 (수정 시각 또는 마지막 id)
+        self._warned_timestamps = False
+        self.searches = 0
+
+    @property
+    def ids(self) -> List[str]:
+        return self.snapshot.ids
+
+    @property
+    def records(self) -> List[Dict[str, Any]]:
+        return self.snapshot.records
+
+    @property
+    def matrix(self) -> Optional[np.ndarray]:
+        return self.snapshot.matrix
+
+    # ------------------------------------------------------------------
+    # 저장 / 불러오기
+    # ------------------------------------------------------------------
+    @property
+    def matrix_path(self) -> str:
+        return os.path.join(self.index_dir, "vectors.npy")
+
+    @property
+    def scales_path(self) -> str:
+        return os.path.join(self.index_dir, "scales.npy")
+
+    @property
+    def meta_path(self) -> str:
+        return os.path.join(self.index_dir, "meta.json")
+
+    def load(self) -> bool:
+        if not (os.path.exists(self.matrix_path) and os.path.exists(self.meta_path)):
+            return False
+        try:
+            with open(self.meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            if meta.get("dtype") != self.dtype:
+                print(f"⚠️ [LOCAL INDEX] {self.name} 저장 정밀도가 달라 다시 동기화합니다.")
+                return False
+            matrix = np.load(self.matrix_path, mmap_mode="r")
+            scales = np.load(self.scales_path, mmap_mode="r") if self.dtype == "int8" else None
+            # 벡터 / 스케일 / 메타 파일은 따로 교체되므로, 저장 도중 종료되면 행 수가 어긋날 수 있음 -> 전체 동기화
+            rows = {len(meta["ids"]), len(meta["records"]), matrix.shape[0]}
+            if scales is not None:
+                rows.add(scales.shape[0])
+            if len(rows) != 1:
+                print(f"⚠️ [LOCAL INDEX] {self.name} 파일 간 행 수가 맞지 않아 다시 동기화합니다.")
+                return False
+            self.snapshot = IndexSnapshot(meta["ids"], meta["records"], matrix, scales)
+            self.cursor = meta.get("cursor")
+            self.last_sync = meta.get("last_sync")
+            self.last_full_sync = meta.get("last_full_sync")
+            print(f"✅ [LOCAL INDEX] {self.name} 로드: {len(self.ids)}건")
+            return True
+        except Exception as e:
+            print(f"⚠️ [LOCAL INDEX] {self.name} 로드 실패: {e}")
+            return False
+
+    def _save(self, snapshot: IndexSnapshot) -> IndexSnapshot:
+        """스냅샷을 파일로 저장하고, 메모리 맵으로 다시 연 스냅샷을 반환합니다. (교체는 호출한 쪽에서)"""
+        os.makedirs(self.index_dir, exist_ok=True)
+
+        # 임시 파일에 쓴 뒤 교체하여, 검색 중인 메모리 맵이 깨지지 않도록 합니다.
+        np.save(self.matrix_path + ".tmp.npy", snapshot.matrix)
+        os.replace(self.matrix_path + ".tmp.npy", self.matrix_path)
+        if snapshot.scales is not None:
+            np.save(self.scales_path + ".tmp.npy", snapshot.scales)
+            os.replace(self.scales_path + ".tmp.npy", self.scales_path)
+
+        self._save_meta(snapshot)
+
+        return IndexSnapshot(
+            snapshot.ids,
+            snapshot.records,
+            np.load(self.matrix_path, mmap_mode="r"),
+            np.load(self.scales_path, mmap_mode="r") if snapshot.scales is not None else None,
+        )
+
+    def _save_meta(self, snapshot: Optional[IndexSnapshot] = None) -> None:
+        os.makedirs(self.index_dir, exist_ok=True)
+        snapshot = snapshot or self.snapshot
+        meta = {
+            "source": self.source,
+            "dtype": self.dtype,
+            "ids": snapshot.ids,
+            "records": snapshot.records,
+            "cursor": self.cursor,
+            "last_sync": self.last_sync,
+            "last_full_sync": self.last_full_sync,
+        }
+        with open(self.meta_path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False)
+        os.replace(self.meta_path + ".tmp", self.meta_path)
+
+    # ------------------------------------------------------------------
+    # 양자화
+    # ------------------------------------------------------------------
+    def _encode(self, vectors: np.ndarray) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        vectors = vectors.astype(np.float32)
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True) + 1e-12
+        if self.dtype == "int8":
+            scales = np.abs(vectors).max(axis=1) / 127.0 + 1e-12
+            quantized = np.round(vectors / scales[:, None]).astype(np.int8)
+            return quantized, scales.astype(np.float32)
+        return vectors.astype(np.float16), None
+
+    def _decode(self, snapshot: IndexSnapshot) -> np.ndarray:
+        if snapshot.matrix is None:
+            return np.zeros((0, 0), dtype=np.float32)
+        if snapshot.scales is not None:
+            return np.asarray(snapshot.matrix, dtype=np.float32) * np.asarray(snapshot.scales)[:, None]
+        return np.asarray(snapshot.matrix, dtype=np.float32)
+
+    # ------------------------------------------------------------------
+    # 동기화
+    # ------------------------------------------------------------------
+    def apply_changes(self, upserts: List[Tuple[str, List[float], Dict[str, Any]]], keep_ids: Optional[set] = None) -> None:
+        """
+        변경분을 반영하고 파일로 저장합니다.
+        upserts: (id, vector, record) 목록 / keep_ids: 전체 동기화일 때 소스에 남아있는 id 집합 (나머지는 삭제)
+        """
+        if not upserts and keep_ids is None:
+            return
+
+        previous = self.snapshot
+        current = self._decode(previous)
+        rows = {obj_id: i for i, obj_id in enumerate(previous.ids)}
+        ids, records = list(previous.ids), list(previous.records)
+        vectors = [current[i] for i in range(len(previous.ids))]
+
+        if upserts:
+            new_vectors = np.asarray([vector for _, vector, _ in upserts], dtype=np.float32)
+            new_vectors /= np.linalg.norm(new_vectors, axis=1, keepdims=True) + 1e-12
+            for (obj_id, _, record), vector in zip(upserts, new_vectors):
+                if obj_id in rows:
+                    vectors[rows[obj_id]] = vector
+                    records[rows[obj_id]] = record
+                else:
+                    rows[obj_id] = len(ids)
+                    ids.append(obj_id)
+                    records.append(record)
+                    vectors.append(vector)
+
+        if keep_ids is not None:
+            keep = [i for i, obj_id in enumerate(ids) if obj_id in keep_ids]
+            ids = [ids[i] for i in keep]
+            records = [records[i] for i in keep]
+            vectors = [vectors[i] for i in keep]
+
+        # 새 스냅샷을 모두 만든 뒤 속성 하나만 교체 (검색 중인 스레드는 이전 스냅샷을 끝까지 사용)
+        if not vectors:
+            snapshot = IndexSnapshot()
+            self._save_meta(snapshot)
+            self.snapshot = snapshot
+            return
+
+        matrix, scales = self._encode(np.stack(vectors))
+        self.snapshot = self._save(IndexSnapshot(ids, records, matrix, scales))
+
+    def _sync_weaviate(self, full: bool) -> Tuple[List, Optional[set]]:
+        collection = get_weaviate().collections.get(self.name)
+        upserts, seen = [], set() if full else None
+        metadata_query = wvc.query.MetadataQuery(last_update_time=True)
+
+        def to_upsert(obj):
+            vector = extract_object_vector(obj)
+            if not vector:
+                return None
+            # 수정 시각이 없으면(indexTimestamps 미설정) 임의 시각을 만들지 않고 None으로 두어 커서를 움직이지 않음
+            updated = obj.metadata.last_update_time.timestamp() if obj.metadata.last_update_time else None
+            record = {
+                "content": obj.properties.get("content", ""),
+                "metadata": obj.properties.get("metadata", {}),
+                "updated": updated,
+            }
+            return str(obj.uuid), vector, record
+
+        if full or self.cursor is None:
+            # 전체 동기화: 모든 객체를 순회하며 삭제된 id까지 반영
+            known = dict(zip(self.ids, self.records))
+            seen = set()
+            for obj in collection.iterator(include_vector=True, return_metadata=metadata_query):
+                item = to_upsert(obj)
+                if item is None:
+                    continue
+                seen.add(item[0])
+                previous = known.get(item[0])
+                if previous is None:
+                    upserts.append(item)
+                elif item[2]["updated"] is not None:
+                    if previous.get("updated") != item[2]["updated"]:
+                        upserts.append(item)
+                elif (previous.get("content"), previous.get("metadata")) != (item[2]["content"], item[2]["metadata"]):
+                    # 수정 시각이 없으면 내용이 바뀐 객체만 반영
+                    upserts.append(item)
+        else:
+            # 증분 동기화: 마지막 동기화 이후 수정된 객체만 조회 (indexTimestamps 설정 필요)
+            since = datetime.fromtimestamp(self.cursor, tz=timezone.utc)
+            offset = 0
+            while True:
+                result = collection.query.fetch_objects(
+                    filters=wvc.query.Filter.by_update_time().greater_than(since),
+                    include_vector=True,
+                    return_metadata=metadata_query,
+                    limit=LOCAL_INDEX_SYNC_BATCH,
+                    offset=offset
+                )
+                for obj in result.objects:
+                    item = to_upsert(obj)
+                    if item is not None:
+                        upserts.append(item)
+                if len(result.objects) < LOCAL_INDEX_SYNC_BATCH:
+                    break
+                offset += LOCAL_INDEX_SYNC_BATCH
+
+        updated_times = [record["updated"] for _, _, record in upserts if record["updated"] is not None]
+        if updated_times:
+            self.cursor = max([self.cursor or 0] + updated_times)
+        if len(updated_times) < len(upserts) and not self._warned_timestamps:
+            self._warned_timestamps = True
+            print(f"⚠️ [LOCAL INDEX] {self.name} 객체에 수정 시각이 없습니다. 증분 동기화에는 Weaviate "
+                  f"indexTimestamps 설정이 필요합니다. (설정 전까지 수정 시각이 없는 객체는 전체 동기화에서만 반영)")
+        return upserts, seen
+
+    def _sync_supabase(self, full: bool) -> Tuple[List, Optional[set]]:
+        # Supabase documents 테이블은 수정 시각 컬럼이 없으므로, 증가하는 id를 기준으로 증분 동기화합니다.
+        upserts, seen = [], set() if full else None
+        last_id = None if full else self.cursor
+
+        while True:
+            query = get_supabase().table(self.name).select("id, content, metadata, embedding").order("id").limit(LOCAL_INDEX_SYNC_BATCH)
+            if last_id is not None:
+                query = query.gt("id", last_id)
+            rows = query.execute().data
+            for row in rows:
+                vector = row.get("embedding")
+                if isinstance(vector, str):
+                    vector = json.loads(vector)
+                if not vector:
+                    continue
+                obj_id = str(row["id"])
+                if seen is not None:
+                    seen.add(obj_id)
+                upserts.append((obj_id, vector, {
+                    "content": row.get("content", ""),
+                    "metadata": row.get("metadata", {}),
+                    "updated": time.time(),
+                }))
+            if rows:
+                last_id = rows[-1]["id"]
+                self.cursor = max(self.cursor or last_id, last_id)
+            if len(rows) < LOCAL_INDEX_SYNC_BATCH:
+                break
+
+        return upserts, seen
+
+    def sync(self, full: bool = False) -> int:
+        """소스 DB와 동기화합니다. (동기 함수 - 백그라운드 스레드에서 실행) 반영된 변경 건수를 반환합니다."""
+        full = full or self.last_full_sync is None
+        if self.source == "weaviate":
+            upserts, seen = self._sync_weaviate(full)
+        elif self.source == "supabase":
+            upserts, seen = self._sync_supabase(full)
+        else:
+            raise ValueError(f"지원하지 않는 소스입니다: {self.source}")
+
+        now = time.time()
+        self.last_sync = now
+        if full:
+            self.last_full_sync = now
+
+        deleted = len(set(self.ids) - seen) if seen is not None else 0
+        self.apply_changes(upserts, keep_ids=seen)
+        if not upserts and not deleted and self.matrix is not None:
+            # 변경이 없어도 동기화 시각은 기록 (벡터 파일은 다시 쓰지 않음)
+            self._save_meta()
+
+        if upserts or deleted:
+            # 로컬 인덱스 데이터가 바뀌었으므로 db_type="local" 검색 결과 캐시 무효화
+            result_cache.bump_version("local")
+            print(f"✅ [LOCAL INDEX] {self.name} 동기화: 변경 {len(upserts)}건, 삭제 {deleted}건 (총 {len(self.ids)}건)")
+        return len(upserts) + deleted
+
+    # ------------------------------------------------------------------
+    # 검색
+    # ------------------------------------------------------------------
+    def search(self, vector: List[float], limit: int, filter: Optional[Dict[str, Any]] = None,
+               match_threshold: float = 0.0) -> List[Dict[str, Any]]:
+        """
+        코사인 유사도 상위 limit개를 fetch_vector_candidates와 같은 형태
+        ({"content", "metadata", "similarity"})로 반환합니다.
+        match_documents RPC와 같게 metadata가 filter를 포함(@>)하고 유사도가 match_threshold 이상인 문서만 반환합니다.
+        """
+        snapshot = self.snapshot
+        if snapshot.matrix is None or not snapshot.ids or limit <= 0:
+            return []
+
+        self.searches += 1
+        query = np.array(vector, dtype=np.float32)
+        query /= np.linalg.norm(query) + 1e-12
+
+        # float16/int8 행렬을 블록 단위로만 float32로 바꿔 계산 (메모리 사용량 유지 + BLAS 속도)
+        sims = np.empty(len(snapshot.ids), dtype=np.float32)
+        for start in range(0, len(snapshot.ids), SEARCH_BLOCK_ROWS):
+            block = np.asarray(snapshot.matrix[start:start + SEARCH_BLOCK_ROWS], dtype=np.float32)
+            sims[start:start + SEARCH_BLOCK_ROWS] = block @ query
+        if snapshot.scales is not None:
+            sims *= snapshot.scales
+
+        # top-k 전에 임계값 / 메타데이터 필터 적용 (걸러진 행은 -inf로 밀어냄)
+        sims[sims < match_threshold] = -np.inf
+        if filter:
+            for i, record in enumerate(snapshot.records):
+                if not jsonb_contains(record.get("metadata") or {}, filter):
+                    sims[i] = -np.inf
+
+        limit = min(limit, int(np.isfinite(sims).sum()))
+        if limit == 0:
+            return []
+        top = np.argpartition(-sims, limit - 1)[:limit]
+        top = top[np.argsort(-sims[top], kind="stable")]
+
+        return [
+            {
+                "content": snapshot.records[i]["content"],
+                "metadata": snapshot.records[i]["metadata"],
+                "similarity": float(sims[i]),
+            }
+            for i in top
+        ]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "source": self.source,
+            "dtype": self.dtype,
+            "size": len(self.ids),
+            "bytes": int(self.snapshot.matrix.nbytes) if self.snapshot.matrix is not None else 0,
+            "last_sync": self.last_sync,
+            "last_full_sync": self.last_full_sync,
+            "searches": self.searches,
+        }
+
+
+class LocalIndexRegistry:
+    """설정된 로컬 인덱스들을 관리하고 주기적으로 소스 DB와 동기화합니다."""
+
+    def __init__(self, spec: str = LOCAL_INDEX_COLLECTIONS):
+        self.indexes: Dict[str, LocalVectorIndex] = {}
+        for item in filter(None, (part.strip() for part in spec.split(","))):
+            source, _, name = item.partition(":")
+            if not name:
+                source, name = "weaviate", source
+            self.indexes[name] = LocalVectorIndex(name, source.lower())
+        self._sync_task: Optional[asyncio.Task] = None
+
+    def get(self, name: Optional[str] = None) -> Optional[LocalVectorIndex]:
+        return self.indexes.get(name or LOCAL_INDEX_DEFAULT)
+
+    async def sync_loop(self) -> None:
+        while True:
+            for index in self.indexes.values():
+                full = index.last_full_sync is None or time.time() - index.last_full_sync > LOCAL_INDEX_FULL_SYNC_INTERVAL
+                try:
+                    await asyncio.to_thread(index.sync, full)
+                except Exception as e:
+                    print(f"⚠️ [LOCAL INDEX] {index.name} 동기화 실패: {e}")
+            await asyncio.sleep(LOCAL_INDEX_SYNC_INTERVAL)
+
+    def start(self) -> None:
+        """앱 시작 시 디스크의 인덱스를 불러오고 백그라운드 동기화를 시작합니다."""
+        if not self.indexes:
+            return
+        for index in self.indexes.values():
+            index.load()
+        if self._sync_task is None:
+            self._sync_task = asyncio.get_running_loop().create_task(self.sync_loop())
+
+    async def stop(self) -> None:
+        if self._sync_task is not None:
+            self._sync_task.cancel()
+            try:
+                await self._sync_task
+            except asyncio.CancelledError:
+                pass
+            self._sync_task = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {name: index.stats() for name, index in self.indexes.items()}
+
+
+# 앱 전체에서 공유하는 로컬 인덱스 레지스트리
+local_indexes = LocalIndexRegistry()
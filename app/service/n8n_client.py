@@ -0,0 +1,286 @@
+# app/service/n8n_client.py
+import os
+import json
+import time
+import asyncio
+import httpx
+
+from dotenv import load_dotenv
+from typing import Any, Dict, List, Optional, Tuple
+
+load_dotenv()
+
+N8N_BASE_URL = os.getenv("N8N_BASE_URL")
+N8N_API_KEY = os.getenv("N8N_API_KEY")
+
+# n8n API 응답 대기 시간(초)
+N8N_TIMEOUT = float(os.getenv("N8N_TIMEOUT", "30"))
+
+# 커넥션 풀 크기 / keep-alive 유지 시간(초)
+N8N_MAX_CONNECTIONS = int(os.getenv("N8N_MAX_CONNECTIONS", "20"))
+
+N8N_MAX_KEEPALIVE = int(os.getenv("N8N_MAX_KEEPALIVE", "10"))
+
+N8N_KEEPALIVE_EXPIRY = float(os.getenv("N8N_KEEPALIVE_EXPIRY", "60"))
+
+# 노드 타입 카탈로그 재검증 주기(초). 지나면 ETag / Last-Modified로 변경 여부만 확인합니다.
+N8N_NODE_TYPES_TTL = float(os.getenv("N8N_NODE_TYPES_TTL", "3600"))
+
+# 찾는 노드가 없을 때 카탈로그를 다시 받기까지의 최소 간격(초) - 새로 설치된 커뮤니티 노드 반영용
+N8N_NODE_TYPES_MISS_REFRESH = float(os.getenv("N8N_NODE_TYPES_MISS_REFRESH", "60"))
+
+# 카탈로그 로컬 저장 경로 (서버 재시작 시 n8n에서 다시 받지 않음)
+N8N_NODE_TYPES_PATH = os.getenv("N8N_NODE_TYPES_PATH", os.path.join(os.getcwd(), "data", "n8n", "node_types.json"))
+
+# 앱 수명주기 동안 재사용하는 n8n 전용 HTTP 클라이언트 (요청마다 연결을 새로 맺지 않음)
+n8n_client: Optional[httpx.AsyncClient] = None
+_n8n_client_lock = asyncio.Lock()
+
+
+async def get_n8n_client() -> httpx.AsyncClient:
+    global n8n_client
+    if n8n_client is None:
+        async with _n8n_client_lock:
+            if n8n_client is None:
+                n8n_client = httpx.AsyncClient(
+                    base_url=N8N_BASE_URL or "",
+                    headers={"X-N8N-API-KEY": N8N_API_KEY or ""},
+                    timeout=N8N_TIMEOUT,
+                    limits=httpx.Limits(
+                        max_connections=N8N_MAX_CONNECTIONS,
+                        max_keepalive_connections=N8N_MAX_KEEPALIVE,
+                        keepalive_expiry=N8N_KEEPALIVE_EXPIRY,
+                    ),
+                )
+    return n8n_client
+
+
+async def close_n8n_client() -> None:
+    global n8n_client
+    if n8n_client is not None:
+        await n8n_client.aclose()
+        n8n_client = None
+
+
+def node_versions(node: Dict[str, Any]) -> List[float]:
+    """노드 정의의 version 필드(숫자 또는 숫자 목록)를 float 목록으로 변환합니다."""
+    version = node.get("version", 1)
+    versions = version if isinstance(version, list) else [version]
+    result = []
+    for value in versions:
+        try:
+            result.append(float(value))
+        except (TypeError, ValueError):
+            continue
+    return result or [1.0]
+
+
+class NodeTypeIndex:
+    """
+    n8n /node-types 카탈로그(수 MB)를 한 번만 받아 (노드 타입 이름, 버전) -> 정의로 색인합니다.
+    - 조회는 메모리 dict에서 O(1) (에이전트 단계마다 카탈로그 전체를 내려받지 않음)
+    - TTL이 지나면 If-None-Match / If-Modified-Since로 재검증하고, 304면 기존 색인을 그대로 사용
+    - 받은 카탈로그는 로컬 파일에 저장하여 재시작 시 바로 사용
+    """
+
+    def __init__(self, path: str = N8N_NODE_TYPES_PATH, ttl: float = N8N_NODE_TYPES_TTL,
+                 miss_refresh: float = N8N_NODE_TYPES_MISS_REFRESH):
+        self.path = path
+        self.ttl = ttl
+        self.miss_refresh = miss_refresh
+
+        self._by_version: Dict[Tuple[str, float], Dict[str, Any]] = {}
+        self._default: Dict[str, Dict[str, Any]] = {}
+        self._versions: Dict[str, List[float]] = {}
+
+        self.etag: Optional[str] = None
+        self.last_modified: Optional[str] = None
+        self.fetched_at: Optional[float] = None   # 카탈로그 본문을 마지막으로 받은 시각
+        self.checked_at: Optional[float] = None   # 마지막으로 n8n에 변경 여부를 확인한 시각
+        self.miss_checked_at: Optional[float] = None  # 찾는 노드가 없어서 마지막으로 재검증을 시도한 시각 (실패 포함)
+        self._loaded_from_disk = False
+        self._lock = asyncio.Lock()
+
+        # 모니터링용 카운터
+        self.hits = 0
+        self.misses = 0
+        self.downloads = 0
+        self.not_modified = 0
+
+    def _build(self, nodes: List[Dict[str, Any]]) -> None:
+        by_version: Dict[Tuple[str, float], Dict[str, Any]] = {}
+        default: Dict[str, Dict[str, Any]] = {}
+        versions: Dict[str, List[float]] = {}
+        for node in nodes:
+            name = node.get("name")
+            if not name:
+                continue
+            node_list = node_versions(node)
+            for version in node_list:
+                by_version[(name, version)] = node
+            versions[name] = sorted(set(versions.get(name, []) + node_list))
+
+            # 버전을 지정하지 않으면 defaultVersion, 없으면 가장 높은 버전의 정의를 사용
+            try:
+                default_version = float(node["defaultVersion"]) if node.get("defaultVersion") is not None else None
+            except (TypeError, ValueError):
+                # 잘못된 항목 1개 때문에 전체 색인이 실패하지 않도록 defaultVersion만 무시
+                default_version = None
+            current = default.get(name)
+            if default_version is not None and default_version in node_list:
+                default[name] = node
+            elif current is None or (current.get("defaultVersion") is None
+                                     and max(node_list) > max(node_versions(current))):
+                default[name] = node
+
+        # 색인 교체는 한 번에 (조회 중인 코루틴이 반쯤 만든 색인을 보지 않도록)
+        self._by_version, self._default, self._versions = by_version, default, versions
+
+    # ------------------------------------------------------------------
+    # 저장 / 불러오기
+    # ------------------------------------------------------------------
+    def _load_file(self) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"⚠️ [N8N] 노드 타입 캐시 파일 읽기 실패: {e}")
+            return None
+
+    def _save_file(self, payload: Dict[str, Any]) -> None:
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(payload, f, ensure_ascii=False, separators=(",", ":"))
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            print(f"⚠️ [N8N] 노드 타입 캐시 파일 저장 실패: {e}")
+
+    async def _load_from_disk(self) -> None:
+        self._loaded_from_disk = True
+        payload = await asyncio.to_thread(self._load_file)
+        if not payload or not isinstance(payload.get("nodes"), list):
+            return
+        await asyncio.to_thread(self._build, payload["nodes"])
+        self.etag = payload.get("etag")
+        self.last_modified = payload.get("last_modified")
+        self.fetched_at = payload.get("fetched_at")
+        self.checked_at = payload.get("checked_at", self.fetched_at)
+        print(f"✅ [N8N] 로컬 노드 타입 캐시 로드: {len(self._default)}개 노드")
+
+    # ------------------------------------------------------------------
+    # n8n에서 갱신
+    # ------------------------------------------------------------------
+    async def refresh(self, force: bool = False) -> None:
+        """카탈로그를 재검증합니다. 변경되었으면(200) 새로 색인하고 저장, 304면 확인 시각만 갱신합니다."""
+        client = await get_n8n_client()
+        headers = {}
+        if not force and self._default:
+            if self.etag:
+                headers["If-None-Match"] = self.etag
+            if self.last_modified:
+                headers["If-Modified-Since"] = self.last_modified
+
+        response = await client.get("/node-types", headers=headers)
+        now = time.time()
+        if response.status_code == 304:
+            self.not_modified += 1
+            self.checked_at = now
+            return
+        response.raise_for_status()
+
+        # 수 MB JSON 파싱 / 색인은 이벤트 루프를 막지 않도록 스레드에서 실행
+        nodes = await asyncio.to_thread(response.json)
+        if isinstance(nodes, dict):
+            # 응답이 {"data": [...]} 형태인 n8n 버전 대응
+            nodes = nodes.get("data", [])
+        await asyncio.to_thread(self._build, nodes)
+        self.etag = response.headers.get("etag")
+        self.last_modified = response.headers.get("last-modified")
+        self.fetched_at = self.checked_at = now
+        self.downloads += 1
+        print(f"✅ [N8N] 노드 타입 카탈로그 갱신: {len(self._default)}개 노드 ({len(response.content) / 1024:.0f} KiB)")
+
+        await asyncio.to_thread(self._save_file, {
+            "etag": self.etag,
+            "last_modified": self.last_modified,
+            "fetched_at": self.fetched_at,
+            "checked_at": self.checked_at,
+            "nodes": nodes,
+        })
+
+    def _is_stale(self) -> bool:
+        return self.checked_at is None or time.time() - self.checked_at >= self.ttl
+
+    async def ensure_fresh(self) -> None:
+        """처음 호출 시 로컬 파일을 읽고, TTL이 지났으면 재검증합니다. (동시에 들어온 요청은 1번만 갱신)"""
+        if self._loaded_from_disk and not self._is_stale():
+            return
+        async with self._lock:
+            if not self._loaded_from_disk:
+                await self._load_from_disk()
+            if self._is_stale():
+                try:
+                    await self.refresh()
+                except Exception as e:
+                    if not self._default:
+                        raise
+                    # n8n에 연결할 수 없어도 이전 카탈로그로 계속 응답 (다음 TTL까지 재시도 안 함)
+                    self.checked_at = time.time()
+                    print(f"⚠️ [N8N] 노드 타입 카탈로그 재검증 실패, 기존 캐시 사용: {e}")
+
+    def lookup(self, name: str, version: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        if version is None:
+            return self._default.get(name)
+        return self._by_version.get((name, float(version)))
+
+    async def get(self, name: str, version: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """노드 타입 정의를 반환합니다. 없으면 최근에 확인하지 않은 경우에 한해 카탈로그를 재검증하여 한 번 더 찾습니다."""
+        await self.ensure_fresh()
+        node = self.lookup(name, version)
+        if node is not None:
+            self.hits += 1
+            return node
+
+        self.misses += 1
+        if self._miss_refresh_due():
+            async with self._lock:
+                if self._miss_refresh_due():
+                    try:
+                        await self.refresh()
+                    except Exception as e:
+                        print(f"⚠️ [N8N] 노드 타입 카탈로그 재검증 실패, 기존 캐시 사용: {e}")
+                    finally:
+                        # 실패해도 miss_refresh 동안은 다시 시도하지 않음 (n8n 장애 시 조회마다 타임아웃 대기 방지)
+                        self.miss_checked_at = time.time()
+            node = self.lookup(name, version)
+        return node
+
+    def _miss_refresh_due(self) -> bool:
+        last = max(self.checked_at or 0.0, self.miss_checked_at or 0.0)
+        return time.time() - last >= self.miss_refresh
+
+    def versions(self, name: str) -> List[float]:
+        return self._versions.get(name, [])
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "nodes": len(self._default),
+            "entries": len(self._by_version),
+            "etag": self.etag,
+            "fetched_at": self.fetched_at,
+            "checked_at": self.checked_at,
+            "ttl": self.ttl,
+            "path": self.path,
+            "hits": self.hits,
+            "misses": self.misses,
+            "downloads": self.downloads,
+            "not_modified": self.not_modified,
+        }
+
+
+# 앱 전체에서 공유하는 노드 타입 색인
+node_type_index = NodeTypeIndex()
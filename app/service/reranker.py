@@ -0,0 +1,164 @@
+# app/service/reranker.py
+import os
+import re
+import numpy as np
+
+from functools import lru_cache
+from dotenv import load_dotenv
+from typing import List, Dict, Any, Optional, Tuple
+
+load_dotenv()
+
+# 키워드 1개 매칭 가산점 / 2-gram 1개 매칭 가산점
+KEYWORD_BONUS = 0.1
+GRAM_BONUS = 0.02
+
+# 후보 수가 이 값 이상이면, 벡터 점수만으로 Top-K에 들 수 없는 후보는 본문 스캔을 건너뜁니다. (0이면 사용 안 함)
+RERANK_PRUNE_MIN_CANDIDATES = int(os.getenv("RERANK_PRUNE_MIN_CANDIDATES", "1000"))
+
+# 가지치기 상한 계산 시 부동소수점 오차를 흡수하기 위한 여유값
+PRUNE_EPSILON = 1e-9
+
+
+def get_ngrams(text: str) -> set:
+    # JS: text.replace(/[^\wㄱ-ㅎ가-힣]/g, '')
+    # Python: 영문(a-z), 숫자(0-9), 밑줄(_), 한글(ㄱ-ㅎ, 가-힣)을 제외하고 모두 제거
+    clean_text = re.sub(r'[^a-zA-Z0-9_ㄱ-ㅎ가-힣]', '', text)
+
+    grams = set()
+    # 2글자씩 자르기
+    for i in range(len(clean_text) - 1):
+        grams.add(clean_text[i:i+2])
+    return grams
+
+
+class MultiPatternMatcher:
+    """
+    여러 패턴(키워드, 2-gram)을 본문 1회 스캔으로 모두 찾는 매처입니다.
+
+    `(?=(p1|p2|...))` 형태의 lookahead 정규식은 모든 위치에서 겹치는 매칭까지 찾아주지만,
+    한 위치에서는 하나의 패턴만 보고합니다. 그래서 서로 접두사 관계가 없는 패턴끼리 그룹을 묶어
+    (한 위치에서 최대 1개만 매칭 가능) 그룹당 정규식 1개로 컴파일합니다.
+    순수 파이썬 Aho–Corasick 구현보다 C 레벨 정규식 엔진이 훨씬 빠르기 때문에 이 방식을 사용합니다.
+    """
+
+    def __init__(self, patterns: List[str]):
+        self.patterns = sorted(set(p for p in patterns if p))
+        self._regexes = []
+
+        groups: List[List[str]] = []
+        for pattern in self.patterns:
+            for group in groups:
+                if not any(p.startswith(pattern) or pattern.startswith(p) for p in group):
+                    group.append(pattern)
+                    break
+            else:
+                groups.append([pattern])
+
+        for group in groups:
+            # 긴 패턴을 먼저 두어도 그룹 내에서는 결과가 같지만, 정규식 엔진의 분기를 줄여줍니다.
+            alternation = "|".join(re.escape(p) for p in sorted(group, key=len, reverse=True))
+            self._regexes.append(re.compile(f"(?=({alternation}))"))
+
+    def find(self, text: str) -> set:
+        """본문에 등장하는 패턴 집합을 반환합니다."""
+        found = set()
+        for regex in self._regexes:
+            found.update(regex.findall(text))
+        return found
+
+
+@lru_cache(maxsize=256)
+def build_query_plan(query_text: str) -> Tuple[MultiPatternMatcher, Dict[str, int], frozenset, float]:
+    """
+    질문 1개에 대한 채점 계획(매처, 키워드별 중복 횟수, 2-gram 집합, 최대 가산점)을 만듭니다.
+    같은 질문이 반복되는 경우가 많아 결과를 캐싱합니다.
+    """
+    # 키워드 (2글자 이상, 공백 기준 분리) - 중복 키워드는 기존 로직처럼 각각 가산점을 받습니다.
+    query_keywords = [w for w in query_text.split() if len(w) >= 2]
+    keyword_counts: Dict[str, int] = {}
+    for word in query_keywords:
+        keyword_counts[word] = keyword_counts.get(word, 0) + 1
+
+    # 2-gram
+    query_grams = frozenset(get_ngrams(query_text))
+
+    matcher = MultiPatternMatcher(list(keyword_counts) + list(query_grams))
+    max_bonus = KEYWORD_BONUS * len(query_keywords) + GRAM_BONUS * len(query_grams)
+
+    return matcher, keyword_counts, query_grams, max_bonus
+
+
+def select_top_k(scores: np.ndarray, indices: np.ndarray, k: Optional[int]) -> np.ndarray:
+    """
+    점수 내림차순 Top-K 인덱스를 반환합니다.
+    동점일 경우 원래 순서를 유지하여 list.sort(reverse=True)의 안정 정렬 결과와 동일하게 맞춥니다.
+    """
+    if k is not None and 0 <= k < len(indices):
+        if k == 0:
+            return indices[:0]
+        values = scores[indices]
+        # 부분 선택(O(n))으로 k번째 점수만 구한 뒤, 경계 동점은 앞쪽 후보부터 채웁니다.
+        kth = np.partition(values, len(values) - k)[len(values) - k]
+        above = indices[values > kth]
+        ties = indices[values == kth][:k - len(above)]
+        indices = np.concatenate([above, ties])
+
+    # 1순위: 점수 내림차순, 2순위: 원래 순서
+    order = np.lexsort((indices, -scores[indices]))
+    return indices[order]
+
+
+def rerank_candidates(raw_results: List[Dict[str, Any]], query_text: str, return_count: Optional[int],
+                      threshold: float = 0.6) -> List[Dict[str, Any]]:
+    """
+    벡터 후보군을 키워드/2-gram 가산점으로 재채점하고 상위 return_count개를 반환합니다.
+    점수 계산은 기존 루프(유사도 + 키워드당 0.1 + 2-gram당 0.02)와 비트 단위까지 동일합니다.
+    """
+    n = len(raw_results)
+    if n == 0:
+        return []
+
+    matcher, keyword_counts, query_grams, max_bonus = build_query_plan(query_text)
+
+    similarities = np.fromiter((doc.get('similarity', 0) for doc in raw_results), dtype=np.float64, count=n)
+    keyword_hits = np.zeros(n, dtype=np.int64)
+    gram_hits = np.zeros(n, dtype=np.int64)
+
+    # 후보가 많을 때: 최대 가산점을 받아도 Top-K나 컷트라인에 못 드는 후보는 본문 스캔 생략 (결과는 동일)
+    scan_mask = np.ones(n, dtype=bool)
+    if RERANK_PRUNE_MIN_CANDIDATES and n >= RERANK_PRUNE_MIN_CANDIDATES:
+        upper_bounds = similarities + max_bonus + PRUNE_EPSILON
+        scan_mask = upper_bounds > threshold
+        if return_count is not None and 0 < return_count < n:
+            # 가산점은 음수가 없으므로 k번째로 높은 '유사도'가 최종 k등 점수의 하한이 됩니다.
+            kth_similarity = np.partition(similarities, n - return_count)[n - return_count]
+            scan_mask &= upper_bounds >= kth_similarity
+
+    # 정밀 채점 (본문당 정규식 1회 스캔)
+    for i in np.flatnonzero(scan_mask):
+        content = raw_results[i].get('content', '') or ""
+        matched = matcher.find(content)
+        if not matched:
+            continue
+        keyword_hits[i] = sum(keyword_counts.get(p, 0) for p in matched)
+        gram_hits[i] = sum(1 for p in matched if p in query_grams)
+
+    # [로직 A] 키워드 매칭 (+0.1) - 기존처럼 0.1을 한 번씩 더해 부동소수점 결과를 동일하게 유지
+    scores = similarities.copy()
+    for step in range(int(keyword_hits.max())):
+        scores = np.where(keyword_hits > step, scores + KEYWORD_BONUS, scores)
+
+    # [로직 B] 2-gram 매칭 (+0.02)
+    scores = scores + gram_hits * GRAM_BONUS
+
+    # 최종 필터링 (가지치기된 후보는 제외)
+    passed = np.flatnonzero(scan_mask & (scores > threshold))
+
+    ranked_results = []
+    for i in select_top_k(scores, passed, return_count):
+        doc = raw_results[i]
+        doc['final_score'] = float(scores[i])
+        ranked_results.append(doc)
+
+    return ranked_results
@@ -1,204 +1,409 @@
-import re
 import os
-import weaviate.classes as wvc
-import google.generativeai as genai
+import json
+import asyncio
 
 from dotenv import load_dotenv
 from typing import List, Dict, Any, Union, Optional
+from concurrent.futures import ThreadPoolExecutor
 from app.schemas import SearchQuery, Neo4jSearchQuery
-from neo4j import AsyncGraphDatabase 
-from app.core.database import supabase, weaviate_client
+from app.core.backends import lazy_import
+from app.core.database import get_supabase, get_weaviate, get_genai, neo4j_session, get_supabase_async, get_supabase_pg_pool, SUPABASE_VECTOR_BACKEND
+from app.core.embedding_cache import embedding_cache
+from app.core.result_cache import result_cache, mark_degraded
+from app.core.deadline import DeadlineExceeded, with_deadline, check_deadline, clamp_timeout, hedged
+from app.core.circuit_breaker import breakers, CircuitOpenError
+from app.core.admission import admission, UpstreamOverloaded
+from app.core.metrics import span, observe_candidates
+from app.service.embedding_service import EmbeddingBatcher
+from app.service.reranker import get_ngrams, rerank_candidates
+from app.service.collection_router import collection_router, ROUTER_MODE
+from app.service.local_index import local_indexes, LOCAL_INDEX_DEFAULT
+from app.service.schema_cache import schema_cache
 
 load_dotenv()
 
-GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
+wvc = lazy_import("weaviate.classes")
+neo4j = lazy_import("neo4j")
 
-NEO4J_URI = os.getenv("NEO4J_URI")
+EMBEDDING_MODEL = "models/gemini-embedding-001"
 
-NEO4J_USER = os.getenv("NEO4J_USER")
+EMBEDDING_TASK_TYPE = "retrieval_query"
 
-NEO4J_PASSWORD = os.getenv("NEO4J_PASSWORD")
+# 벡터 DB에서 가져올 1차 후보 수 (재채점이 빨라져서 수천 개까지 올려도 됩니다)
+CANDIDATE_LIMIT = int(os.getenv("RERANK_CANDIDATE_LIMIT", "200"))
+
+# 재채점 후 최종 컷트라인
+FINAL_THRESHOLD = 0.6
+
+# 검색할 Weaviate 테이블(컬렉션) 목록
+TARGET_COLLECTIONS = [
+    "Ceo_message", "Resource", "Company", "Mutual_aid", "Welfare_Doc", 
+    "Receipt", "Admin_Support", "HR_Order", "Employee_News", "Partnership_PR", 
+    "Solution", "Talent_Recommendation", "Year_End_Tax", "Ai", "Etc"
+]
+
+# 테이블 동시 조회에 사용할 스레드 수 (Weaviate 동기 클라이언트 호출용)
+WEAVIATE_FANOUT_CONCURRENCY = int(os.getenv("WEAVIATE_FANOUT_CONCURRENCY", "16"))
+
+# 테이블 1개 조회 타임아웃(초)
+WEAVIATE_COLLECTION_TIMEOUT = float(os.getenv("WEAVIATE_COLLECTION_TIMEOUT", "3"))
+
+# 전체 테이블 조회 데드라인(초). 이 시간 안에 끝난 테이블 결과만 사용합니다.
+WEAVIATE_FANOUT_DEADLINE = float(os.getenv("WEAVIATE_FANOUT_DEADLINE", "4"))
+
+weaviate_executor = ThreadPoolExecutor(max_workers=WEAVIATE_FANOUT_CONCURRENCY, thread_name_prefix="weaviate")
+
+# async 경로에서 사용하는 논블로킹 임베딩 서비스 (마이크로 배칭 + 중복 합치기)
+embedding_batcher = EmbeddingBatcher(EMBEDDING_MODEL, EMBEDDING_TASK_TYPE)
+
+# match_documents RPC의 유사도 하한 (로컬 인덱스 검색에도 같은 값을 적용하여 결과를 맞춤)
+MATCH_DOCUMENTS_THRESHOLD = 0.2
+
+# RPC 경로와 같게 인자를 이름으로 전달 (함수의 인자 순서가 바뀌거나 오버로드가 추가되어도 같은 함수 / 인자로 호출)
+MATCH_DOCUMENTS_SQL = (
+    "SELECT * FROM match_documents("
+    "query_embedding => $1::text::vector, match_threshold => $2::float8, "
+    "match_count => $3::int, filter => $4::jsonb)"
+)
+
+async def match_supabase_documents(vector: List[float], params: SearchQuery, limit: int) -> List[Dict[str, Any]]:
+    """
+    Supabase의 match_documents 함수를 호출합니다. (SUPABASE_VECTOR_BACKEND 설정에 따라 경로 선택)
+    """
+    rpc_params = {
+        'query_embedding': vector,
+        'match_threshold': MATCH_DOCUMENTS_THRESHOLD,
+        'match_count': limit,
+        'filter': params.filter
+    }
+
+    # 1. Postgres 직접 연결 (asyncpg 풀 + 커넥션별 prepared statement 캐시)
+    if SUPABASE_VECTOR_BACKEND == "asyncpg":
+        pool = await get_supabase_pg_pool()
+        rows = await pool.fetch(
+            MATCH_DOCUMENTS_SQL,
+            json.dumps(vector), rpc_params['match_threshold'], limit, params.filter or {}
+        )
+        return [dict(row) for row in rows]
+
+    # 2. PostgREST 비동기 클라이언트 (HTTP/2 커넥션 재사용)
+    if SUPABASE_VECTOR_BACKEND == "async":
+        client = await get_supabase_async()
+        response = await client.rpc('match_documents', rpc_params).execute()
+        return response.data
+
+    # 3. 기존 동기 클라이언트 - 이벤트 루프를 막지 않도록 스레드에서 실행
+    response = await asyncio.to_thread(lambda: get_supabase().rpc('match_documents', rpc_params).execute())
+    return response.data
+
+def query_collection_near_vector(collection_name: str, vector: List[float], limit: int) -> List[Dict[str, Any]]:
+    """
+    단일 Weaviate 컬렉션에 벡터 검색을 수행합니다. (동기 함수 - 스레드 풀에서 실행됨)
+    """
+    collection = get_weaviate().collections.get(collection_name)
+    
+    # 벡터 검색 실행
+    result = collection.query.near_vector(
+        near_vector=vector,
+        limit=limit,
+        return_metadata=wvc.query.MetadataQuery(distance=True)
+    )
+    
+    # Supabase와 동일한 인터페이스로 데이터 변환
+    # similarity는 (1 - distance)로 계산하여 0~1 사이 값으로 맞춥니다.
+    formatted_results = []
+    for obj in result.objects:
+        formatted_results.append({
+            "content": obj.properties.get("content", ""),
+            "metadata": obj.properties.get("metadata", {}),
+            "similarity": 1 - (obj.metadata.distance if obj.metadata.distance is not None else 0)
+        })
+    return formatted_results
 
 async def fetch_vector_candidates(db_type: str, vector: List[float], params: SearchQuery, limit: int) -> List[Dict[str, Any]]:
     """
     지정된 DB에서 벡터 유사도 기반으로 후보군을 가져옵니다.
+    (읽기 전용 조회이므로 느린 응답에는 복제 요청(헤징)을 보내고, 요청 데드라인을 넘기면 취소합니다.
+     장애가 반복되는 백엔드는 서킷 브레이커가 차단하여 타임아웃까지 기다리지 않고 바로 실패합니다.)
     """
     if db_type.lower() == "supabase":
-        response = supabase.rpc('match_documents', {
-            'query_embedding': vector,
-            'match_threshold': 0.2,
-            'match_count': limit,
-            'filter': params.filter
-        }).execute()
-        return response.data
+        return await with_deadline(
+            breakers.get("supabase").call(
+                lambda: admission.get("supabase").run(
+                    lambda: hedged("supabase", lambda: match_supabase_documents(vector, params, limit))
+                )
+            ),
+            "vector_fetch"
+        )
     
     # 2. Weaviate 로직 추가
     elif db_type == "weaviate":
         collection_name = "Welfare_Doc" 
-        collection = weaviate_client.collections.get(collection_name)
-        
-        # 벡터 검색 실행
-        result = collection.query.near_vector(
-            near_vector=vector,
-            limit=limit,
-            return_metadata=wvc.query.MetadataQuery(distance=True)
+        loop = asyncio.get_running_loop()
+        return await with_deadline(
+            breakers.get(f"weaviate:{collection_name}").call(
+                lambda: admission.get("weaviate").run(
+                    lambda: hedged(
+                        f"weaviate:{collection_name}",
+                        lambda: loop.run_in_executor(weaviate_executor, query_collection_near_vector, collection_name, vector, limit)
+                    )
+                )
+            ),
+            "vector_fetch"
         )
-        
-        # Supabase와 동일한 인터페이스로 데이터 변환
-        # similarity는 (1 - distance)로 계산하여 0~1 사이 값으로 맞춥니다.
-        formatted_results = []
-        for obj in result.objects:
-            formatted_results.append({
-                "content": obj.properties.get("content", ""),
-                "metadata": obj.properties.get("metadata", {}),
-                "similarity": 1 - (obj.metadata.distance if obj.metadata.distance is not None else 0)
-            })
-        return formatted_results
-    
-    return []
 
-def get_ngrams(text: str) -> set:
-    # JS: text.replace(/[^\wㄱ-ㅎ가-힣]/g, '')
-    # Python: 영문(a-z), 숫자(0-9), 밑줄(_), 한글(ㄱ-ㅎ, 가-힣)을 제외하고 모두 제거
-    clean_text = re.sub(r'[^a-zA-Z0-9_ㄱ-ㅎ가-힣]', '', text)
+    # 3. 프로세스 내부 로컬 인덱스 (db_type="local" 또는 "local:컬렉션명")
+    elif db_type.lower().startswith("local"):
+        _, _, index_name = db_type.partition(":")
+        index = local_indexes.get(index_name or None)
+        if index is None:
+            print(f"⚠️ [LOCAL INDEX] '{index_name or LOCAL_INDEX_DEFAULT}' 인덱스가 설정되지 않았습니다.")
+            return []
+        return index.search(vector, limit, params.filter, MATCH_DOCUMENTS_THRESHOLD)
     
-    grams = set()
-    # 2글자씩 자르기
-    for i in range(len(clean_text) - 1):
-        grams.add(clean_text[i:i+2])
-    return grams
+    return []
 
 def embedding_query(params: Union[SearchQuery, Neo4jSearchQuery]) -> List[float]:
-    if GOOGLE_API_KEY:
-        genai.configure(api_key=GOOGLE_API_KEY)
-        
-    embedding_result = genai.embed_content(
-        model="models/gemini-embedding-001",
-        content=params.query_text, # 두 스키마(SearchQuery, Neo4jSearchQuery) 모두 query_text를 가지고 있으므로 정상 작동
-        task_type="retrieval_query"
-    )
+    # 두 스키마(SearchQuery, Neo4jSearchQuery) 모두 query_text를 가지고 있으므로 정상 작동
+    query_text = params.query_text
 
-    return embedding_result['embedding']
+    # 1. 캐시 조회 (같은 질문이 반복되면 Gemini 왕복 없이 바로 반환)
+    cached = embedding_cache.get(query_text, EMBEDDING_MODEL, EMBEDDING_TASK_TYPE)
+    if cached is not None:
+        return cached
+
+    # google.generativeai는 첫 호출 시 import + configure 됩니다.
+    embedding_result = breakers.get("gemini").call_sync(
+        lambda: get_genai().embed_content(
+            model=EMBEDDING_MODEL,
+            content=query_text,
+            task_type=EMBEDDING_TASK_TYPE
+        )
+    )
 
-async def search_logic(params: SearchQuery, db_type: str = "supabase") -> List[Dict[str, Any]]:
-    
-    vector = embedding_query(params)
+    vector = embedding_result['embedding']
 
-    CANDIDATE_LIMIT = 200
-    
-    raw_results = await fetch_vector_candidates(db_type, vector, params, CANDIDATE_LIMIT)
+    # 2. 캐시 저장
+    embedding_cache.set(query_text, EMBEDDING_MODEL, EMBEDDING_TASK_TYPE, vector)
 
-    if not raw_results:
-        return []
+    return vector
 
+async def aembedding_query(params: Union[SearchQuery, Neo4jSearchQuery]) -> List[float]:
+    """
+    embedding_query의 async 버전입니다. 이벤트 루프를 막지 않고,
+    동시에 들어온 질문들은 한 번의 Gemini 배치 호출로 묶어서 처리합니다.
+    """
     query_text = params.query_text
-    
-    # 키워드 (2글자 이상, 공백 기준 분리)
-    query_keywords = [w for w in query_text.split() if len(w) >= 2]
-    
-    # 2-gram (함수 사용)
-    query_grams = get_ngrams(query_text)
 
-    # 최종 컷트라인
-    FINAL_THRESHOLD = 0.6
-    ranked_results = []
+    cached = embedding_cache.get(query_text, EMBEDDING_MODEL, EMBEDDING_TASK_TYPE)
+    if cached is not None:
+        return cached
 
-    # 정밀 채점
-    for doc in raw_results:
-        content = doc.get('content', '') or ""
-        
-        # 기본 점수 (벡터 유사도)
-        # JS의 cosineSimilarity(queryVector, docVector)와 동일
-        score = doc.get('similarity', 0)
-        
-        # [로직 A] 키워드 매칭 (+0.1)
-        # JS: queryKeywords.forEach(word => { if (content.includes(word)) score += 0.1; });
-        for word in query_keywords:
-            if word in content:
-                score += 0.1
-        
-        # [로직 B] 2-gram 매칭 (+0.02)
-        # JS: queryGrams.forEach(gram => { if (content.includes(gram)) gramMatchCount++; });
-        gram_match_count = 0
-        for gram in query_grams:
-            if gram in content:
-                gram_match_count += 1
-        
-        score += (gram_match_count * 0.02)
+    # 임베딩 대기 요청 수를 제한하고, 대기열이 가득 차면 즉시 429로 돌려보냄
+    with span("embedding", backend="gemini"):
+        vector = await with_deadline(
+            admission.get("gemini").run(lambda: embedding_batcher.embed(query_text)),
+            "embedding"
+        )
 
-        # 최종 필터링
-        if score > FINAL_THRESHOLD:
-            doc['final_score'] = score
-            ranked_results.append(doc)
+    embedding_cache.set(query_text, EMBEDDING_MODEL, EMBEDDING_TASK_TYPE, vector)
 
-    # 점수 높은 순 정렬 (JS: b.score - a.score)
-    ranked_results.sort(key=lambda x: x['final_score'], reverse=True)
+    return vector
 
-    # 개수 제한 (JS: getCount)
-    return ranked_results[:params.return_count]
+def cache_params(params: Union[SearchQuery, Neo4jSearchQuery], **extra) -> Dict[str, Any]:
+    """결과 캐시 키에 들어갈 검색 파라미터 (질문 원문은 캐시에서 따로 정규화)"""
+    return {**params.model_dump(exclude={"query_text"}), **extra}
 
+async def search_logic(params: SearchQuery, db_type: str = "supabase", vector: Optional[List[float]] = None) -> List[Dict[str, Any]]:
+    """
+    벡터 검색 + 키워드 재채점 결과를 반환합니다.
+    같은 질문/파라미터의 결과는 백엔드 데이터 버전이 바뀌거나 TTL이 지날 때까지 캐시에서 바로 반환합니다.
+    (vector를 넘기면 임베딩을 다시 하지 않습니다 - 통합 검색에서 1번만 임베딩할 때 사용)
+    """
+    backend = db_type.lower().split(":")[0]
+    return await result_cache.get_or_compute(
+        backend, params.query_text, cache_params(params, endpoint="search_logic", db_type=db_type),
+        lambda: run_search_logic(params, db_type, vector)
+    )
 
-async def search_target_table(params: SearchQuery) -> List[Dict[str, Any]]:
-    # 1. 사용자 질문을 벡터로 변환 (Gemini 임베딩)
-    vector = embedding_query(params)
+async def run_search_logic(params: SearchQuery, db_type: str = "supabase", vector: Optional[List[float]] = None) -> List[Dict[str, Any]]:
     
-    # 2. 검색할 8개 테이블 목록
-    target_collections = [
-        "Ceo_message", "Resource", "Company", "Mutual_aid", "Welfare_Doc", 
-        "Receipt", "Admin_Support", "HR_Order", "Employee_News", "Partnership_PR", 
-        "Solution", "Talent_Recommendation", "Year_End_Tax", "Ai", "Etc"
-    ]
+    if vector is None:
+        vector = await aembedding_query(params)
+
+    backend = db_type.lower().split(":")[0]
+    with span("vector_fetch", backend=backend):
+        raw_results = await fetch_vector_candidates(db_type, vector, params, CANDIDATE_LIMIT)
+    observe_candidates("vector_fetch", len(raw_results), backend)
+
+    if not raw_results:
+        return []
+
+    check_deadline("rerank")
+
+    # 정밀 채점: 벡터 유사도 + 키워드(+0.1) + 2-gram(+0.02) 가산점을 한 번에 계산하고
+    # 최종 컷트라인(0.6)을 넘는 후보 중 점수 높은 순으로 return_count개만 선택
+    with span("rerank", backend=backend):
+        results = rerank_candidates(raw_results, params.query_text, params.return_count, threshold=FINAL_THRESHOLD)
+    observe_candidates("rerank", len(results), backend)
+    return results
+
+
+def query_collection_hybrid(collection_name: str, query_text: str, vector: List[float], limit: int) -> List[Dict[str, Any]]:
+    """
+    단일 Weaviate 컬렉션에 하이브리드 검색을 수행합니다. (동기 함수 - 스레드 풀에서 실행됨)
+    """
+    collection = get_weaviate().collections.get(collection_name)
     
-    limit_per_table = 3
+    result = collection.query.hybrid(
+        query=query_text,        # Sparse(키워드) 검색을 위한 원본 텍스트
+        vector=vector,           # Dense(의미) 검색을 위한 벡터
+        alpha=0.5,               # 💡 가중치 (0.0: 순수 키워드 ~ 1.0: 순수 벡터. 보통 0.5~0.7 사용)
+        limit=limit,
+        return_metadata=wvc.query.MetadataQuery(score=True)
+    )
     
-    # 💡 [변경 포인트] 전체를 합치지 않고, 테이블별로 결과를 보관할 딕셔너리 준비
-    table_results = {}
-    table_max_scores = {}
+    candidates = []
+    for obj in result.objects:
+        candidates.append({
+            "id": str(obj.uuid),
+            "collection": collection_name, # 💡 나중에 출처를 밝히기 위해 테이블명 기록
+            "content": obj.properties.get("content", ""),
+            "fileName": obj.properties.get("fileName", ""), # 파일명도 꼭 가져오세요
+            "similarity": obj.metadata.score if obj.metadata.score is not None else 0
+        })
+    return candidates
+
+async def fanout_hybrid(collection_names: List[str], query_text: str, vector: List[float], limit: int) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    여러 테이블에 하이브리드 검색을 동시에 수행하고, 데드라인 안에 끝난 테이블 결과만 모아 반환합니다.
+    빠진 테이블이 있으면 mark_degraded로 부분 결과임을 알려 결과 캐시에 저장되지 않게 합니다.
+    """
+    loop = asyncio.get_running_loop()
 
-    # 3. 각 테이블을 돌면서 벡터 검색 실행
-    for collection_name in target_collections:
+    # 요청 데드라인이 있으면 테이블별 타임아웃 / 전체 데드라인을 남은 시간으로 줄임
+    collection_timeout = clamp_timeout(WEAVIATE_COLLECTION_TIMEOUT)
+    fanout_deadline = clamp_timeout(WEAVIATE_FANOUT_DEADLINE)
+    check_deadline("weaviate_fanout")
+
+    async def timed_query(collection_name: str) -> List[Dict[str, Any]]:
         try:
-            collection = weaviate_client.collections.get(collection_name)
-            
-            result = collection.query.hybrid(
-                query=params.query_text, # Sparse(키워드) 검색을 위한 원본 텍스트
-                vector=vector,           # Dense(의미) 검색을 위한 벡터
-                alpha=0.5,               # 💡 가중치 (0.0: 순수 키워드 ~ 1.0: 순수 벡터. 보통 0.5~0.7 사용)
-                limit=limit_per_table,
-                return_metadata=wvc.query.MetadataQuery(score=True)
+            return await asyncio.wait_for(
+                hedged(
+                    f"weaviate:{collection_name}",
+                    lambda: loop.run_in_executor(
+                        weaviate_executor,
+                        query_collection_hybrid, collection_name, query_text, vector, limit
+                    )
+                ),
+                timeout=collection_timeout
             )
-            
-            candidates = []
-            max_score = 0           # 하이브리드 점수는 높을수록 좋습니다.
-            
-            # 4. 데이터 변환 및 이 테이블의 '최고 유사도' 찾기
-            for obj in result.objects:
-                score = obj.metadata.score if obj.metadata.score is not None else 0
-                
-                candidates.append({
-                    "id": str(obj.uuid),
-                    "collection": collection_name, # 💡 나중에 출처를 밝히기 위해 테이블명 기록
-                    "content": obj.properties.get("content", ""),
-                    "fileName": obj.properties.get("fileName", ""), # 파일명도 꼭 가져오세요
-                    "similarity": score
-                })
-                
-                # 가장 높은 유사도 갱신
-                if score > max_score:
-                    max_score = score
-            
-            # 검색 결과가 1개라도 있다면 딕셔너리에 저장
-            if candidates:
-                table_results[collection_name] = candidates
-                table_max_scores[collection_name] = max_score
+        except DeadlineExceeded:
+            raise
+        except asyncio.TimeoutError:
+            # 테이블 타임아웃이 아니라 클라이언트 예산(X-Request-Timeout)이 끝난 경우에는 DeadlineExceeded로 바꿔
+            # 서킷 브레이커 실패로 세지 않음 (짧은 예산을 보낸 요청 때문에 모든 사용자의 테이블이 차단되지 않도록)
+            check_deadline("weaviate_query")
+            raise
+
+    async def query_one(collection_name: str) -> List[Dict[str, Any]]:
+        # 느린 테이블(샤드)에는 p95 지연 후 복제 요청을 보내 먼저 온 응답을 사용
+        # 없는 테이블이나 계속 실패하는 테이블은 서킷 브레이커가 차단하여 즉시 건너뜀 (타임아웃 대기 없음)
+        # 동시에 실행되는 Weaviate 조회 수는 입장 제어로 제한 (넘치면 우선순위 대기열 / 429)
+        with span("weaviate_query", backend="weaviate", collection=collection_name):
+            return await breakers.get(f"weaviate:{collection_name}").call(
+                lambda: admission.get("weaviate").run(lambda: timed_query(collection_name))
+            )
+
+    tasks = {name: asyncio.create_task(query_one(name)) for name in collection_names}
+
+    # 전체 데드라인까지 끝난 테이블만 사용하고, 늦은 테이블은 기다리지 않음
+    done, pending = await asyncio.wait(tasks.values(), timeout=fanout_deadline)
+    for task in pending:
+        task.cancel()
+    if pending:
+        late = [name for name, task in tasks.items() if task in pending]
+        print(f"⏱️ [Weaviate] 데드라인 초과로 제외된 테이블: {late}")
+        mark_degraded(f"weaviate_fanout_late:{','.join(late)}")
+
+    table_results = {}
+    blocked = []
+    overloaded: Optional[UpstreamOverloaded] = None
+    for collection_name, task in tasks.items():
+        if task not in done:
+            continue
 
+        try:
+            candidates = task.result()
+        except CircuitOpenError:
+            blocked.append(collection_name)
+            mark_degraded(f"weaviate_circuit_open:{collection_name}")
+            continue
+        except UpstreamOverloaded as e:
+            overloaded = e
+            mark_degraded(f"weaviate_overloaded:{collection_name}")
+            continue
+        except DeadlineExceeded:
+            mark_degraded(f"weaviate_deadline:{collection_name}")
+            continue
+        except asyncio.TimeoutError:
+            print(f"⏱️ [Weaviate] {collection_name} 테이블 조회 타임아웃 ({collection_timeout:.2f}s)")
+            mark_degraded(f"weaviate_timeout:{collection_name}")
+            continue
         except Exception as e:
-            # 특정 테이블이 아직 생성되지 않았거나 에러가 발생해도 멈추지 않고 패스
+            # 특정 테이블이 아직 생성되지 않았거나 에러가 발생해도 멈추지 않고 패스 (결과는 부분 결과로 표시)
             print(f"⚠️ [Weaviate] {collection_name} 테이블 조회 중 에러 발생: {e}")
+            mark_degraded(f"weaviate_error:{collection_name}")
             continue
 
+        # 검색 결과가 1개라도 있다면 딕셔너리에 저장
+        observe_candidates("weaviate_query", len(candidates), "weaviate", collection_name)
+        if candidates:
+            table_results[collection_name] = candidates
+
+    if blocked:
+        print(f"⛔ [Weaviate] 서킷 브레이커로 건너뛴 테이블: {blocked}")
+
+    # 과부하로 한 테이블도 조회하지 못했다면 빈 결과 대신 429로 알림
+    if overloaded is not None and not table_results:
+        raise overloaded
+
+    return table_results
+
+async def search_target_table(params: SearchQuery, vector: Optional[List[float]] = None) -> List[Dict[str, Any]]:
+    # 1. 사용자 질문을 벡터로 변환 (Gemini 임베딩) - 이미 계산된 벡터가 있으면 재사용
+    if vector is None:
+        vector = await aembedding_query(params)
+    
+    limit_per_table = 3
+
+    # 2. 라우터로 검색할 테이블 후보 선정 (centroid 유사도 상위 N개)
+    with span("route", backend="weaviate"):
+        decision = collection_router.route(vector, TARGET_COLLECTIONS) if ROUTER_MODE != "off" else None
+    shadow = decision is not None and collection_router.should_shadow()
+    use_route = decision is not None and ROUTER_MODE == "on" and not decision.fallback and not shadow
+    collection_names = decision.collections if use_route else TARGET_COLLECTIONS
+
+    # 3. 선택된 테이블에 동시에 검색 요청 (테이블별 타임아웃 + 전체 데드라인)
+    # 💡 [변경 포인트] 전체를 합치지 않고, 테이블별로 결과를 보관
+    with span("weaviate_fanout", backend="weaviate"):
+        table_results = await fanout_hybrid(collection_names, params.query_text, vector, limit_per_table)
+    observe_candidates("weaviate_fanout", sum(len(candidates) for candidates in table_results.values()), "weaviate")
+
+    # 4. 테이블별 '최고 유사도' 찾기 (하이브리드 점수는 높을수록 좋습니다.)
+    table_max_scores = {
+        name: max(0, max(c["similarity"] for c in candidates))
+        for name, candidates in table_results.items()
+    }
+
+    if decision is not None:
+        best = max(table_max_scores, key=table_max_scores.get) if table_max_scores else None
+        collection_router.record(decision, best, shadow=not use_route)
+
     # 5. [핵심 로직] 가장 높은 최고 점수를 제출한 테이블 찾기
     if not table_max_scores:
+        # 결과가 없는 이유가 데드라인 초과라면 "결과 없음" 대신 타임아웃으로 알림
+        check_deadline("weaviate_fanout")
         print("⚠️ 모든 테이블에서 검색 결과를 찾을 수 없습니다.")
         return []
 
@@ -219,66 +424,75 @@ async def search_target_table(params: SearchQuery) -> List[Dict[str, Any]]:
     
     return top_results
 
+async def search_table_details(params: SearchQuery) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    테이블별 1차 검색(search_target_table) + 상세/관계도 조회(fetch_data_by_ids)를 한 번에 수행합니다.
+    1등 후보가 match_threshold에 못 미치면 상세 조회는 생략합니다. (결과는 캐시됩니다)
+    """
+    async def compute() -> Dict[str, List[Dict[str, Any]]]:
+        raw_candidates = await search_target_table(params)
+        details = []
+        if raw_candidates and raw_candidates[0].get('similarity', 0) >= params.match_threshold:
+            ids = [doc['id'] for doc in raw_candidates]
+            details = await fetch_data_by_ids(raw_candidates[0]['collection'], ids)
+        return {"candidates": raw_candidates, "details": details}
+
+    return await result_cache.get_or_compute(
+        "weaviate", params.query_text, cache_params(params, endpoint="search_table"), compute
+    )
+
 async def fetch_data_by_ids(table_name: str, ids: Union[str, List[str]]) -> List[Dict[str, Any]]:
     """
     1차 검색에서 찾은 IDs를 바탕으로 실제 데이터와 '연결된 관계도 데이터'를 한 번에 조회합니다.
+    (Weaviate 동기 호출은 스레드 풀에서 실행하고, 요청 데드라인을 넘기면 기다리지 않습니다.)
     """
     # 단일 ID(문자열)가 들어와도 리스트로 변환하여 에러 방지
     if isinstance(ids, str):
         ids = [ids]
-        
+
+    loop = asyncio.get_running_loop()
+    with span("detail_fetch", backend="weaviate", collection=table_name):
+        details = await with_deadline(
+            loop.run_in_executor(weaviate_executor, fetch_data_by_ids_sync, table_name, ids),
+            "detail_fetch"
+        )
+    if details is None:
+        # 조회 실패는 "상세 데이터 없음"과 구분하여 캐시하지 않음
+        mark_degraded(f"detail_fetch_error:{table_name}")
+        details = []
+    observe_candidates("detail_fetch", len(details), "weaviate", table_name)
+    return details
+
+def fetch_data_by_ids_sync(table_name: str, ids: List[str]) -> Optional[List[Dict[str, Any]]]:
+    """fetch_data_by_ids의 실제 조회 로직입니다. (동기 함수 - 스레드 풀에서 실행됨, 조회에 실패하면 None)"""
     try:
-        # 1. 컬렉션 객체 및 설정(Config) 가져오기
-        collection = weaviate_client.collections.get(table_name)
-        config = collection.config.get()
-        
-        return_references = []
+        # 1. 컬렉션 객체와 캐시된 참조 조회 계획 가져오기 (config.get() 왕복 생략)
+        collection = get_weaviate().collections.get(table_name)
+        plan = schema_cache.get_plan(table_name)
         wq = wvc.query
         
-        # 2. 스키마 분석: properties가 아닌 "references"를 바로 순회합니다! (핵심 💡)
-        if config.references:
-            for ref in config.references:
-                edge_name = ref.name
-                # 💡 스키마에 target_collections(리스트) 속성이 있는 경우 = 다중 타겟 (Multi-target)
-                if hasattr(ref, 'target_collections') and ref.target_collections:
-                    for target in ref.target_collections:
-                        return_references.append(
-                            wq.QueryReference.MultiTarget( 
-                                link_on=edge_name,
-                                target_collection=target,
-                                return_properties=["content", "fileName"]
-                            )
-                        )
-                # 💡 단일 타겟 (Single-target)인 경우
-                elif hasattr(ref, 'target_collection') and ref.target_collection:
-                    return_references.append(
-                        wq.QueryReference( 
-                            link_on=edge_name,
-                            return_properties=["content", "fileName"]
-                        )
-                    )
-        
-        # 3. 데이터 조회 (동적으로 생성된 return_references 사용)
+        # 2. 데이터 조회 (미리 계산된 return_references 사용)
         result = collection.query.fetch_objects(
             filters=wq.Filter.by_id().contains_any(ids),
-            return_references=return_references if return_references else None
+            return_references=plan.return_references if plan.return_references else None
         )
         
         final_results = []
         
-        # 4. Agent가 읽기 좋게 원본 내용과 관계도 내용을 하나로 합치기
+        # 3. Agent가 읽기 좋게 원본 내용과 관계도 내용을 하나로 합치기
         for obj in result.objects:
             main_content = obj.properties.get("content", "")
             file_name = obj.properties.get("fileName", "")
             
             cross_ref_content = ""
             
-            # 연결된 데이터가 있다면 텍스트로 풀어주기
-            if edge_name and obj.references and edge_name in obj.references:
-                for ref_obj in obj.references[edge_name].objects:
-                    ref_text = ref_obj.properties.get("content", "")
-                    ref_file = ref_obj.properties.get("fileName", "")
-                    cross_ref_content += f"\n[참조 문서: {ref_file}] {ref_text}"
+            # 모든 관계(edge)에 연결된 데이터를 텍스트로 풀어주기
+            for edge_name in plan.edge_names:
+                if obj.references and edge_name in obj.references:
+                    for ref_obj in obj.references[edge_name].objects:
+                        ref_text = ref_obj.properties.get("content", "")
+                        ref_file = ref_obj.properties.get("fileName", "")
+                        cross_ref_content += f"\n[참조 문서: {ref_file}] {ref_text}"
             
             final_results.append({
                 "id": str(obj.uuid),
@@ -292,7 +506,7 @@ async def fetch_data_by_ids(table_name: str, ids: Union[str, List[str]]) -> List
         
     except Exception as e:
         print(f"⚠️ [{table_name}] ID 기반 데이터 조회 중 에러 발생: {e}")
-        return []
+        return None
     
 
 async def search_neo4j_graph(params: Neo4jSearchQuery, vector: List[float]) -> List[Dict[str, Any]]:
@@ -364,17 +578,38 @@ async def search_neo4j_graph(params: Neo4jSearchQuery, vector: List[float]) -> L
     LIMIT $limit
     """
     
-    driver = AsyncGraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USER, NEO4J_PASSWORD))
-    
-    try:
-        async with driver.session() as session:
+    # 요청 데드라인이 있으면 남은 시간을 Neo4j 트랜잭션 타임아웃으로 넘겨 서버 쪽 쿼리도 함께 중단되게 합니다.
+    check_deadline("neo4j_query")
+    query_timeout = clamp_timeout(None)
+    query = neo4j.Query(cypher_query, timeout=query_timeout) if query_timeout else cypher_query
+
+    async def run_query() -> List[Dict[str, Any]]:
+        # 앱 수명주기 동안 유지되는 공유 드라이버의 커넥션 풀을 사용합니다. (요청마다 연결/종료하지 않음)
+        async with neo4j_session() as session:
             result = await session.run(
-                cypher_query, 
+                query, 
                 limit=params.match_count,       # 스키마에서 매치 카운트 가져오기
                 query_embedding=vector,         # 외부에서 주입받은 임베딩 벡터
                 category=params.category,       # 스키마에서 카테고리 가져오기 (없으면 None)
                 file_name=params.file_name      # 스키마에서 파일명 가져오기 (없으면 None)
             )
             return await result.data()
-    finally:
-        await driver.close()
\ No newline at end of file
+
+    with span("neo4j_query", backend="neo4j"):
+        records = await with_deadline(
+            breakers.get("neo4j").call(lambda: admission.get("neo4j").run(run_query)),
+            "neo4j_query"
+        )
+    observe_candidates("neo4j_query", len(records), "neo4j")
+    return records
+
+
+async def search_neo4j_by_text(params: Neo4jSearchQuery, vector: Optional[List[float]] = None) -> List[Dict[str, Any]]:
+    """질문 임베딩 + Neo4j 그래프 검색을 수행합니다. (결과는 캐시됩니다)"""
+    async def compute() -> List[Dict[str, Any]]:
+        query_vector = vector if vector is not None else await aembedding_query(params)
+        return await search_neo4j_graph(params, query_vector)
+
+    return await result_cache.get_or_compute(
+        "neo4j", params.query_text, cache_params(params, endpoint="search_neo4j"), compute
+    )
@@ -0,0 +1,129 @@
+# app/service/schema_cache.py
+import os
+import time
+import threading
+
+from dotenv import load_dotenv
+from dataclasses import dataclass, field
+from typing import List, Dict, Any, Optional
+from app.core.backends import lazy_import
+from app.core.database import get_weaviate
+
+load_dotenv()
+
+wvc = lazy_import("weaviate.classes")
+
+# 컬렉션 스키마(참조 관계) 캐시 유효 시간(초)
+SCHEMA_CACHE_TTL = float(os.getenv("SCHEMA_CACHE_TTL", "600"))
+
+# 참조 문서에서 가져올 속성
+REFERENCE_PROPERTIES = ["content", "fileName"]
+
+
+@dataclass
+class ReferencePlan:
+    """컬렉션 1개에 대해 미리 계산해 둔 fetch_objects 참조 조회 계획"""
+    return_references: List[Any] = field(default_factory=list)
+    edge_names: List[str] = field(default_factory=list)
+    loaded_at: float = 0.0
+
+
+def build_reference_plan(collection_name: str) -> ReferencePlan:
+    """
+    컬렉션 설정(Config)의 references를 분석하여 QueryReference 목록과 관계(edge) 이름 목록을 만듭니다.
+    (Weaviate 왕복 1회 - 캐시가 비었거나 만료되었을 때만 호출)
+    """
+    collection = get_weaviate().collections.get(collection_name)
+    config = collection.config.get()
+
+    wq = wvc.query
+    plan = ReferencePlan(loaded_at=time.time())
+
+    # 스키마 분석: properties가 아닌 "references"를 바로 순회합니다! (핵심 💡)
+    for ref in config.references or []:
+        edge_name = ref.name
+        # 💡 스키마에 target_collections(리스트) 속성이 있는 경우 = 다중 타겟 (Multi-target)
+        if hasattr(ref, 'target_collections') and ref.target_collections:
+            for target in ref.target_collections:
+                plan.return_references.append(
+                    wq.QueryReference.MultiTarget(
+                        link_on=edge_name,
+                        target_collection=target,
+                        return_properties=REFERENCE_PROPERTIES
+                    )
+                )
+        # 💡 단일 타겟 (Single-target)인 경우
+        elif hasattr(ref, 'target_collection') and ref.target_collection:
+            plan.return_references.append(
+                wq.QueryReference(
+                    link_on=edge_name,
+                    return_properties=REFERENCE_PROPERTIES
+                )
+            )
+        else:
+            continue
+
+        if edge_name not in plan.edge_names:
+            plan.edge_names.append(edge_name)
+
+    return plan
+
+
+class CollectionSchemaCache:
+    """
+    거의 바뀌지 않는 컬렉션 스키마(참조 관계)를 캐싱하여
+    fetch_data_by_ids가 매 요청마다 collection.config.get()을 호출하지 않도록 합니다.
+    """
+
+    def __init__(self, ttl: float = SCHEMA_CACHE_TTL):
+        self.ttl = ttl
+        self._plans: Dict[str, ReferencePlan] = {}
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.loads = 0
+
+    def get_plan(self, collection_name: str) -> ReferencePlan:
+        """참조 조회 계획을 반환합니다. (동기 함수 - 캐시 미스일 때 Weaviate 호출)"""
+        plan = self._plans.get(collection_name)
+        if plan is not None and (self.ttl <= 0 or time.time() - plan.loaded_at < self.ttl):
+            self.hits += 1
+            return plan
+
+        plan = build_reference_plan(collection_name)
+        with self._lock:
+            self._plans[collection_name] = plan
+            self.loads += 1
+        return plan
+
+    def invalidate(self, collection_name: Optional[str] = None) -> None:
+        """스키마 변경 후 호출합니다. 이름이 없으면 전체 무효화."""
+        with self._lock:
+            if collection_name is None:
+                self._plans.clear()
+            else:
+                self._plans.pop(collection_name, None)
+
+    def warm(self, collection_names: List[str]) -> None:
+        """앱 시작 시 모든 컬렉션의 조회 계획을 미리 만들어 둡니다. (백그라운드 스레드에서 실행)"""
+        loaded = 0
+        for collection_name in collection_names:
+            try:
+                self.invalidate(collection_name)
+                self.get_plan(collection_name)
+                loaded += 1
+            except Exception as e:
+                print(f"⚠️ [SCHEMA CACHE] {collection_name} 스키마 조회 실패: {e}")
+        print(f"✅ [SCHEMA CACHE] {loaded}/{len(collection_names)}개 컬렉션 스키마 준비 완료")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "ttl": self.ttl,
+            "collections": {name: plan.edge_names for name, plan in self._plans.items()},
+            "hits": self.hits,
+            "loads": self.loads,
+        }
+
+
+# 앱 전체에서 공유하는 스키마 캐시 인스턴스
+schema_cache = CollectionSchemaCache()
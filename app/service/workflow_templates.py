@@ -0,0 +1,519 @@
+# app/service/workflow_templates.py
+import re
+import json
+import uuid
+import threading
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.service.asset_catalog import AssetCatalog, AssetEntry, asset_catalog, minify, byte_size, STICKY_NOTE_TYPE
+from app.service.n8n_client import node_type_index
+from app.service.n8n_manager import upload_workflow_to_n8n
+
+# 조립 시 템플릿(단계) 사이의 가로 간격 (n8n 캔버스 좌표)
+STEP_GAP_X = 400
+
+# 업로드할 워크플로우 기본 settings (자산 JSON에는 settings가 없음)
+DEFAULT_SETTINGS = {"executionOrder": "v1"}
+
+# templateParameters의 path가 가리킬 수 있는 노드 필드 (parameters는 하위 키까지 지정해야 함)
+NODE_PARAMETER_FIELDS = (
+    "parameters", "credentials", "disabled", "notes", "notesInFlow", "alwaysOutputData", "executeOnce",
+    "retryOnFail", "maxTries", "waitBetweenTries", "onError",
+)
+
+# 노드 이름을 참조하는 n8n 표현식: $('이름'), $("이름"), $node['이름'], $node["이름"]
+NODE_REFERENCE_PATTERN = re.compile(r"""(\$\(\s*|\$node\[\s*)(['"])(.+?)\2""")
+
+
+def is_trigger(node_type: str) -> bool:
+    short = node_type.rsplit(".", 1)[-1].lower()
+    return "trigger" in short or short == "webhook"
+
+
+def deep_merge(base: Any, override: Any) -> Any:
+    """dict는 키 단위로 합치고, 그 밖의 값(list 포함)은 override로 교체합니다."""
+    if isinstance(base, dict) and isinstance(override, dict):
+        merged = dict(base)
+        for key, value in override.items():
+            merged[key] = deep_merge(base.get(key), value) if key in base else value
+        return merged
+    return override
+
+
+def check_path(path: Any) -> Optional[str]:
+    """templateParameters의 path가 올바른지 확인합니다. 문제가 있으면 이유를 반환합니다."""
+    if not isinstance(path, str) or not path:
+        return "path가 비어 있습니다."
+    keys = path.split(".")
+    if keys[0] not in NODE_PARAMETER_FIELDS:
+        return f"path '{path}'는 parameters. 또는 {', '.join(NODE_PARAMETER_FIELDS[1:])} 중 하나로 시작해야 합니다."
+    if keys[0] == "parameters" and len(keys) < 2:
+        return f"path '{path}'에 parameters 하위 키가 없습니다. (예: parameters.sendTo)"
+    if any(not key for key in keys):
+        return f"path '{path}'에 빈 키가 있습니다."
+    return None
+
+
+def set_path(target: Dict[str, Any], path: str, value: Any) -> None:
+    """
+    'parameters.options.subject' / 'parameters.items.0.value' 형식의 경로에 값을 넣습니다. (없는 중간 dict는 생성)
+    리스트 위치가 없거나 숫자가 아니면 IndexError / ValueError, 중간 값이 dict / list가 아니면 TypeError가 발생합니다.
+    """
+    keys = path.split(".")
+    current: Any = target
+    for key in keys[:-1]:
+        if isinstance(current, list):
+            current = current[int(key)]
+            continue
+        if not isinstance(current, dict):
+            raise TypeError(f"'{key}' 앞의 값이 객체가 아닙니다.")
+        if current.get(key) is None:
+            current[key] = {}
+        current = current[key]
+    last = keys[-1]
+    if isinstance(current, list):
+        current[int(last)] = value
+    elif isinstance(current, dict):
+        current[last] = value
+    else:
+        raise TypeError(f"'{last}' 앞의 값이 객체가 아닙니다.")
+
+
+def iter_links(connections: Dict[str, Any]):
+    """connections를 (출발 노드, 연결 종류, 출력 번호, 도착 노드, 입력 번호) 단위로 펼칩니다."""
+    for source, outputs in connections.items():
+        for kind, branches in (outputs or {}).items():
+            for output, branch in enumerate(branches or []):
+                for link in branch or []:
+                    yield source, kind, output, link.get("node"), link.get("index", 0)
+
+
+def add_link(connections: Dict[str, Any], source: str, target: str, kind: str = "main",
+             output: int = 0, index: int = 0) -> None:
+    branches = connections.setdefault(source, {}).setdefault(kind, [])
+    while len(branches) <= output:
+        branches.append([])
+    link = {"node": target, "type": kind, "index": index}
+    if link not in branches[output]:
+        branches[output].append(link)
+
+
+@dataclass
+class WorkflowTemplate:
+    """
+    자산(워크플로우 JSON)을 조립용으로 미리 분석해 둔 템플릿입니다.
+    - nodes_json: Sticky Note를 뺀 노드 목록 (공백 없는 JSON, 사용할 때마다 json.loads로 복사)
+    - entry / exit: main 연결 기준 시작 / 끝 노드 (AI 모델 / 도구 / 메모리 같은 하위 노드 제외)
+    - parameters: 자산 JSON의 templateParameters에 선언된 파라미터 {이름: {node, path, default, required, description}}
+    """
+    id: str
+    key: Tuple[str, int, int]
+    description: str
+    nodes_json: str
+    connections_json: str
+    node_summary: List[Dict[str, Any]]
+    entry_nodes: List[str]
+    exit_nodes: List[str]
+    trigger_nodes: List[str]
+    parameters: Dict[str, Dict[str, Any]]
+    credentials: List[Dict[str, Any]]
+    settings: Dict[str, Any] = field(default_factory=dict)
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "description": self.description,
+            "nodes": self.node_summary,
+            "entry_nodes": self.entry_nodes,
+            "exit_nodes": self.exit_nodes,
+            "trigger_nodes": self.trigger_nodes,
+            "parameters": self.parameters,
+            "credentials": self.credentials,
+        }
+
+
+def compile_template(entry: AssetEntry) -> WorkflowTemplate:
+    data = entry.data
+    nodes = [node for node in data.get("nodes", []) if node.get("type") != STICKY_NOTE_TYPE]
+    names = {node.get("name") for node in nodes}
+    connections = {
+        source: outputs for source, outputs in (data.get("connections") or {}).items() if source in names
+    }
+
+    has_main_in, has_main_out, sub_nodes = set(), set(), set()
+    for source, kind, _, target, _ in iter_links(connections):
+        if kind == "main":
+            has_main_out.add(source)
+            has_main_in.add(target)
+        else:
+            # ai_languageModel / ai_tool / ai_memory 등으로 다른 노드에 붙는 하위 노드
+            sub_nodes.add(source)
+
+    flow_nodes = [node.get("name") for node in nodes if node.get("name") not in sub_nodes]
+    credentials = [
+        {"node": node.get("name"), "types": sorted((node.get("credentials") or {}).keys())}
+        for node in nodes if node.get("credentials")
+    ]
+    return WorkflowTemplate(
+        id=entry.id,
+        key=(entry.path, entry.mtime_ns, entry.size),
+        description=str(entry.description or ""),
+        nodes_json=minify(nodes),
+        connections_json=minify(connections),
+        node_summary=[
+            {"name": node.get("name"), "type": node.get("type"), "parameters": sorted((node.get("parameters") or {}).keys())}
+            for node in nodes
+        ],
+        entry_nodes=[name for name in flow_nodes if name not in has_main_in],
+        exit_nodes=[name for name in flow_nodes if name not in has_main_out],
+        trigger_nodes=[node.get("name") for node in nodes if is_trigger(node.get("type", ""))],
+        parameters=dict(data.get("templateParameters") or {}),
+        credentials=credentials,
+        settings=dict(data.get("settings") or {}),
+    )
+
+
+class TemplateRegistry:
+    """자산 카탈로그의 워크플로우 자산을 템플릿으로 컴파일하여 보관합니다. (자산 파일이 바뀌면 다시 컴파일)"""
+
+    def __init__(self, catalog: AssetCatalog = asset_catalog):
+        self.catalog = catalog
+        self._templates: Dict[str, WorkflowTemplate] = {}
+        self._lock = threading.Lock()
+        self.compiled = 0
+
+    def get(self, template_id: str) -> Optional[WorkflowTemplate]:
+        entry = self.catalog.get(template_id)
+        if entry is None or not entry.is_workflow:
+            return None
+        template = self._templates.get(template_id)
+        if template is None or template.key != (entry.path, entry.mtime_ns, entry.size):
+            with self._lock:
+                template = compile_template(entry)
+                self._templates[template_id] = template
+                self.compiled += 1
+        return template
+
+    def describe(self, template_ids: List[str]) -> List[Dict[str, Any]]:
+        results = []
+        for template_id in template_ids:
+            template = self.get(template_id)
+            if template is None:
+                results.append({"id": template_id, "error": f"Template {template_id} not found (워크플로우 JSON 자산만 사용 가능)"})
+            else:
+                results.append(template.describe())
+        return results
+
+    def stats(self) -> Dict[str, Any]:
+        return {"templates": len(self._templates), "compiled": self.compiled}
+
+
+@dataclass
+class ComposeResult:
+    workflow: Dict[str, Any]
+    errors: List[str] = field(default_factory=list)
+    warnings: List[str] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return not self.errors
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "nodes": len(self.workflow.get("nodes", [])),
+            "connections": sum(1 for _ in iter_links(self.workflow.get("connections", {}))),
+            "bytes": byte_size(minify(self.workflow)),
+        }
+
+
+def _rename_references(value: Any, renames: Dict[str, str]) -> Any:
+    """파라미터 안의 $('이름') / $node['이름'] 표현식을 바뀐 노드 이름으로 고칩니다."""
+    if isinstance(value, str):
+        if "$" not in value:
+            return value
+        return NODE_REFERENCE_PATTERN.sub(
+            lambda m: f"{m.group(1)}{m.group(2)}{renames.get(m.group(3), m.group(3))}{m.group(2)}", value
+        )
+    if isinstance(value, dict):
+        return {key: _rename_references(item, renames) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_rename_references(item, renames) for item in value]
+    return value
+
+
+def _referenced_nodes(value: Any, found: set) -> set:
+    if isinstance(value, str):
+        if "$" in value:
+            found.update(m.group(3) for m in NODE_REFERENCE_PATTERN.finditer(value))
+    elif isinstance(value, dict):
+        for item in value.values():
+            _referenced_nodes(item, found)
+    elif isinstance(value, list):
+        for item in value:
+            _referenced_nodes(item, found)
+    return found
+
+
+def _unique_name(name: str, used: set) -> str:
+    if name not in used:
+        return name
+    number = 2
+    while f"{name} {number}" in used:
+        number += 1
+    return f"{name} {number}"
+
+
+def _step_targets(template: WorkflowTemplate, renames: Dict[str, str], connections: Dict[str, Any],
+                  removed: set) -> Tuple[List[str], List[str]]:
+    """
+    앞 단계에서 이어 붙일 이 단계의 입력 노드(최종 이름)를 반환합니다.
+    시작 노드가 트리거뿐이면 트리거는 입력이 없으므로 제거 목록(removed)에 넣고 트리거 다음 노드를 입력으로 사용합니다.
+    반환: (입력 노드 목록, 제거한 트리거 목록)
+    """
+    targets = [renames[name] for name in template.entry_nodes if name not in template.trigger_nodes]
+    if targets:
+        return targets, []
+    dropped = [renames[trigger] for trigger in template.entry_nodes]
+    removed.update(dropped)
+    for source, kind, _, target, _ in iter_links(connections):
+        if source in dropped and kind == "main":
+            targets.append(target)
+    return list(dict.fromkeys(targets)), dropped
+
+
+def compose_workflow(steps: List[Dict[str, Any]], links: Optional[List[Dict[str, Any]]] = None,
+                     registry: Optional[TemplateRegistry] = None) -> ComposeResult:
+    """
+    여러 템플릿을 하나의 워크플로우로 조립합니다.
+
+    steps: [{"template_id": "SKELETON_SEND_MAIL",
+             "params": {"선언된 파라미터": 값},
+             "node_parameters": {"노드 이름": {"파라미터": 값}}}, ...]   (node_parameters는 노드 parameters에 deep merge)
+    links: [{"from_step": 0, "from_node": "...", "to_step": 1, "to_node": "...", "output": 0, "input": 0}, ...]
+           노드 이름은 템플릿의 원래 이름을 사용합니다. from_node / to_node를 비우면 해당 단계의 끝 / 시작 노드.
+           (to_node를 비웠는데 시작 노드가 트리거뿐이면 자동 연결과 같게 트리거를 제거하고 다음 노드로 연결)
+           links를 주지 않으면 단계 순서대로 앞 단계의 끝 노드 → 다음 단계의 시작 노드로 연결하며,
+           다음 단계의 시작 노드가 트리거뿐이면 그 트리거를 빼고 트리거 다음 노드로 연결합니다.
+    """
+    registry = registry or workflow_templates
+    result = ComposeResult(workflow={})
+    errors, warnings = result.errors, result.warnings
+
+    nodes: List[Dict[str, Any]] = []
+    connections: Dict[str, Any] = {}
+    used_names: set = set()
+    name_maps: List[Dict[str, str]] = []       # 단계별 원래 이름 -> 최종 이름
+    templates: List[WorkflowTemplate] = []
+    offset_x = None
+
+    if not steps:
+        errors.append("steps가 비어 있습니다.")
+        return result
+
+    for index, step in enumerate(steps):
+        template_id = step.get("template_id", "")
+        template = registry.get(template_id)
+        if template is None:
+            errors.append(f"steps[{index}]: 템플릿 {template_id}를 찾을 수 없습니다.")
+            name_maps.append({})
+            continue
+        templates.append(template)
+
+        step_nodes = json.loads(template.nodes_json)
+        by_name = {node["name"]: node for node in step_nodes}
+
+        # 1) 선언된 파라미터 적용
+        params = step.get("params") or {}
+        for param, spec in template.parameters.items():
+            if param in params:
+                value = params[param]
+            elif "default" in spec:
+                value = spec["default"]
+            else:
+                if spec.get("required"):
+                    errors.append(f"steps[{index}] ({template_id}): 필수 파라미터 '{param}'가 없습니다.")
+                continue
+            node = by_name.get(spec.get("node"))
+            if node is None:
+                errors.append(f"steps[{index}] ({template_id}): 파라미터 '{param}'의 대상 노드 '{spec.get('node')}'가 없습니다.")
+                continue
+            problem = check_path(spec.get("path"))
+            if problem:
+                errors.append(f"steps[{index}] ({template_id}): 파라미터 '{param}'의 {problem}")
+                continue
+            try:
+                set_path(node, spec["path"], value)
+            except (IndexError, ValueError, TypeError) as e:
+                errors.append(f"steps[{index}] ({template_id}): 파라미터 '{param}'를 '{spec['path']}'에 넣을 수 없습니다. ({e})")
+        for param in params:
+            if param not in template.parameters:
+                errors.append(f"steps[{index}] ({template_id}): 선언되지 않은 파라미터 '{param}' (node_parameters 사용)")
+
+        # 2) 노드 파라미터 직접 수정
+        for node_name, override in (step.get("node_parameters") or {}).items():
+            node = by_name.get(node_name)
+            if node is None:
+                errors.append(f"steps[{index}] ({template_id}): node_parameters의 노드 '{node_name}'가 없습니다.")
+                continue
+            node["parameters"] = deep_merge(node.get("parameters") or {}, override)
+
+        # 3) 이름 충돌 해결 / id 재발급 / 위치 이동
+        renames: Dict[str, str] = {}
+        for node in step_nodes:
+            new_name = _unique_name(node["name"], used_names)
+            used_names.add(new_name)
+            renames[node["name"]] = new_name
+        name_maps.append(renames)
+
+        xs = [node["position"][0] for node in step_nodes if isinstance(node.get("position"), list)]
+        shift = 0
+        if xs and offset_x is not None:
+            shift = offset_x - min(xs)
+        if xs:
+            offset_x = max(xs) + shift + STEP_GAP_X
+
+        changed = {old: new for old, new in renames.items() if old != new}
+        for node in step_nodes:
+            node["name"] = renames[node["name"]]
+            node["id"] = str(uuid.uuid4())
+            if "webhookId" in node:
+                node["webhookId"] = str(uuid.uuid4())
+            if shift and isinstance(node.get("position"), list):
+                node["position"] = [node["position"][0] + shift, node["position"][1]]
+            if changed:
+                node["parameters"] = _rename_references(node.get("parameters") or {}, changed)
+            nodes.append(node)
+
+        for source, kind, output, target, input_index in iter_links(json.loads(template.connections_json)):
+            if target in renames:
+                add_link(connections, renames[source], renames[target], kind, output, input_index)
+
+    if errors:
+        result.workflow = {"nodes": nodes, "connections": connections}
+        return result
+
+    # 4) 단계 사이 연결
+    removed: set = set()
+    if links is None:
+        for index in range(1, len(templates)):
+            previous, current = templates[index - 1], templates[index]
+            sources = [name_maps[index - 1][name] for name in previous.exit_nodes]
+            # 다음 단계가 트리거로 시작하면 트리거를 제거하고 트리거 다음 노드로 연결
+            targets, dropped = _step_targets(current, name_maps[index], connections, removed)
+            for final in dropped:
+                warnings.append(f"steps[{index}]: 트리거 '{final}'를 제거하고 앞 단계에 연결했습니다.")
+            for source in sources:
+                for target in targets:
+                    add_link(connections, source, target)
+            if len(sources) > 1 or len(targets) > 1:
+                warnings.append(f"steps[{index}]: {sources} → {targets} 자동 연결 (의도와 다르면 links 지정)")
+    else:
+        for number, link in enumerate(links):
+            try:
+                from_step, to_step = int(link["from_step"]), int(link["to_step"])
+                from_template, to_template = templates[from_step], templates[to_step]
+                output_index, input_index = int(link.get("output", 0)), int(link.get("input", 0))
+            except (KeyError, ValueError, IndexError, TypeError):
+                errors.append(f"links[{number}]: from_step / to_step / output / input 값이 올바르지 않습니다.")
+                continue
+            from_names = [link["from_node"]] if link.get("from_node") else from_template.exit_nodes
+            if link.get("to_node"):
+                target = name_maps[to_step].get(link["to_node"])
+                if target is None:
+                    errors.append(f"links[{number}]: steps[{to_step}]에 노드 '{link['to_node']}'가 없습니다.")
+                    continue
+                targets = [target]
+            else:
+                # 기본 경로와 같게: 도착 단계가 트리거로만 시작하면 트리거를 제거하고 트리거 다음 노드로 연결
+                targets, dropped = _step_targets(to_template, name_maps[to_step], connections, removed)
+                for final in dropped:
+                    if f"steps[{to_step}]: 트리거 '{final}'를 제거하고 앞 단계에 연결했습니다." not in warnings:
+                        warnings.append(f"steps[{to_step}]: 트리거 '{final}'를 제거하고 앞 단계에 연결했습니다.")
+            for from_name in from_names:
+                source = name_maps[from_step].get(from_name)
+                if source is None:
+                    errors.append(f"links[{number}]: steps[{from_step}]에 노드 '{from_name}'가 없습니다.")
+                    continue
+                for target in targets:
+                    add_link(connections, source, target, link.get("type", "main"), output_index, input_index)
+
+    if removed:
+        nodes = [node for node in nodes if node["name"] not in removed]
+        connections = {source: outputs for source, outputs in connections.items() if source not in removed}
+
+    settings = next((template.settings for template in templates if template.settings), None) or DEFAULT_SETTINGS
+    result.workflow = {"nodes": nodes, "connections": connections, "settings": dict(settings)}
+    validate_workflow(result)
+    return result
+
+
+def validate_workflow(result: ComposeResult) -> None:
+    """조립된 워크플로우의 연결 / 이름 / 노드 타입 / 웹훅 경로를 검사하여 errors / warnings에 추가합니다."""
+    workflow = result.workflow
+    nodes = workflow.get("nodes", [])
+    names = [node.get("name") for node in nodes]
+    name_set = set(names)
+
+    if not nodes:
+        result.errors.append("노드가 없습니다.")
+    if len(name_set) != len(names):
+        result.errors.append("중복된 노드 이름이 있습니다.")
+    triggers = {node.get("name") for node in nodes if is_trigger(node.get("type", ""))}
+    for source, kind, _, target, _ in iter_links(workflow.get("connections", {})):
+        if source not in name_set:
+            result.errors.append(f"연결의 출발 노드 '{source}'가 없습니다.")
+        if target not in name_set:
+            result.errors.append(f"'{source}' → '{target}' ({kind}) 연결의 도착 노드가 없습니다.")
+        elif target in triggers:
+            # 트리거 노드는 입력이 없으므로 이 연결로는 데이터가 전달되지 않음
+            result.errors.append(f"'{source}' → '{target}' ({kind}) 연결의 도착 노드가 트리거입니다. (트리거는 입력을 받을 수 없음)")
+
+    if not any(is_trigger(node.get("type", "")) for node in nodes):
+        result.warnings.append("트리거 노드가 없습니다. (n8n에서 수동 실행만 가능)")
+
+    paths: Dict[str, str] = {}
+    for node in nodes:
+        # 트리거 제거 / 이름 변경 후 남은 표현식 참조 확인 (예: 제거된 Webhook의 $('Webhook').item.json.body)
+        for missing in sorted(_referenced_nodes(node.get("parameters") or {}, set()) - name_set):
+            result.warnings.append(f"노드 '{node.get('name')}'의 표현식이 없는 노드 '{missing}'를 참조합니다. (node_parameters로 수정 필요)")
+        node_type = node.get("type", "")
+        if node_type.rsplit(".", 1)[-1] == "webhook":
+            path = (node.get("parameters") or {}).get("path")
+            if path and path in paths:
+                result.warnings.append(f"웹훅 경로 '{path}'가 '{paths[path]}'와 '{node['name']}'에서 중복됩니다.")
+            elif path:
+                paths[path] = node["name"]
+        # 노드 타입 카탈로그가 로컬에 있을 때만 확인 (검증을 위해 n8n에서 내려받지 않음)
+        if node_type_index.stats()["nodes"] and node_type_index.lookup(node_type, node.get("typeVersion")) is None:
+            result.warnings.append(f"노드 '{node.get('name')}'의 타입 {node_type} v{node.get('typeVersion')}이 n8n 노드 카탈로그에 없습니다.")
+
+
+async def deploy_composed_workflow(steps: List[Dict[str, Any]], links: Optional[List[Dict[str, Any]]] = None,
+                                   name: str = "AI Generated Workflow", deploy: bool = True,
+                                   return_workflow: bool = False) -> Dict[str, Any]:
+    """템플릿을 조립 / 검증하고, 오류가 없으면 n8n에 업로드합니다. (워크플로우 JSON은 요청한 경우에만 반환)"""
+    await asset_catalog.arefresh_if_stale()
+    result = compose_workflow(steps, links)
+    response: Dict[str, Any] = {
+        "status": "invalid" if not result.ok else ("compiled" if not deploy else "error"),
+        "workflow_id": None,
+        "errors": result.errors,
+        "warnings": result.warnings,
+        "summary": result.summary(),
+    }
+    if result.ok and deploy:
+        uploaded = await upload_workflow_to_n8n(result.workflow, name)
+        if uploaded:
+            response["status"] = "success"
+            response["workflow_id"] = uploaded.get("id")
+        else:
+            response["errors"] = ["업로드에 실패했습니다. API 키나 URL 설정을 확인하세요."]
+    if return_workflow:
+        response["workflow"] = result.workflow
+    return response
+
+
+# 앱 전체에서 공유하는 템플릿 레지스트리
+workflow_templates = TemplateRegistry()
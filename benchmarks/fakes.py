@@ -0,0 +1,450 @@
+# benchmarks/fakes.py
+"""
+벤치마크용 가짜 백엔드 (Gemini / Weaviate / Supabase / Neo4j)
+
+실제 서비스 없이 검색 파이프라인 전체를 프로세스 안에서 실행할 수 있도록,
+각 클라이언트가 앱에서 사용하는 메서드만 같은 모양으로 흉내 냅니다.
+- 같은 seed면 항상 같은 문서 / 벡터 / 지연 시간이 나옵니다. (결과 비교 가능)
+- 동기 클라이언트(Gemini, Weaviate, Supabase sync)는 time.sleep으로 스레드를 점유하고,
+  비동기 클라이언트(Supabase async/asyncpg, Neo4j)는 asyncio.sleep으로 지연을 흉내 냅니다.
+"""
+import re
+import json
+import time
+import uuid
+import random
+import asyncio
+import hashlib
+import itertools
+import threading
+
+import numpy as np
+
+from dataclasses import dataclass, field
+from types import SimpleNamespace
+from contextlib import asynccontextmanager
+from typing import Any, Dict, List, Optional
+
+# 가짜 임베딩 차원 (gemini-embedding-001 기본 차원과 동일하게 맞출 필요는 없음)
+DEFAULT_DIMENSIONS = 768
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+# 가짜 문서 본문을 만들 때 사용하는 단어 목록 (사내 문서 느낌의 한국어 키워드)
+VOCABULARY = [
+    "복리후생", "야근", "식대", "한도", "학자금", "지급", "대상", "영수증", "제출", "기한",
+    "인사발령", "승진", "연말정산", "공제", "의료비", "경조사", "휴가", "연차", "신청", "승인",
+    "파트너십", "협약", "솔루션", "도입", "교육", "바우처", "추천", "채용", "신년사", "비전",
+    "총무", "비품", "출장", "교통비", "숙박", "법인카드", "정산", "규정", "개정", "공지",
+    "상조회", "대출", "이자", "지원금", "보험", "건강검진", "동호회", "행사", "보도자료", "AI",
+]
+
+
+@dataclass
+class LatencyProfile:
+    """백엔드 1개의 응답 지연 (평균 base_ms, ±jitter_ms 범위에서 균등 분포)"""
+    base_ms: float = 0.0
+    jitter_ms: float = 0.0
+
+    def sample(self, rng: random.Random) -> float:
+        if self.base_ms <= 0 and self.jitter_ms <= 0:
+            return 0.0
+        return max(0.0, self.base_ms + rng.uniform(-self.jitter_ms, self.jitter_ms)) / 1000.0
+
+
+@dataclass
+class FakeLatency:
+    """
+    백엔드별 지연 설정. n번째 호출의 지연은 (seed, 백엔드, n)으로 정해지므로 스레드 배치와 관계없이
+    실행할 때마다 같은 지연 순서가 나옵니다. (기준선 비교 --fail-on-regression용)
+    """
+    gemini: LatencyProfile = field(default_factory=LatencyProfile)
+    weaviate: LatencyProfile = field(default_factory=LatencyProfile)
+    supabase: LatencyProfile = field(default_factory=LatencyProfile)
+    neo4j: LatencyProfile = field(default_factory=LatencyProfile)
+    seed: int = 7
+
+    def __post_init__(self):
+        self._calls: Dict[str, "itertools.count[int]"] = {}
+        self._lock = threading.Lock()
+
+    def _rng(self, backend: str) -> random.Random:
+        counter = self._calls.get(backend)
+        if counter is None:
+            with self._lock:
+                counter = self._calls.setdefault(backend, itertools.count())
+        return random.Random(f"{self.seed}:{backend}:{next(counter)}")
+
+    def sleep(self, backend: str) -> None:
+        delay = getattr(self, backend).sample(self._rng(backend))
+        if delay:
+            time.sleep(delay)
+
+    async def asleep(self, backend: str) -> None:
+        delay = getattr(self, backend).sample(self._rng(backend))
+        if delay:
+            await asyncio.sleep(delay)
+
+
+def hash_embedding(text: str, dimensions: int = DEFAULT_DIMENSIONS) -> np.ndarray:
+    """
+    단어 해시 기반의 결정적 임베딩입니다. 같은 단어를 공유하는 문장끼리 코사인 유사도가 높게 나옵니다.
+    """
+    vector = np.zeros(dimensions, dtype=np.float32)
+    for token in TOKEN_PATTERN.findall(text.lower()):
+        digest = hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest()
+        index = int.from_bytes(digest[:4], "little") % dimensions
+        vector[index] += 1.0 if digest[4] & 1 else -1.0
+    norm = np.linalg.norm(vector)
+    if norm == 0:
+        vector[0] = 1.0
+        return vector
+    return vector / norm
+
+
+def make_sentence(rng: random.Random, words: int = 12) -> str:
+    return " ".join(rng.choice(VOCABULARY) for _ in range(words))
+
+
+# ==========================================
+# Gemini (google.generativeai 모듈 대체)
+# ==========================================
+class FakeGenAI:
+    """get_genai()가 돌려주는 모듈 대신 사용합니다. embed_content만 구현합니다."""
+
+    def __init__(self, latency: FakeLatency, dimensions: int = DEFAULT_DIMENSIONS):
+        self.latency = latency
+        self.dimensions = dimensions
+        self.calls = 0
+
+    def embed_content(self, model: str, content, task_type: Optional[str] = None, **kwargs) -> Dict[str, Any]:
+        self.calls += 1
+        self.latency.sleep("gemini")
+        if isinstance(content, list):
+            return {"embedding": [hash_embedding(text, self.dimensions).tolist() for text in content]}
+        return {"embedding": hash_embedding(content, self.dimensions).tolist()}
+
+
+# ==========================================
+# Weaviate (v4 동기 클라이언트 대체)
+# ==========================================
+class FakeCollection:
+    """query.hybrid / query.near_vector / query.fetch_objects / config.get 을 지원하는 메모리 컬렉션"""
+
+    def __init__(self, name: str, documents: List[Dict[str, Any]], references: Dict[str, str],
+                 latency: FakeLatency, dimensions: int, client: "FakeWeaviateClient"):
+        self.name = name
+        self.latency = latency
+        self.client = client
+        self.references = references  # 관계 이름 -> 대상 컬렉션
+        self.ids = [doc["id"] for doc in documents]
+        self.properties = [doc["properties"] for doc in documents]
+        self.links = [doc.get("links", {}) for doc in documents]
+        self.by_id = {doc_id: i for i, doc_id in enumerate(self.ids)}
+        self.tokens = [set(TOKEN_PATTERN.findall(props["content"].lower())) for props in self.properties]
+        self.matrix = np.stack([hash_embedding(props["content"], dimensions) for props in self.properties]) \
+            if documents else np.zeros((0, dimensions), dtype=np.float32)
+
+        self.query = SimpleNamespace(
+            hybrid=self.hybrid, near_vector=self.near_vector, fetch_objects=self.fetch_objects
+        )
+        self.config = SimpleNamespace(get=self.config_get)
+
+    def _object(self, i: int, score: Optional[float] = None, distance: Optional[float] = None,
+                with_references: bool = False):
+        references = None
+        if with_references and self.links[i]:
+            references = {}
+            for edge_name, targets in self.links[i].items():
+                target = self.client.collections.get(self.references[edge_name])
+                references[edge_name] = SimpleNamespace(
+                    objects=[target._object(target.by_id[ref_id]) for ref_id in targets if ref_id in target.by_id]
+                )
+        return SimpleNamespace(
+            uuid=uuid.UUID(self.ids[i]),
+            properties=self.properties[i],
+            metadata=SimpleNamespace(score=score, distance=distance),
+            references=references,
+        )
+
+    def _similarities(self, vector) -> np.ndarray:
+        query = np.asarray(vector, dtype=np.float32)
+        if query.shape[0] != self.matrix.shape[1]:
+            query = np.resize(query, self.matrix.shape[1])
+        norm = np.linalg.norm(query)
+        return self.matrix @ (query / norm if norm else query)
+
+    def hybrid(self, query: str, vector=None, alpha: float = 0.5, limit: int = 10, return_metadata=None, **kwargs):
+        self.latency.sleep("weaviate")
+        if not self.ids:
+            return SimpleNamespace(objects=[])
+        dense = self._similarities(vector if vector is not None else hash_embedding(query, self.matrix.shape[1]))
+        words = set(TOKEN_PATTERN.findall(query.lower()))
+        sparse = np.array([len(words & tokens) / (len(words) or 1) for tokens in self.tokens], dtype=np.float32)
+        scores = alpha * dense + (1 - alpha) * sparse
+        order = np.argsort(-scores)[:limit]
+        return SimpleNamespace(objects=[self._object(int(i), score=float(scores[i])) for i in order])
+
+    def near_vector(self, near_vector, limit: int = 10, return_metadata=None, **kwargs):
+        self.latency.sleep("weaviate")
+        if not self.ids:
+            return SimpleNamespace(objects=[])
+        sims = self._similarities(near_vector)
+        order = np.argsort(-sims)[:limit]
+        return SimpleNamespace(objects=[self._object(int(i), distance=float(1 - sims[i])) for i in order])
+
+    def fetch_objects(self, filters=None, return_references=None, limit: Optional[int] = None, **kwargs):
+        self.latency.sleep("weaviate")
+        # Filter.by_id().contains_any(ids) -> _FilterValue(value=[...])
+        ids = getattr(filters, "value", None)
+        if ids is None:
+            indexes = range(len(self.ids))
+        else:
+            indexes = [self.by_id[str(doc_id)] for doc_id in ids if str(doc_id) in self.by_id]
+        if limit is not None:
+            indexes = list(indexes)[:limit]
+        return SimpleNamespace(objects=[self._object(i, with_references=bool(return_references)) for i in indexes])
+
+    def config_get(self):
+        self.latency.sleep("weaviate")
+        return SimpleNamespace(references=[
+            SimpleNamespace(name=edge_name, target_collections=[target])
+            for edge_name, target in self.references.items()
+        ])
+
+
+class FakeWeaviateClient:
+    """get_weaviate()가 돌려주는 클라이언트 대신 사용합니다."""
+
+    def __init__(self, latency: FakeLatency, collection_names: List[str], docs_per_collection: int = 200,
+                 dimensions: int = DEFAULT_DIMENSIONS, seed: int = 7):
+        rng = random.Random(seed)
+        self._collections: Dict[str, FakeCollection] = {}
+        self.collections = SimpleNamespace(get=self._get)
+
+        # 1. 컬렉션별 문서 생성
+        raw: Dict[str, List[Dict[str, Any]]] = {}
+        for name in collection_names:
+            raw[name] = [{
+                "id": str(uuid.UUID(int=rng.getrandbits(128))),
+                "properties": {
+                    "content": make_sentence(rng, rng.randint(8, 40)),
+                    "fileName": f"{name}_{i:04d}.pdf",
+                    "metadata": {"page": i % 10},
+                },
+            } for i in range(docs_per_collection)]
+
+        # 2. 다음 컬렉션을 가리키는 관계(relatedTo) 연결 - fetch_data_by_ids의 참조 조회 경로용
+        references: Dict[str, Dict[str, str]] = {}
+        for index, name in enumerate(collection_names):
+            target = collection_names[(index + 1) % len(collection_names)]
+            references[name] = {"relatedTo": target}
+            target_ids = [doc["id"] for doc in raw[target]]
+            for doc in raw[name]:
+                doc["links"] = {"relatedTo": rng.sample(target_ids, min(2, len(target_ids)))}
+
+        for name in collection_names:
+            self._collections[name] = FakeCollection(name, raw[name], references[name], latency, dimensions, self)
+
+    def _get(self, name: str) -> FakeCollection:
+        collection = self._collections.get(name)
+        if collection is None:
+            raise ValueError(f"Collection '{name}' does not exist")
+        return collection
+
+    def is_ready(self) -> bool:
+        return True
+
+    def close(self) -> None:
+        pass
+
+
+# ==========================================
+# Supabase (match_documents RPC 대체)
+# ==========================================
+class FakeDocumentStore:
+    """match_documents와 같은 결과(content / metadata / similarity)를 돌려주는 메모리 문서 저장소"""
+
+    def __init__(self, docs: int = 1000, dimensions: int = DEFAULT_DIMENSIONS, seed: int = 11):
+        rng = random.Random(seed)
+        self.rows = [{
+            "id": i,
+            "content": make_sentence(rng, rng.randint(10, 60)),
+            "metadata": {"fileName": f"welfare_{i:04d}.pdf", "source": "welfare"},
+        } for i in range(docs)]
+        self.matrix = np.stack([hash_embedding(row["content"], dimensions) for row in self.rows])
+
+    def match(self, query_embedding, match_threshold: float, match_count: int, filter=None) -> List[Dict[str, Any]]:
+        query = np.asarray(query_embedding, dtype=np.float32)
+        sims = self.matrix @ (query / (np.linalg.norm(query) or 1.0))
+        order = np.argsort(-sims)
+        results = []
+        for i in order:
+            if sims[i] < match_threshold or len(results) >= match_count:
+                break
+            results.append({**self.rows[i], "similarity": float(sims[i])})
+        return results
+
+
+class FakeSupabase:
+    """동기 supabase 클라이언트 대체: client.rpc(name, params).execute().data"""
+
+    def __init__(self, store: FakeDocumentStore, latency: FakeLatency):
+        self.store = store
+        self.latency = latency
+
+    def rpc(self, name: str, params: Dict[str, Any]):
+        def execute():
+            self.latency.sleep("supabase")
+            return SimpleNamespace(data=self.store.match(**params))
+        return SimpleNamespace(execute=execute)
+
+
+class FakeAsyncSupabase:
+    """비동기 supabase 클라이언트 대체: await client.rpc(name, params).execute()"""
+
+    def __init__(self, store: FakeDocumentStore, latency: FakeLatency):
+        self.store = store
+        self.latency = latency
+        self.postgrest = SimpleNamespace(aclose=self._aclose)
+
+    async def _aclose(self) -> None:
+        pass
+
+    def rpc(self, name: str, params: Dict[str, Any]):
+        async def execute():
+            await self.latency.asleep("supabase")
+            return SimpleNamespace(data=self.store.match(**params))
+        return SimpleNamespace(execute=execute)
+
+
+class FakePgPool:
+    """asyncpg 풀 대체: await pool.fetch(MATCH_DOCUMENTS_SQL, vector_json, threshold, limit, filter)"""
+
+    def __init__(self, store: FakeDocumentStore, latency: FakeLatency):
+        self.store = store
+        self.latency = latency
+
+    async def fetch(self, sql: str, vector_json: str, match_threshold: float, match_count: int, filter=None):
+        await self.latency.asleep("supabase")
+        return self.store.match(json.loads(vector_json), match_threshold, match_count, filter)
+
+    async def close(self) -> None:
+        pass
+
+
+# ==========================================
+# Neo4j (AsyncDriver 대체)
+# ==========================================
+class FakeGraph:
+    """Document -[:HAS_CHUNK]-> Chunk 구조를 흉내 내는 메모리 그래프"""
+
+    def __init__(self, documents: int = 100, chunks_per_document: int = 20,
+                 dimensions: int = DEFAULT_DIMENSIONS, seed: int = 13):
+        rng = random.Random(seed)
+        self.chunks: List[Dict[str, Any]] = []
+        self.documents: Dict[str, List[str]] = {}
+        for d in range(documents):
+            file_name = f"graph_{d:04d}.pdf"
+            category = rng.choice(["Welfare_Doc", "Receipt", "Ai", "HR_Order", "Etc"])
+            lines = [make_sentence(rng, rng.randint(6, 20)) for _ in range(chunks_per_document)]
+            self.documents[file_name] = lines
+            for line_index, content in enumerate(lines):
+                self.chunks.append({"fileName": file_name, "category": category,
+                                    "lineIndex": line_index, "content": content})
+        self.matrix = np.stack([hash_embedding(chunk["content"], dimensions) for chunk in self.chunks])
+        self.file_names = list(self.documents)
+
+    def search(self, query_embedding, limit: int, category=None, file_name=None) -> List[Dict[str, Any]]:
+        query = np.asarray(query_embedding, dtype=np.float32)
+        sims = self.matrix @ (query / (np.linalg.norm(query) or 1.0))
+        order = np.argsort(-sims)[:limit]
+        records = []
+        for i in order:
+            chunk = self.chunks[i]
+            lines = self.documents[chunk["fileName"]]
+            start = max(0, chunk["lineIndex"] - 2)
+            related = [name for name in self.file_names[:5] if name != chunk["fileName"]]
+            records.append({
+                "fileName": chunk["fileName"],
+                "lineIndex": chunk["lineIndex"],
+                "primaryContent": lines[start:chunk["lineIndex"] + 3],
+                "supplementalContext": [
+                    [{"source": name, "text": text} for text in self.documents[name][:4]] for name in related
+                ],
+                "score": float(sims[i]),
+            })
+        return records
+
+
+class FakeNeo4jResult:
+    def __init__(self, records: List[Dict[str, Any]]):
+        self._records = records
+
+    async def data(self) -> List[Dict[str, Any]]:
+        return self._records
+
+
+class FakeNeo4jSession:
+    def __init__(self, graph: FakeGraph, latency: FakeLatency):
+        self.graph = graph
+        self.latency = latency
+
+    async def run(self, query, limit: int = 5, query_embedding=None, category=None, file_name=None, **kwargs):
+        await self.latency.asleep("neo4j")
+        return FakeNeo4jResult(self.graph.search(query_embedding, limit, category, file_name))
+
+
+class FakeNeo4jDriver:
+    """neo4j.AsyncGraphDatabase.driver(...)가 돌려주는 드라이버 대신 사용합니다."""
+
+    def __init__(self, graph: FakeGraph, latency: FakeLatency):
+        self.graph = graph
+        self.latency = latency
+
+    @asynccontextmanager
+    async def session(self, **kwargs):
+        yield FakeNeo4jSession(self.graph, self.latency)
+
+    async def verify_connectivity(self) -> None:
+        pass
+
+    async def close(self) -> None:
+        pass
+
+
+@dataclass
+class FakeBackends:
+    latency: FakeLatency
+    genai: FakeGenAI
+    weaviate: FakeWeaviateClient
+    documents: FakeDocumentStore
+    graph: FakeGraph
+
+
+def install_fakes(latency: Optional[FakeLatency] = None, docs_per_collection: int = 200,
+                  dimensions: int = DEFAULT_DIMENSIONS, seed: int = 7) -> FakeBackends:
+    """
+    앱의 백엔드 핸들을 가짜 백엔드로 교체합니다. (LazyBackend.override + 모듈 전역 핸들)
+    SUPABASE_VECTOR_BACKEND 설정(sync / async / asyncpg)에 맞는 경로에 모두 설치합니다.
+    """
+    from app.core import database
+    from app.service.retriever import TARGET_COLLECTIONS
+
+    latency = latency or FakeLatency(seed=seed)
+    fakes = FakeBackends(
+        latency=latency,
+        genai=FakeGenAI(latency, dimensions),
+        weaviate=FakeWeaviateClient(latency, TARGET_COLLECTIONS, docs_per_collection, dimensions, seed),
+        documents=FakeDocumentStore(dimensions=dimensions, seed=seed + 4),
+        graph=FakeGraph(dimensions=dimensions, seed=seed + 6),
+    )
+
+    database.gemini_backend.override(fakes.genai)
+    database.weaviate_backend.override(fakes.weaviate)
+    database.supabase_backend.override(FakeSupabase(fakes.documents, latency))
+    database.supabase_async = FakeAsyncSupabase(fakes.documents, latency)
+    database.supabase_pg_pool = FakePgPool(fakes.documents, latency)
+    database.neo4j_driver = FakeNeo4jDriver(fakes.graph, latency)
+    database.neo4j_pool_stats["verified"] = True
+    return fakes
@@ -0,0 +1,232 @@
+# benchmarks/harness.py
+"""
+벤치마크 실행 / 집계 / 기준선(baseline) 비교
+
+- 지정한 동시성(concurrency)으로 요청을 계속 보내는 closed-loop 방식으로 지연 시간과 처리량을 측정합니다.
+- 메모리 할당은 tracemalloc이 지연 시간을 왜곡하므로 별도 패스(순차 실행)에서 측정합니다.
+- 결과를 JSON 기준선으로 저장해 두고, 이후 실행 결과와 비교하여 허용 범위를 넘는 회귀를 표시합니다.
+"""
+import json
+import time
+import asyncio
+import platform
+import tracemalloc
+
+from dataclasses import dataclass, asdict, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+# 요청 번호를 받아 요청 1건을 실행하는 코루틴을 만드는 함수
+RequestFactory = Callable[[int], Awaitable[Any]]
+
+# 비교 대상 지표와 방향 (True: 값이 클수록 나쁨)
+COMPARED_METRICS = {
+    "p50_ms": True,
+    "p95_ms": True,
+    "p99_ms": True,
+    "throughput_rps": False,
+    "alloc_kib_per_request": True,
+}
+
+# 에러는 tolerance와 관계없이 기준선보다 늘어나기만 해도 회귀로 봅니다.
+# (429/503으로 빨리 실패하는 변경은 지연 시간이 줄어 보이므로 지연 지표만으로는 잡히지 않음)
+ERROR_METRIC = "error_rate"
+
+
+@dataclass
+class BenchResult:
+    name: str
+    requests: int
+    concurrency: int
+    errors: int
+    elapsed_s: float
+    throughput_rps: float
+    mean_ms: float
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    max_ms: float
+    alloc_kib_per_request: Optional[float] = None
+    peak_kib_per_request: Optional[float] = None
+    error_types: Dict[str, int] = field(default_factory=dict)
+
+    @property
+    def error_rate(self) -> float:
+        return round(self.errors / self.requests, 4) if self.requests else 0.0
+
+
+def percentile(ordered: List[float], p: float) -> float:
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, max(0, int(round(p / 100.0 * (len(ordered) - 1)))))
+    return ordered[index]
+
+
+async def measure_latency(factory: RequestFactory, requests: int, concurrency: int,
+                          start_index: int = 0) -> Dict[str, Any]:
+    """concurrency개의 워커가 요청 번호를 하나씩 가져가며 총 requests건을 실행합니다."""
+    latencies: List[float] = []
+    error_types: Dict[str, int] = {}
+    counter = iter(range(start_index, start_index + requests))
+
+    async def worker() -> None:
+        for index in counter:
+            started = time.perf_counter()
+            try:
+                await factory(index)
+            except Exception as e:
+                name = type(e).__name__
+                error_types[name] = error_types.get(name, 0) + 1
+                continue
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(max(1, concurrency))))
+    elapsed = time.perf_counter() - started
+    return {"latencies": latencies, "error_types": error_types, "elapsed": elapsed}
+
+
+async def measure_allocations(factory: RequestFactory, samples: int, start_index: int = 0) -> Dict[str, float]:
+    """
+    요청을 순차 실행하며 요청 1건당 새로 할당된 메모리(KiB)와 최대 사용량(peak, KiB)을 측정합니다.
+    (스레드 풀에서 실행되는 할당도 함께 집계됩니다)
+    """
+    if samples <= 0:
+        return {}
+    was_tracing = tracemalloc.is_tracing()
+    if not was_tracing:
+        tracemalloc.start()
+    allocated = 0.0
+    peak = 0.0
+    try:
+        for index in range(start_index, start_index + samples):
+            tracemalloc.reset_peak()
+            before, _ = tracemalloc.get_traced_memory()
+            try:
+                await factory(index)
+            except Exception:
+                pass
+            after, peak_now = tracemalloc.get_traced_memory()
+            allocated += max(0, after - before)
+            peak += max(0, peak_now - before)
+    finally:
+        if not was_tracing:
+            tracemalloc.stop()
+    return {
+        "alloc_kib_per_request": round(allocated / samples / 1024, 2),
+        "peak_kib_per_request": round(peak / samples / 1024, 2),
+    }
+
+
+async def run_benchmark(name: str, factory: RequestFactory, requests: int = 200, concurrency: int = 10,
+                        warmup: int = 10, alloc_samples: int = 20, start_index: int = 0) -> BenchResult:
+    """워밍업 → 지연 시간/처리량 측정 → 메모리 할당 측정 순서로 실행합니다."""
+    index = start_index
+    if warmup > 0:
+        await measure_latency(factory, warmup, min(concurrency, warmup), index)
+        index += warmup
+
+    measured = await measure_latency(factory, requests, concurrency, index)
+    index += requests
+    allocations = await measure_allocations(factory, alloc_samples, index)
+
+    ordered = sorted(measured["latencies"])
+    ms = [value * 1000 for value in ordered]
+    elapsed = measured["elapsed"]
+    return BenchResult(
+        name=name,
+        requests=requests,
+        concurrency=concurrency,
+        errors=sum(measured["error_types"].values()),
+        elapsed_s=round(elapsed, 3),
+        throughput_rps=round(len(ordered) / elapsed, 2) if elapsed > 0 else 0.0,
+        mean_ms=round(sum(ms) / len(ms), 3) if ms else 0.0,
+        p50_ms=round(percentile(ms, 50), 3),
+        p95_ms=round(percentile(ms, 95), 3),
+        p99_ms=round(percentile(ms, 99), 3),
+        max_ms=round(ms[-1], 3) if ms else 0.0,
+        error_types=measured["error_types"],
+        **allocations,
+    )
+
+
+def save_baseline(results: List[BenchResult], path: str, settings: Optional[Dict[str, Any]] = None) -> None:
+    payload = {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "settings": settings or {},
+        "results": {result.name: asdict(result) for result in results},
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(payload, f, ensure_ascii=False, indent=2)
+
+
+def load_baseline(path: str) -> Dict[str, Any]:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def compare(results: List[BenchResult], baseline: Dict[str, Any], tolerance: float = 0.1) -> List[Dict[str, Any]]:
+    """
+    기준선 대비 변화율을 계산합니다. 나빠진 방향으로 tolerance(비율)를 넘으면 regression=True.
+    에러 비율(error_rate)은 기준선보다 조금이라도 늘면 regression=True.
+    """
+    rows = []
+    previous_results = baseline.get("results", {})
+    for result in results:
+        previous = previous_results.get(result.name)
+        if previous is None:
+            continue
+        current = asdict(result)
+
+        old_errors = previous.get("errors", 0) / previous["requests"] if previous.get("requests") else 0.0
+        old_errors, new_errors = round(old_errors, 4), result.error_rate
+        rows.append({
+            "name": result.name,
+            "metric": ERROR_METRIC,
+            "baseline": old_errors,
+            "current": new_errors,
+            "change_pct": round((new_errors - old_errors) / old_errors * 100, 1) if old_errors else (
+                float("inf") if new_errors else 0.0),
+            "regression": new_errors > old_errors,
+        })
+
+        for metric, higher_is_worse in COMPARED_METRICS.items():
+            old, new = previous.get(metric), current.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            worse = change > tolerance if higher_is_worse else change < -tolerance
+            rows.append({
+                "name": result.name,
+                "metric": metric,
+                "baseline": old,
+                "current": new,
+                "change_pct": round(change * 100, 1),
+                "regression": worse,
+            })
+    return rows
+
+
+def format_report(results: List[BenchResult]) -> str:
+    header = f"{'scenario':<34}{'req':>6}{'conc':>6}{'err':>5}{'rps':>10}{'p50':>9}{'p95':>9}{'p99':>9}{'alloc KiB':>11}"
+    lines = [header, "-" * len(header)]
+    for r in results:
+        alloc = f"{r.alloc_kib_per_request:.1f}" if r.alloc_kib_per_request is not None else "-"
+        lines.append(
+            f"{r.name:<34}{r.requests:>6}{r.concurrency:>6}{r.errors:>5}{r.throughput_rps:>10.1f}"
+            f"{r.p50_ms:>9.2f}{r.p95_ms:>9.2f}{r.p99_ms:>9.2f}{alloc:>11}"
+        )
+    return "\n".join(lines)
+
+
+def format_comparison(rows: List[Dict[str, Any]]) -> str:
+    if not rows:
+        return "(비교할 기준선 결과가 없습니다)"
+    lines = []
+    for row in rows:
+        mark = "❌" if row["regression"] else "  "
+        lines.append(
+            f"{mark} {row['name']:<34}{row['metric']:<24}{row['baseline']:>12}{row['current']:>12}{row['change_pct']:>+9.1f}%"
+        )
+    return "\n".join(lines)
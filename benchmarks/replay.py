@@ -0,0 +1,518 @@
+# benchmarks/replay.py
+"""
+쿼리 로그 재생(replay) 부하 생성기
+
+QUERY_LOG_ENABLED=true로 수집한 요청 기록(app/core/query_log.py, JSONL)을 다시 보내며
+지연 시간 / 처리량 / 단계별 소요 시간을 측정합니다.
+
+- open-loop 방식: 응답을 기다리지 않고 예정된 시각에 요청을 보냅니다. 지연 시간은 "예정 시각 → 응답 완료"로
+  측정하므로, 서버가 밀리기 시작하면 대기 시간까지 그대로 드러납니다. (closed-loop의 coordinated omission 방지)
+- 요청 간격: 원래 도착 간격(--speed로 배속 조절) 또는 고정 QPS(--qps, --poisson이면 지수 분포 간격)
+- 대상: 프로세스 안의 FastAPI 앱(기본, --fakes로 가짜 백엔드 사용) 또는 실행 중인 서버(--target http://host:port)
+- 단계별 소요 시간: REST는 응답 헤더 Server-Timing, MCP 도구는 프로세스 안에서 직접 수집 (HTTP 대상이면 전체 시간만)
+- --sweep 10,20,50,100: QPS를 올려가며 재생하고 포화(saturation)가 시작되는 지점을 표시합니다.
+
+사용 예 (프로젝트 루트에서):
+    python -m benchmarks.replay data/query_log/queries.jsonl --fakes
+    python -m benchmarks.replay queries.jsonl --speed 2 --target http://localhost:8000
+    python -m benchmarks.replay queries.jsonl --fakes --sweep 10,25,50,100,200 -n 500
+"""
+import abc
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+
+from dataclasses import dataclass, field, asdict
+from typing import Any, Dict, List, Optional, Tuple
+
+from benchmarks.harness import percentile
+from benchmarks.run import DEFAULT_LATENCY, parse_latency, quiet
+
+# MCP 기록의 서버 이름 -> (앱 모듈, FastMCP 인스턴스 이름). HTTP 대상이면 /<서버>/mcp/sse로 호출합니다.
+MCP_SERVERS = {
+    "supabase": ("app.mcp.supabaseServer", "supabase_mcp"),
+    "weaviate": ("app.mcp.weaviateServer", "weaviate_mcp"),
+    "neo4j": ("app.mcp.neo4j", "neo4j_mcp"),
+    "federated": ("app.mcp.federatedServer", "federated_mcp"),
+}
+
+# 포화 판단 기준 (가장 낮은 QPS 대비 p99 배수 / 목표 대비 달성 QPS 비율 / 에러율)
+SATURATION_P99_FACTOR = 3.0
+SATURATION_QPS_RATIO = 0.9
+SATURATION_ERROR_RATE = 0.01
+
+
+# 반복 재생 시 질문을 바꿔 캐시 적중으로 측정되지 않게 할 파라미터 이름
+QUERY_PARAMS = ("query_text", "query")
+
+# 포화 표의 단계 열 최대 개수 (p95가 큰 단계부터)
+SWEEP_STAGE_COLUMNS = 6
+
+
+def _repeated(record: Dict[str, Any], tag: str) -> Dict[str, Any]:
+    params = dict(record.get("params") or {})
+    for name in QUERY_PARAMS:
+        if isinstance(params.get(name), str):
+            params[name] = f"{params[name]} #{tag}"
+    return {**record, "params": params}
+
+
+def load_log(path: str, entries: Optional[List[str]] = None, limit: int = 0,
+             keep_repeats: bool = False) -> List[Dict[str, Any]]:
+    """
+    JSONL 쿼리 로그를 도착 시각 순으로 읽습니다. entries를 주면 해당 진입점(경로 / 서버/도구명)만 사용합니다.
+    limit이 기록 수보다 크면 처음부터 반복하며, 두 번째 바퀴부터는 질문 끝에 "#바퀴"를 붙여 결과 캐시 적중을 피합니다.
+    (기록 안에 원래 있던 중복 질문은 그대로 둠. keep_repeats=True면 반복분도 그대로 사용)
+    """
+    records = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if entries and record.get("entry") not in entries:
+                continue
+            records.append(record)
+    records.sort(key=lambda record: record.get("ts", 0.0))
+    if limit > 0:
+        total = len(records)
+        records = [
+            records[i % total] if keep_repeats or i < total else _repeated(records[i % total], str(i // total))
+            for i in range(limit)
+        ] if records else []
+    return records
+
+
+def original_offsets(records: List[Dict[str, Any]], speed: float = 1.0) -> List[float]:
+    """원래 도착 간격 그대로(speed배 빠르게) 각 요청의 시작 시각(초, 0부터)을 계산합니다."""
+    offsets: List[float] = []
+    elapsed = 0.0
+    previous = None
+    for record in records:
+        ts = record.get("ts", 0.0)
+        if previous is not None:
+            # 반복 재생으로 시간이 되돌아가면 간격 0으로 처리
+            elapsed += max(0.0, ts - previous) / max(speed, 1e-9)
+        offsets.append(elapsed)
+        previous = ts
+    return offsets
+
+
+def fixed_offsets(count: int, qps: float, poisson: bool = False, seed: int = 7) -> List[float]:
+    """고정 QPS로 각 요청의 시작 시각을 계산합니다. poisson이면 지수 분포 간격(실제 트래픽에 가까움)"""
+    rng = random.Random(seed)
+    offsets: List[float] = []
+    elapsed = 0.0
+    for _ in range(count):
+        offsets.append(elapsed)
+        elapsed += rng.expovariate(qps) if poisson else 1.0 / qps
+    return offsets
+
+
+def parse_server_timing(header: str) -> Dict[str, float]:
+    """'embedding;dur=10.3, total;dur=35.2' -> {'embedding': 10.3} (total 제외)"""
+    stages: Dict[str, float] = {}
+    for part in header.split(","):
+        name, _, params = part.strip().partition(";")
+        if not name or name == "total":
+            continue
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "dur":
+                try:
+                    stages[name] = stages.get(name, 0.0) + float(value)
+                except ValueError:
+                    pass
+    return stages
+
+
+class ReplayTarget(abc.ABC):
+    """요청 기록 1건을 다시 보내고 (상태, 단계별 소요 시간 ms)를 돌려주는 대상 (MCP 호출 방식은 대상별로 구현)"""
+
+    async def open(self) -> None:
+        pass
+
+    async def send(self, record: Dict[str, Any]) -> Tuple[str, Dict[str, float]]:
+        if record.get("kind") == "mcp":
+            server, _, tool = record["entry"].partition("/")
+            return await self.call_tool(server, tool, record.get("params") or {})
+        return await self.post(record["entry"], record.get("params") or {}, record.get("priority"))
+
+    async def post(self, path: str, body: Dict[str, Any], priority: Optional[str]) -> Tuple[str, Dict[str, float]]:
+        response = await self.client.post(path, json=body, headers={"X-Priority": priority} if priority else None)
+        return str(response.status_code), parse_server_timing(response.headers.get("server-timing", ""))
+
+    @abc.abstractmethod
+    async def call_tool(self, server: str, tool: str, params: Dict[str, Any]) -> Tuple[str, Dict[str, float]]:
+        """MCP 도구를 호출합니다."""
+
+    async def close(self) -> None:
+        await self.client.aclose()
+
+
+class InProcessTarget(ReplayTarget):
+    """프로세스 안의 FastAPI 앱 / MCP 도구 함수를 직접 호출합니다. (네트워크 / MCP 세션 비용 제외)"""
+
+    async def open(self) -> None:
+        import httpx
+        from app.api.main import app
+        from app.core.query_log import query_log
+
+        # 재생 요청이 다시 쿼리 로그에 쌓이지 않도록 기록을 끔
+        query_log.enabled = False
+        self.client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://replay", timeout=120)
+        self._tools: Dict[Tuple[str, str], Any] = {}
+
+    async def call_tool(self, server: str, tool: str, params: Dict[str, Any]) -> Tuple[str, Dict[str, float]]:
+        import importlib
+        from app.core.metrics import collect_timings
+
+        fn = self._tools.get((server, tool))
+        if fn is None:
+            module_name, attr = MCP_SERVERS[server]
+            mcp = getattr(importlib.import_module(module_name), attr)
+            fn = self._tools[(server, tool)] = (await mcp.get_tool(tool)).fn
+        with collect_timings() as timings:
+            try:
+                await fn(**params)
+            except Exception as e:
+                return type(e).__name__, dict(timings)
+            return "ok", dict(timings)
+
+
+class HttpTarget(ReplayTarget):
+    """실행 중인 서버에 HTTP로 요청합니다. MCP 도구는 서버별 MCP 세션 1개를 열어 재사용합니다."""
+
+    def __init__(self, base_url: str):
+        self.base_url = base_url.rstrip("/")
+
+    async def open(self) -> None:
+        import httpx
+
+        self.client = httpx.AsyncClient(
+            base_url=self.base_url, timeout=120,
+            limits=httpx.Limits(max_connections=1000, max_keepalive_connections=200)
+        )
+        self._sessions: Dict[str, Any] = {}
+        self._session_lock = asyncio.Lock()
+
+    async def _session(self, server: str):
+        from fastmcp import Client
+        from fastmcp.client.transports import StreamableHttpTransport
+
+        session = self._sessions.get(server)
+        if session is None:
+            async with self._session_lock:
+                session = self._sessions.get(server)
+                if session is None:
+                    session = Client(StreamableHttpTransport(f"{self.base_url}/{server}/mcp/sse"))
+                    await session.__aenter__()
+                    self._sessions[server] = session
+        return session
+
+    async def call_tool(self, server: str, tool: str, params: Dict[str, Any]) -> Tuple[str, Dict[str, float]]:
+        session = await self._session(server)
+        try:
+            result = await session.call_tool(tool, params, raise_on_error=False)
+        except Exception as e:
+            return type(e).__name__, {}
+        return ("error" if result.is_error else "ok"), {}
+
+    async def close(self) -> None:
+        for session in self._sessions.values():
+            try:
+                await session.__aexit__(None, None, None)
+            except Exception:
+                pass
+        await super().close()
+
+
+@dataclass
+class Sample:
+    entry: str
+    status: str
+    ok: bool
+    latency_ms: float   # 예정 시각 → 완료 (대기 포함)
+    service_ms: float   # 실제 전송 → 완료
+    lag_ms: float       # 예정 시각 대비 전송 지연 (부하 생성기 자체가 밀린 정도)
+    stages: Dict[str, float] = field(default_factory=dict)
+
+
+@dataclass
+class ReplayResult:
+    label: str
+    target_qps: Optional[float]
+    requests: int
+    errors: int
+    duration_s: float
+    achieved_qps: float
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    max_ms: float
+    service_p99_ms: float
+    max_lag_ms: float
+    status: Dict[str, int]
+    entries: Dict[str, Dict[str, float]]
+    stages: Dict[str, Dict[str, float]]
+
+    @property
+    def error_rate(self) -> float:
+        return self.errors / self.requests if self.requests else 0.0
+
+
+def is_ok(status: str) -> bool:
+    return status == "ok" or (status.isdigit() and int(status) < 400)
+
+
+async def replay(target: ReplayTarget, records: List[Dict[str, Any]], offsets: List[float]) -> List[Sample]:
+    """open-loop 재생: 예정 시각마다 요청을 태스크로 띄우고 완료를 기다리지 않습니다."""
+    samples: List[Sample] = []
+    loop = asyncio.get_running_loop()
+
+    async def fire(record: Dict[str, Any], scheduled: float) -> None:
+        sent = loop.time()
+        try:
+            status, stages = await target.send(record)
+        except Exception as e:
+            status, stages = type(e).__name__, {}
+        done = loop.time()
+        samples.append(Sample(
+            entry=record["entry"], status=status, ok=is_ok(status),
+            latency_ms=(done - scheduled) * 1000, service_ms=(done - sent) * 1000,
+            lag_ms=max(0.0, sent - scheduled) * 1000, stages=stages,
+        ))
+
+    tasks = []
+    started = loop.time()
+    for record, offset in zip(records, offsets):
+        scheduled = started + offset
+        delay = scheduled - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(fire(record, scheduled)))
+    await asyncio.gather(*tasks)
+    return samples
+
+
+def _distribution(values: List[float]) -> Dict[str, float]:
+    ordered = sorted(values)
+    return {
+        "count": len(ordered),
+        "mean_ms": round(sum(ordered) / len(ordered), 3) if ordered else 0.0,
+        "p50_ms": round(percentile(ordered, 50), 3),
+        "p95_ms": round(percentile(ordered, 95), 3),
+        "p99_ms": round(percentile(ordered, 99), 3),
+    }
+
+
+def summarize(label: str, samples: List[Sample], duration_s: float, target_qps: Optional[float]) -> ReplayResult:
+    ok_latencies = sorted(sample.latency_ms for sample in samples if sample.ok)
+    status: Dict[str, int] = {}
+    by_entry: Dict[str, List[float]] = {}
+    by_stage: Dict[str, List[float]] = {}
+    for sample in samples:
+        status[sample.status] = status.get(sample.status, 0) + 1
+        if not sample.ok:
+            continue
+        by_entry.setdefault(sample.entry, []).append(sample.latency_ms)
+        for stage, ms in sample.stages.items():
+            by_stage.setdefault(stage, []).append(ms)
+
+    return ReplayResult(
+        label=label,
+        target_qps=target_qps,
+        requests=len(samples),
+        errors=sum(1 for sample in samples if not sample.ok),
+        duration_s=round(duration_s, 3),
+        achieved_qps=round(len(samples) / duration_s, 2) if duration_s > 0 else 0.0,
+        p50_ms=round(percentile(ok_latencies, 50), 3),
+        p95_ms=round(percentile(ok_latencies, 95), 3),
+        p99_ms=round(percentile(ok_latencies, 99), 3),
+        max_ms=round(ok_latencies[-1], 3) if ok_latencies else 0.0,
+        service_p99_ms=round(percentile(sorted(sample.service_ms for sample in samples if sample.ok), 99), 3),
+        max_lag_ms=round(max((sample.lag_ms for sample in samples), default=0.0), 3),
+        status=status,
+        entries={entry: _distribution(values) for entry, values in sorted(by_entry.items())},
+        stages={stage: _distribution(values) for stage, values in sorted(by_stage.items())},
+    )
+
+
+async def warm_up(target: ReplayTarget, records: List[Dict[str, Any]], count: int) -> None:
+    """측정 전 순차 요청으로 연결 / 스레드 풀 / 라우터 centroid 등을 준비합니다. (결과 캐시를 피하도록 질문 변경)"""
+    for index in range(count):
+        try:
+            await target.send(_repeated(records[index % len(records)], f"w{index}"))
+        except Exception:
+            pass
+
+
+async def run_level(target: ReplayTarget, records: List[Dict[str, Any]], offsets: List[float],
+                    label: str, target_qps: Optional[float]) -> ReplayResult:
+    started = time.perf_counter()
+    samples = await replay(target, records, offsets)
+    return summarize(label, samples, time.perf_counter() - started, target_qps)
+
+
+def find_saturation(results: List[ReplayResult]) -> Optional[int]:
+    """
+    포화가 시작되는 단계의 번호를 찾습니다. (없으면 None)
+    - 에러율이 1%를 넘거나
+    - 달성 QPS가 목표의 90%에 못 미치거나 (요청이 밀려 재생 시간이 늘어남)
+    - p99가 가장 낮은 QPS 단계의 3배를 넘으면 포화로 봅니다.
+    """
+    if not results:
+        return None
+    reference_p99 = results[0].p99_ms
+    for index, result in enumerate(results):
+        if result.error_rate > SATURATION_ERROR_RATE:
+            return index
+        if result.target_qps and result.achieved_qps < result.target_qps * SATURATION_QPS_RATIO:
+            return index
+        if index > 0 and reference_p99 > 0 and result.p99_ms > reference_p99 * SATURATION_P99_FACTOR:
+            return index
+    return None
+
+
+def format_result(result: ReplayResult) -> str:
+    lines = [
+        f"📊 {result.label}: {result.requests}건 / {result.duration_s:.2f}s / 달성 {result.achieved_qps:.1f} qps"
+        + (f" (목표 {result.target_qps:g})" if result.target_qps else ""),
+        f"   지연(예정 시각 기준) p50 {result.p50_ms:.2f}ms / p95 {result.p95_ms:.2f}ms / p99 {result.p99_ms:.2f}ms"
+        f" / max {result.max_ms:.2f}ms  |  서비스 p99 {result.service_p99_ms:.2f}ms / 최대 전송 지연 {result.max_lag_ms:.1f}ms",
+        f"   상태: {result.status}",
+        "",
+        f"   {'entry':<44}{'count':>7}{'mean':>10}{'p50':>10}{'p95':>10}{'p99':>10}",
+    ]
+    for entry, dist in result.entries.items():
+        lines.append(f"   {entry:<44}{dist['count']:>7}{dist['mean_ms']:>10.2f}{dist['p50_ms']:>10.2f}"
+                     f"{dist['p95_ms']:>10.2f}{dist['p99_ms']:>10.2f}")
+    if result.stages:
+        lines.append("")
+        lines.append(f"   {'stage':<44}{'count':>7}{'mean':>10}{'p50':>10}{'p95':>10}{'p99':>10}")
+        for stage, dist in sorted(result.stages.items(), key=lambda item: -item[1]["mean_ms"]):
+            lines.append(f"   {stage:<44}{dist['count']:>7}{dist['mean_ms']:>10.2f}{dist['p50_ms']:>10.2f}"
+                         f"{dist['p95_ms']:>10.2f}{dist['p99_ms']:>10.2f}")
+    return "\n".join(lines)
+
+
+def format_sweep(results: List[ReplayResult], saturation: Optional[int]) -> str:
+    # 단계별 p95 변화가 가장 큰 단계를 보여주어 어디서 먼저 밀리는지 확인
+    worst: Dict[str, float] = {}
+    for result in results:
+        for stage, dist in result.stages.items():
+            worst[stage] = max(worst.get(stage, 0.0), dist["p95_ms"])
+    stages = sorted(worst, key=lambda stage: -worst[stage])[:SWEEP_STAGE_COLUMNS]
+    header = f"{'qps':>8}{'achieved':>10}{'err%':>7}{'p50':>10}{'p95':>10}{'p99':>10}{'lag':>9}  " + "".join(
+        f"{stage[:14]:>16}" for stage in stages
+    )
+    lines = [header, "-" * len(header)]
+    for index, result in enumerate(results):
+        mark = " ⛔ 포화" if index == saturation else ""
+        stage_cols = "".join(
+            f"{result.stages[stage]['p95_ms'] if stage in result.stages else 0.0:>16.2f}" for stage in stages
+        )
+        lines.append(
+            f"{result.target_qps or 0:>8g}{result.achieved_qps:>10.1f}{result.error_rate * 100:>7.1f}"
+            f"{result.p50_ms:>10.2f}{result.p95_ms:>10.2f}{result.p99_ms:>10.2f}{result.max_lag_ms:>9.1f}  "
+            f"{stage_cols}{mark}"
+        )
+    if stages:
+        lines.append(f"(단계 열은 단계별 p95 ms, p95가 큰 {len(stages)}개 단계)")
+    if saturation is None:
+        lines.append("✅ 측정한 QPS 범위에서는 포화가 관측되지 않았습니다.")
+    else:
+        safe = results[saturation - 1].target_qps if saturation > 0 else None
+        lines.append(f"⛔ {results[saturation].target_qps:g} qps에서 포화 시작"
+                     + (f" (안정 구간: {safe:g} qps 이하)" if safe else " (가장 낮은 QPS부터 포화)"))
+    return "\n".join(lines)
+
+
+async def main(args: argparse.Namespace) -> int:
+    entries = [entry.strip() for entry in args.entries.split(",") if entry.strip()] if args.entries else None
+    records = load_log(args.log, entries, args.requests, args.keep_repeats)
+    if not records:
+        print(f"❌ 재생할 기록이 없습니다: {args.log}")
+        return 2
+
+    if args.target:
+        target: ReplayTarget = HttpTarget(args.target)
+    else:
+        if args.fakes:
+            from benchmarks.fakes import install_fakes
+            install_fakes(parse_latency(args.latency, args.seed), docs_per_collection=args.docs, seed=args.seed)
+        target = InProcessTarget()
+    await target.open()
+
+    results: List[ReplayResult] = []
+    try:
+        with quiet(not args.verbose):
+            await warm_up(target, records, args.warmup)
+        if args.sweep:
+            levels = [float(value) for value in args.sweep.split(",")]
+            for level, qps in enumerate(levels):
+                # 단계마다 질문을 바꿔 앞 단계의 결과 캐시가 다음 단계 측정에 섞이지 않도록 함
+                level_records = records if level == 0 or args.keep_repeats else [
+                    _repeated(record, f"s{level}") for record in records
+                ]
+                offsets = fixed_offsets(len(level_records), qps, args.poisson, args.seed)
+                with quiet(not args.verbose):
+                    result = await run_level(target, level_records, offsets, f"{qps:g} qps", qps)
+                results.append(result)
+                print(f"✅ [REPLAY] {qps:g} qps: 달성 {result.achieved_qps:.1f} qps / p99 {result.p99_ms:.2f}ms"
+                      f" / 에러 {result.errors}건")
+        else:
+            if args.qps:
+                offsets = fixed_offsets(len(records), args.qps, args.poisson, args.seed)
+                label = f"{args.qps:g} qps" + (" (poisson)" if args.poisson else "")
+            else:
+                offsets = original_offsets(records, args.speed)
+                label = f"원래 간격 x{args.speed:g}"
+            with quiet(not args.verbose):
+                results.append(await run_level(target, records, offsets, label, args.qps or None))
+    finally:
+        await target.close()
+
+    print()
+    if args.sweep:
+        print(format_sweep(results, find_saturation(results)))
+        print()
+    for result in results if not args.sweep else results[-1:]:
+        print(format_result(result))
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump([asdict(result) for result in results], f, ensure_ascii=False, indent=2)
+    return 0
+
+
+def parse_args(argv: List[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="쿼리 로그를 open-loop로 재생하여 지연 시간 / 단계별 소요 시간 / 포화 지점 측정")
+    parser.add_argument("log", help="쿼리 로그 JSONL 파일 (QUERY_LOG_PATH)")
+    parser.add_argument("--target", default="", help="실행 중인 서버 주소 (예: http://localhost:8000). 비우면 프로세스 안의 앱 호출")
+    parser.add_argument("--fakes", action="store_true", help="프로세스 안 재생 시 가짜 백엔드(benchmarks/fakes.py) 사용")
+    parser.add_argument("--latency", default=DEFAULT_LATENCY, help="--fakes 백엔드별 지연 '이름=평균ms:±ms,...'")
+    parser.add_argument("--docs", type=int, default=200, help="--fakes 가짜 Weaviate 컬렉션별 문서 수")
+    parser.add_argument("--entries", default="", help="쉼표로 구분한 재생할 진입점 (예: /search_table,weaviate/search_company_knowledge)")
+    parser.add_argument("-n", "--requests", type=int, default=0, help="재생할 요청 수 (기록보다 많으면 반복, 0이면 기록 전체)")
+    parser.add_argument("--keep-repeats", action="store_true", help="반복분 / --sweep 단계별 질문을 바꾸지 않음 (캐시 적중 포함 측정)")
+    parser.add_argument("--warmup", type=int, default=10, help="측정 전 순차 워밍업 요청 수")
+    parser.add_argument("--speed", type=float, default=1.0, help="원래 도착 간격 재생 배속 (2 = 2배 빠르게)")
+    parser.add_argument("--qps", type=float, default=0.0, help="원래 간격 대신 고정 QPS로 재생")
+    parser.add_argument("--poisson", action="store_true", help="고정 QPS에서 지수 분포 간격 사용")
+    parser.add_argument("--sweep", default="", help="쉼표로 구분한 QPS 목록을 차례로 재생하여 포화 지점 확인 (예: 10,25,50,100)")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--json", default="", help="결과를 JSON 파일로도 저장")
+    parser.add_argument("-v", "--verbose", action="store_true", help="앱 로그(print) 출력")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main(parse_args(sys.argv[1:]))))
@@ -0,0 +1,231 @@
+# benchmarks/run.py
+"""
+오프라인 벤치마크 실행기
+
+실제 Gemini / Weaviate / Supabase / Neo4j 없이, 가짜 백엔드(benchmarks/fakes.py)를 설치한 뒤
+검색 함수 / MCP 도구 / FastAPI 라우트를 프로세스 안에서 지정한 동시성으로 호출합니다.
+
+사용 예 (프로젝트 루트에서):
+    python -m benchmarks.run                                   # 전체 시나리오
+    python -m benchmarks.run -s search_target_table,route:/search_table -c 1,10,50
+    python -m benchmarks.run --latency gemini=30:5,weaviate=8:3 --save-baseline
+    python -m benchmarks.run --compare --fail-on-regression    # 기준선 대비 회귀 확인 (CI용)
+"""
+import os
+import sys
+import json
+import random
+import asyncio
+import argparse
+import contextlib
+
+from dataclasses import asdict
+from typing import Any, Awaitable, Callable, Dict, List
+
+from benchmarks.fakes import FakeLatency, LatencyProfile, FakeBackends, install_fakes, make_sentence, hash_embedding
+from benchmarks.harness import (
+    BenchResult, run_benchmark, save_baseline, load_baseline, compare, format_report, format_comparison
+)
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+# 기본 지연 시간 (평균ms:±ms) - 사내망 Weaviate/Neo4j, 외부 Gemini/Supabase 정도의 값
+DEFAULT_LATENCY = "gemini=40:10,weaviate=8:3,supabase=25:8,neo4j=20:6"
+
+
+def parse_latency(spec: str, seed: int) -> FakeLatency:
+    """'gemini=40:10,weaviate=8:3' 형식을 FakeLatency로 변환합니다. (빈 문자열이면 지연 없음)"""
+    latency = FakeLatency(seed=seed)
+    for part in filter(None, (item.strip() for item in spec.split(","))):
+        name, _, value = part.partition("=")
+        base, _, jitter = value.partition(":")
+        setattr(latency, name.strip(), LatencyProfile(float(base or 0), float(jitter or 0)))
+    return latency
+
+
+class QueryPool:
+    """
+    요청 번호 -> 질문 문자열. 기본은 요청마다 다른 질문(캐시 미스 경로 측정)이고,
+    repeat > 0이면 repeat개의 질문을 돌려 사용합니다. (캐시 적중 경로 측정)
+    """
+
+    def __init__(self, repeat: int = 0, seed: int = 7):
+        self.repeat = repeat
+        self.seed = seed
+
+    def __call__(self, index: int) -> str:
+        key = index % self.repeat if self.repeat else index
+        rng = random.Random(f"{self.seed}:{key}")
+        return f"{make_sentence(rng, rng.randint(3, 8))} q{key}"
+
+
+def build_scenarios(fakes: FakeBackends, queries: QueryPool) -> Dict[str, Callable[[], Callable[[int], Awaitable[Any]]]]:
+    """시나리오 이름 -> (요청 번호를 받아 요청 1건을 실행하는 함수)를 만드는 함수"""
+    from app.schemas import SearchQuery, Neo4jSearchQuery, FederatedSearchQuery
+    from app.service import retriever
+    from app.service.federated import federated_search
+
+    def search_logic(db_type: str):
+        def build():
+            return lambda i: retriever.search_logic(SearchQuery(query_text=queries(i)), db_type)
+        return build
+
+    def search_target_table():
+        return lambda i: retriever.search_target_table(SearchQuery(query_text=queries(i), match_count=3))
+
+    def fetch_data_by_ids():
+        collections = retriever.TARGET_COLLECTIONS
+
+        def run(i: int):
+            collection = fakes.weaviate.collections.get(collections[i % len(collections)])
+            start = (i * 3) % max(1, len(collection.ids) - 3)
+            return retriever.fetch_data_by_ids(collection.name, collection.ids[start:start + 3])
+        return run
+
+    def search_neo4j_graph():
+        # 임베딩 단계를 빼고 그래프 조회만 측정
+        def run(i: int):
+            vector = hash_embedding(queries(i), fakes.genai.dimensions).tolist()
+            return retriever.search_neo4j_graph(Neo4jSearchQuery(query_text=queries(i)), vector)
+        return run
+
+    def federated():
+        return lambda i: federated_search(FederatedSearchQuery(query_text=queries(i)))
+
+    def mcp_tool(name: str):
+        def build():
+            from app.mcp import tools
+            if name == "query_knowledge_base":
+                return lambda i: tools.query_knowledge_base(queries(i), db_type="supabase")
+            if name == "get_search_data":
+                return lambda i: tools.get_search_data(queries(i))
+            return lambda i: tools.get_federated_search_data(queries(i))
+        return build
+
+    def route(path: str, body: Callable[[str], Dict[str, Any]]):
+        def build():
+            import httpx
+            from app.api.main import app
+
+            client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=60)
+
+            async def run(i: int):
+                response = await client.post(path, json=body(queries(i)))
+                if response.status_code != 200:
+                    raise RuntimeError(f"HTTP {response.status_code}: {response.text[:200]}")
+                return response.content
+            return run
+        return build
+
+    return {
+        "search_logic:supabase": search_logic("supabase"),
+        "search_logic:weaviate": search_logic("weaviate"),
+        "search_target_table": search_target_table,
+        "fetch_data_by_ids": fetch_data_by_ids,
+        "search_neo4j_graph": search_neo4j_graph,
+        "federated_search": federated,
+        "mcp:query_knowledge_base": mcp_tool("query_knowledge_base"),
+        "mcp:get_search_data": mcp_tool("get_search_data"),
+        "mcp:get_federated_search_data": mcp_tool("get_federated_search_data"),
+        "route:/search-docs": route("/search-docs", lambda q: {"query_text": q}),
+        "route:/search_table": route("/search_table", lambda q: {"query_text": q}),
+        "route:/search-neo4j": route("/search-neo4j", lambda q: {"query_text": q}),
+        "route:/search-federated": route("/search-federated", lambda q: {"query_text": q}),
+    }
+
+
+@contextlib.contextmanager
+def quiet(enabled: bool):
+    """앱의 요청별 print 로그가 측정을 방해하지 않도록 stdout을 버립니다."""
+    if not enabled:
+        yield
+        return
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        yield
+
+
+async def main(args: argparse.Namespace) -> int:
+    latency = parse_latency(args.latency, args.seed)
+    fakes = install_fakes(latency, docs_per_collection=args.docs, seed=args.seed)
+    queries = QueryPool(repeat=args.repeat, seed=args.seed)
+    scenarios = build_scenarios(fakes, queries)
+
+    selected = [name.strip() for name in args.scenarios.split(",") if name.strip()] if args.scenarios else list(scenarios)
+    unknown = [name for name in selected if name not in scenarios]
+    if unknown:
+        print(f"❌ 알 수 없는 시나리오: {unknown}\n   사용 가능: {', '.join(scenarios)}")
+        return 2
+
+    concurrencies = [int(value) for value in args.concurrency.split(",")]
+    results: List[BenchResult] = []
+    # 시나리오마다 다른 질문 번호 구간을 사용하여 앞 시나리오의 캐시가 결과에 섞이지 않도록 함
+    start_index = 0
+    for name in selected:
+        factory = scenarios[name]()
+        for concurrency in concurrencies:
+            label = name if len(concurrencies) == 1 else f"{name}@c{concurrency}"
+            with quiet(not args.verbose):
+                result = await run_benchmark(
+                    label, factory, requests=args.requests, concurrency=concurrency,
+                    warmup=args.warmup, alloc_samples=args.alloc_samples, start_index=start_index
+                )
+            start_index += args.warmup + args.requests + args.alloc_samples
+            results.append(result)
+            print(f"✅ [BENCH] {label}: p50 {result.p50_ms:.2f}ms / p99 {result.p99_ms:.2f}ms / {result.throughput_rps:.1f} rps"
+                  + (f" / 에러 {result.errors}건 {result.error_types}" if result.errors else ""))
+
+    print()
+    print(format_report(results))
+
+    settings = {
+        "latency": args.latency, "requests": args.requests, "concurrency": args.concurrency,
+        "docs": args.docs, "repeat": args.repeat, "seed": args.seed,
+    }
+    exit_code = 0
+    if args.compare:
+        if not os.path.exists(args.baseline):
+            print(f"\n⚠️ 기준선 파일이 없습니다: {args.baseline} (--save-baseline으로 먼저 저장하세요)")
+        else:
+            baseline = load_baseline(args.baseline)
+            if baseline.get("settings") and baseline["settings"] != settings:
+                print(f"\n⚠️ 기준선과 실행 설정이 다릅니다. 기준선: {baseline['settings']}")
+            rows = compare(results, baseline, args.tolerance)
+            print(f"\n📊 기준선 비교 ({baseline.get('created_at')}, 허용 범위 ±{args.tolerance * 100:.0f}%)")
+            print(format_comparison(rows))
+            if args.fail_on_regression and any(row["regression"] for row in rows):
+                exit_code = 1
+
+    if args.save_baseline:
+        save_baseline(results, args.baseline, settings)
+        print(f"\n💾 기준선 저장: {args.baseline}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump([asdict(result) for result in results], f, ensure_ascii=False, indent=2)
+
+    return exit_code
+
+
+def parse_args(argv: List[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="가짜 백엔드로 검색 파이프라인 지연 시간 / 처리량 / 메모리 할당 측정")
+    parser.add_argument("-s", "--scenarios", default="", help="쉼표로 구분한 시나리오 이름 (기본: 전체)")
+    parser.add_argument("-n", "--requests", type=int, default=200, help="시나리오별 측정 요청 수")
+    parser.add_argument("-c", "--concurrency", default="10", help="동시 요청 수. 쉼표로 여러 값을 주면 차례로 측정 (예: 1,10,50)")
+    parser.add_argument("--warmup", type=int, default=10, help="측정 전 워밍업 요청 수")
+    parser.add_argument("--alloc-samples", type=int, default=20, help="메모리 할당 측정 요청 수 (0이면 생략)")
+    parser.add_argument("--latency", default=DEFAULT_LATENCY, help="백엔드별 지연 '이름=평균ms:±ms,...' (빈 문자열이면 지연 없음)")
+    parser.add_argument("--docs", type=int, default=200, help="가짜 Weaviate 컬렉션별 문서 수")
+    parser.add_argument("--repeat", type=int, default=0, help="0보다 크면 이 개수의 질문만 반복 사용 (캐시 적중 경로 측정)")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="기준선 JSON 파일 경로")
+    parser.add_argument("--save-baseline", action="store_true", help="이번 결과를 기준선으로 저장")
+    parser.add_argument("--compare", action="store_true", help="기준선과 비교")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="회귀로 판단할 변화율 (0.1 = 10%%)")
+    parser.add_argument("--fail-on-regression", action="store_true", help="회귀가 있으면 종료 코드 1")
+    parser.add_argument("--json", default="", help="결과를 JSON 파일로도 저장")
+    parser.add_argument("-v", "--verbose", action="store_true", help="앱 로그(print) 출력")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main(parse_args(sys.argv[1:]))))
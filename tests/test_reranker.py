@@ -0,0 +1,90 @@
+# tests/test_reranker.py
+import random
+
+import pytest
+
+import app.service.reranker as reranker
+from app.service.reranker import rerank_candidates, get_ngrams
+
+# 키워드/2-gram이 자주 겹치도록 작은 글자 집합으로 질문과 본문을 만듭니다.
+ALPHABET = "야근식대한도경조사지원금 ab_"
+
+
+def baseline_rerank(raw_results, query_text, return_count, threshold=0.6):
+    """벡터화 이전의 기존 채점 루프 (유사도 + 키워드당 0.1 + 2-gram당 0.02, 안정 정렬)"""
+    query_keywords = [w for w in query_text.split() if len(w) >= 2]
+    query_grams = get_ngrams(query_text)
+
+    ranked_results = []
+    for doc in raw_results:
+        content = doc.get('content', '') or ""
+        score = doc.get('similarity', 0)
+
+        for word in query_keywords:
+            if word in content:
+                score += 0.1
+
+        gram_match_count = 0
+        for gram in query_grams:
+            if gram in content:
+                gram_match_count += 1
+
+        score += (gram_match_count * 0.02)
+
+        if score > threshold:
+            doc['final_score'] = score
+            ranked_results.append(doc)
+
+    ranked_results.sort(key=lambda x: x['final_score'], reverse=True)
+    return ranked_results[:return_count]
+
+
+def random_text(rng, max_len):
+    return "".join(rng.choice(ALPHABET) for _ in range(rng.randint(0, max_len)))
+
+
+def random_case(rng, n):
+    query = " ".join(random_text(rng, 4) or "a" for _ in range(rng.randint(1, 4)))
+    raw_results = [
+        {
+            "id": i,
+            "content": random_text(rng, 40) if rng.random() > 0.05 else None,
+            # 동점 처리까지 비교하도록 유사도를 소수 둘째 자리로 반올림
+            "similarity": round(rng.random(), 2),
+        }
+        for i in range(n)
+    ]
+    return query, raw_results
+
+
+def ranked(results):
+    return [(doc["id"], doc["final_score"]) for doc in results]
+
+
+def assert_same_as_baseline(query, raw_results, return_count):
+    expected = baseline_rerank([dict(doc) for doc in raw_results], query, return_count)
+    actual = rerank_candidates([dict(doc) for doc in raw_results], query, return_count)
+    # 점수까지 == 로 비교 (비트 단위 동일)
+    assert ranked(actual) == ranked(expected), (query, return_count)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_matches_baseline_without_pruning(monkeypatch, seed):
+    monkeypatch.setattr(reranker, "RERANK_PRUNE_MIN_CANDIDATES", 0)
+    rng = random.Random(seed)
+    for _ in range(200):
+        query, raw_results = random_case(rng, rng.randint(0, 80))
+        assert_same_as_baseline(query, raw_results, rng.choice([0, 1, 3, 10, 100, None]))
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_matches_baseline_with_pruning(monkeypatch, seed):
+    monkeypatch.setattr(reranker, "RERANK_PRUNE_MIN_CANDIDATES", 1000)
+    rng = random.Random(seed)
+    for return_count in (0, 1, 5, 20, 1500, None):
+        query, raw_results = random_case(rng, rng.randint(1000, 1500))
+        assert_same_as_baseline(query, raw_results, return_count)
+
+
+def test_empty_candidates():
+    assert rerank_candidates([], "야근 식대", 3) == []